@@ -0,0 +1,284 @@
+"""
+单词详情页解析基准测试
+
+不经过 Scrapy 引擎和网络，直接用保存下来的单词页面调用各个爬虫的 parse_word_details，
+报告每秒解析页数、各函数耗时（cProfile）、峰值 RSS 和内存分配（tracemalloc），
+并与保存的基准结果对比。同时记录解析结果的摘要，重构解析代码后可以确认输出没有变化。
+
+页面保存在 benchmarks/fixtures/<页面类型>/<单词>.html，页面类型为 zh / ja / vi
+（对应 cambridge_dict.extraction 中的解析配置）。
+
+用法：
+    cd cambridge_dict
+    # 下载测试页面（只需要执行一次）
+    python benchmarks/bench_parser.py --record
+    python benchmarks/bench_parser.py --record --words set run take --profiles zh
+    # 运行基准测试并与基准结果对比
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --spiders dictionary single_word_ja --repeat 20
+    # 保存当前结果为新的基准
+    python benchmarks/bench_parser.py --save-baseline
+"""
+
+import argparse
+import cProfile
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pstats
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# 添加项目根目录到 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from itemadapter import ItemAdapter
+from scrapy.http import HtmlResponse, Request
+
+from cambridge_dict.spiders.cambridge import DictionarySpider
+from cambridge_dict.spiders.cambridge_vi import DictionarySpiderVi
+from cambridge_dict.spiders.sing_word_vi import SingleWordViSpider4Vi
+from cambridge_dict.spiders.single_word import SingleWordSpider
+from cambridge_dict.spiders.single_word_ja import SingleWordSpider4Ja
+from cambridge_dict.spiders.single_word_ja_batch import SingleWordSpider4JaBatch
+from cambridge_dict.spiders.single_word_ja_parallel import SingleWordSpider4JaParallel
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'parser_baseline.json')
+
+SPIDERS = {
+    spider_cls.name: spider_cls
+    for spider_cls in (
+        DictionarySpider, DictionarySpiderVi, SingleWordSpider, SingleWordViSpider4Vi,
+        SingleWordSpider4Ja, SingleWordSpider4JaBatch, SingleWordSpider4JaParallel,
+    )
+}
+
+# 页面类型对应的词典路径
+DICTIONARY_PATHS = {
+    'zh': 'english-chinese-simplified',
+    'ja': 'english-japanese',
+    'vi': 'english-vietnamese',
+}
+WORD_URL = 'https://dictionary.cambridge.org/dictionary/{path}/{word}'
+
+# 大词条、习语页和短语动词页
+DEFAULT_WORDS = [
+    'set', 'run', 'take', 'get', 'make', 'go', 'put', 'break',
+    'apple', 'look-up', 'give-up', 'break-the-ice', 'piece-of-cake',
+]
+
+
+def word_url(profile, word):
+    return WORD_URL.format(path=DICTIONARY_PATHS[profile], word=word)
+
+
+def record_fixtures(fixtures_dir, profiles, words):
+    """下载单词页面保存为测试数据"""
+    import requests
+
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    }
+    for profile in profiles:
+        profile_dir = os.path.join(fixtures_dir, profile)
+        os.makedirs(profile_dir, exist_ok=True)
+        for word in words:
+            url = word_url(profile, word)
+            resp = requests.get(url, headers=headers, timeout=30)
+            if resp.status_code != 200:
+                print(f"skip {url}: HTTP {resp.status_code}")
+                continue
+            with open(os.path.join(profile_dir, f"{word}.html"), 'wb') as f:
+                f.write(resp.content)
+            print(f"saved {profile}/{word}.html ({len(resp.content) // 1024} KB)")
+            time.sleep(1)
+
+
+def load_fixtures(fixtures_dir, profile):
+    """读取某种页面类型的全部测试页面，返回 [(url, letter, body), ...]"""
+    profile_dir = os.path.join(fixtures_dir, profile)
+    if not os.path.isdir(profile_dir):
+        return []
+    pages = []
+    for filename in sorted(os.listdir(profile_dir)):
+        if not filename.endswith('.html'):
+            continue
+        word = filename[:-len('.html')]
+        with open(os.path.join(profile_dir, filename), 'rb') as f:
+            pages.append((word_url(profile, word), word[0].lower(), f.read()))
+    return pages
+
+
+def make_response(url, letter, body):
+    # 每次都新建响应，HTML 解析（构建 lxml 树）的开销也计入
+    return HtmlResponse(url=url, body=body, encoding='utf-8', request=Request(url, meta={'letter': letter}))
+
+
+def parse_pages(spider, pages):
+    items = []
+    for url, letter, body in pages:
+        items.extend(spider.parse_word_details(make_response(url, letter, body)) or [])
+    return items
+
+
+def output_digest(items):
+    """解析结果摘要，用来确认重构前后输出一致"""
+    digest = hashlib.sha1()
+    for item in items:
+        digest.update(json.dumps(ItemAdapter(item).asdict(), ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def make_spider(spider_cls, work_dir):
+    """创建爬虫，状态目录和已处理 URL 目录放在 work_dir 中，不读写真实的爬虫状态"""
+    params = inspect.signature(spider_cls.__init__).parameters
+    kwargs = {
+        name: tempfile.mkdtemp(prefix=f'{spider_cls.name}-{name}-', dir=work_dir)
+        for name in ('state_dir', 'processed_dir')
+        if name in params
+    }
+    return spider_cls(**kwargs)
+
+
+def bench_spider(spider_cls, pages, repeat, work_dir):
+    spider = make_spider(spider_cls, work_dir)
+
+    # 预热一次，同时得到解析结果
+    items = parse_pages(spider, pages)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse_pages(spider, pages)
+    elapsed = time.perf_counter() - start
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    parse_pages(spider, pages)
+    profiler.disable()
+
+    tracemalloc.start()
+    parse_pages(spider, pages)
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    alloc_blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+
+    close = getattr(getattr(spider, 'state_manager', None), 'close', None)
+    if close:
+        close()
+
+    return {
+        'pages': len(pages),
+        'items': len(items),
+        'pages_per_sec': len(pages) * repeat / elapsed,
+        'ms_per_page': elapsed * 1000 / (len(pages) * repeat),
+        'peak_alloc_kb': peak_alloc / 1024,
+        'alloc_blocks': alloc_blocks,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'output_sha1': output_digest(items),
+    }, profiler
+
+
+def print_profile(profiler, top):
+    stats = pstats.Stats(profiler)
+    stats.sort_stats('tottime')
+    rows = []
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        filename, lineno, name = func
+        rows.append((tt, ct, nc, f"{os.path.basename(filename)}:{lineno}({name})"))
+    rows.sort(reverse=True)
+    print(f"    {'tottime (ms)':>12}{'cumtime (ms)':>14}{'calls':>10}  function")
+    for tt, ct, nc, label in rows[:top]:
+        print(f"    {tt * 1000:>12.1f}{ct * 1000:>14.1f}{nc:>10}  {label}")
+
+
+def compare(results, baseline, threshold):
+    """与基准结果对比，返回是否有性能退化"""
+    regressed = False
+    print(f"\n{'spider':<32}{'pages/s':>10}{'baseline':>10}{'change':>9}  output")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<32}{result['pages_per_sec']:>10.1f}{'-':>10}{'-':>9}  (no baseline)")
+            continue
+        change = result['pages_per_sec'] / base['pages_per_sec'] - 1
+        output = 'same' if result['output_sha1'] == base['output_sha1'] else 'CHANGED'
+        flag = ''
+        if change < -threshold:
+            regressed = True
+            flag = '  REGRESSION'
+        print(f"{name:<32}{result['pages_per_sec']:>10.1f}{base['pages_per_sec']:>10.1f}"
+              f"{change:>+9.1%}  {output}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='单词详情页解析基准测试')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help='测试页面目录')
+    parser.add_argument('--record', action='store_true', help='下载测试页面后退出')
+    parser.add_argument('--words', nargs='+', default=DEFAULT_WORDS, help='--record 时下载的单词')
+    parser.add_argument('--profiles', nargs='+', default=list(DICTIONARY_PATHS), help='--record 时下载的页面类型')
+    parser.add_argument('--spiders', nargs='+', default=list(SPIDERS), choices=list(SPIDERS))
+    parser.add_argument('--repeat', type=int, default=10, help='计时阶段重复解析的轮数')
+    parser.add_argument('--top', type=int, default=15, help='每个爬虫显示耗时最多的函数个数')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基准结果文件')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基准')
+    parser.add_argument('--threshold', type=float, default=0.10, help='速度下降超过该比例视为退化')
+    args = parser.parse_args()
+
+    fixtures_dir = os.path.abspath(args.fixtures)
+    baseline_file = os.path.abspath(args.baseline)
+    if args.record:
+        record_fixtures(fixtures_dir, args.profiles, args.words)
+        return
+
+    logging.disable(logging.WARNING)
+    # 爬虫的状态目录（settings.py 中可能是绝对路径）和其他写在当前目录下的文件都放到临时目录中，
+    # 避免读到或改动真实的爬虫状态
+    work_dir = tempfile.mkdtemp(prefix='bench_parser_')
+    os.chdir(work_dir)
+
+    results = {}
+    for name in args.spiders:
+        spider_cls = SPIDERS[name]
+        pages = load_fixtures(fixtures_dir, spider_cls.extractor.profile.name)
+        if not pages:
+            print(f"{name}: no fixtures in {fixtures_dir}/{spider_cls.extractor.profile.name}, run with --record first")
+            continue
+        result, profiler = bench_spider(spider_cls, pages, args.repeat, work_dir)
+        results[name] = result
+        print(f"\n{name}: {result['pages']} pages, {result['items']} items, "
+              f"{result['pages_per_sec']:.1f} pages/s ({result['ms_per_page']:.2f} ms/page), "
+              f"peak alloc {result['peak_alloc_kb']:.0f} KB, {result['alloc_blocks']} live blocks, "
+              f"max RSS {result['max_rss_mb']:.0f} MB")
+        print_profile(profiler, args.top)
+
+    if not results:
+        return
+
+    regressed = False
+    if os.path.exists(baseline_file):
+        with open(baseline_file, 'r', encoding='utf-8') as f:
+            regressed = compare(results, json.load(f), args.threshold)
+
+    if args.save_baseline:
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nbaseline saved to {baseline_file}")
+
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+SpiderState 状态写入开销基准测试
+
+在不同规模的已有状态（1k ~ 500k 个 URL 记录）下，测量每次
+mark_url_status + update_progress 的平均耗时，用来确认 journal 后端的
+开销不随状态规模增长。
+
+用法：
+    cd cambridge_dict
+    python benchmarks/bench_spider_state.py
+    python benchmarks/bench_spider_state.py --sizes 1000 10000 --ops 500 --backends json journal sqlite
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from cambridge_dict.utils.spider_state import SpiderState
+
+WORD_URL = 'https://dictionary.cambridge.org/dictionary/english-chinese-simplified/word-{}'
+
+
+def prepare_state(state_dir, backend, size):
+    """预先写入 size 条失败记录"""
+    state = SpiderState(state_dir=state_dir, backend=backend)
+    record = {'status': 'failed', 'retry_count': 0, 'last_update': '2024-01-01T00:00:00'}
+    if backend == 'json':
+        # 直接写内存再落盘一次，避免准备阶段本身就是 O(n^2)
+        state.backend.url_state['word_level'].update(
+            (WORD_URL.format(i), dict(record)) for i in range(size)
+        )
+        state.backend.set_url(WORD_URL.format(0), 'word', dict(record))
+    else:
+        for i in range(size):
+            state.backend.set_url(WORD_URL.format(i), 'word', dict(record))
+    state.close()
+
+
+def run_ops(state_dir, backend, size, ops):
+    """重新加载状态后执行 ops 次更新，返回 (加载耗时, 每次更新耗时)"""
+    start = time.perf_counter()
+    state = SpiderState(state_dir=state_dir, backend=backend)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(ops):
+        url = WORD_URL.format(size + i)
+        state.mark_url_status(url, 'word', 'failed')
+        state.update_progress(processed_words=state.get_progress()['processed_words'] + 1)
+        state.mark_url_status(url, 'word', 'success')
+    per_op = (time.perf_counter() - start) / ops
+    state.close()
+    return load_time, per_op
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SpiderState 状态后端基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 500000])
+    parser.add_argument('--ops', type=int, default=1000, help='每个规模下执行的更新次数')
+    parser.add_argument('--backends', nargs='+', default=['json', 'journal', 'sqlite'])
+    parser.add_argument('--json-max-size', type=int, default=20000,
+                        help='json 后端每次全量重写，超过该规模跳过')
+    args = parser.parse_args()
+
+    print(f"{'backend':<10}{'urls':>10}{'load (s)':>12}{'per update (us)':>18}")
+    for backend in args.backends:
+        for size in args.sizes:
+            if backend == 'json' and size > args.json_max_size:
+                print(f"{backend:<10}{size:>10}{'skipped':>12}{'':>18}")
+                continue
+            state_dir = tempfile.mkdtemp(prefix='spider_state_bench_')
+            try:
+                prepare_state(state_dir, backend, size)
+                load_time, per_op = run_ops(state_dir, backend, size, args.ops)
+            finally:
+                shutil.rmtree(state_dir, ignore_errors=True)
+            print(f"{backend:<10}{size:>10}{load_time:>12.3f}{per_op * 1e6:>18.1f}")
+
+
+if __name__ == '__main__':
+    main()
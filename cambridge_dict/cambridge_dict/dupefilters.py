@@ -0,0 +1,181 @@
+"""
+持久化的 URL 去重
+
+BloomDupeFilter 代替 Scrapy 默认的 RFPDupeFilter（DUPEFILTER_CLASS）：
+- URL 先规范化（查询参数排序、去掉锚点），同一个单词从不同范围页、短语链接进入时只抓取一次
+- 内存中只有可扩容的 Bloom filter（utils/bloom.py），几百万个 URL 只占几 MB
+- Bloom filter 命中时再到 SQLite 中精确确认，误判不会漏抓页面
+- 保存在爬虫的状态目录中（spider.state_manager.state_dir），重启后已抓取的页面不再请求
+
+只有 item 已经写入并落盘的页面（page_persisted 信号，内容未变化的页面同样会发送）
+在重启后仍视为重复；下载成功但没有解析出 item、item 被丢弃或者还没来得及落盘的页面，
+和上次运行中已调度但没有完成的请求一样在启动时删除，可以重新请求
+（设置了 JOBDIR 时保留，它们还在磁盘队列中）。
+回调解析出错的页面也会删除记录，下次重新抓取。dont_filter=True 的请求不经过去重。
+"""
+
+import logging
+import os
+import sqlite3
+import time
+
+from scrapy import signals
+from scrapy.dupefilters import BaseDupeFilter
+from w3lib.url import canonicalize_url
+
+from .signals import page_persisted
+from .utils.bloom import ScalableBloomFilter
+from .utils.frontier import url_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def _signed(fingerprint):
+    """SQLite 的 INTEGER 是有符号 64 位"""
+    return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+
+def request_url_fingerprint(request):
+    """规范化 URL 后的请求指纹"""
+    return url_fingerprint(canonicalize_url(request.url), request.method)
+
+
+class BloomDupeFilter(BaseDupeFilter):
+    """Bloom filter + SQLite 精确确认的持久化去重"""
+
+    def __init__(self, state_dir, capacity=1000000, error_rate=0.01, keep_scheduled=False,
+                 batch_size=1000, flush_interval=5.0, debug=False, stats=None):
+        self.state_dir = state_dir
+        self.db_path = os.path.join(state_dir, 'seen_urls.sqlite3')
+        self.bloom_path = os.path.join(state_dir, 'seen_urls.bloom')
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.keep_scheduled = keep_scheduled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.debug = debug
+        self.stats = stats
+        self.conn = None
+        self.bloom = None
+        # 未提交的新指纹和已完成的指纹
+        self.pending = set()
+        self.pending_done = set()
+        self._last_flush = time.monotonic()
+        self._logged_duplicate = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        spider = crawler.spider
+        state_dir = getattr(getattr(spider, 'state_manager', None), 'state_dir', None)
+        if not state_dir:
+            # 没有状态目录的爬虫（批量单词爬虫等）
+            state_dir = os.path.join(settings.get('BLOOM_DUPEFILTER_DIR', 'dupefilter'), spider.name)
+        df = cls(
+            state_dir,
+            capacity=settings.getint('BLOOM_DUPEFILTER_CAPACITY', 1000000),
+            error_rate=settings.getfloat('BLOOM_DUPEFILTER_ERROR_RATE', 0.01),
+            keep_scheduled=bool(settings.get('JOBDIR')),
+            debug=settings.getbool('DUPEFILTER_DEBUG'),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(df.page_persisted, signal=page_persisted)
+        crawler.signals.connect(df.spider_error, signal=signals.spider_error)
+        return df
+
+    def open(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen (
+                fp INTEGER PRIMARY KEY,
+                done INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        removed = 0
+        if not self.keep_scheduled:
+            with self.conn:
+                removed = self.conn.execute('DELETE FROM seen WHERE done = 0').rowcount
+        total = self.conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+        self.bloom = ScalableBloomFilter.load(self.bloom_path, self.capacity, self.error_rate)
+        if self.bloom is None or removed or len(self.bloom) != total:
+            # 保存的过滤器与数据库不一致（上次没有正常关闭或删除了未完成的请求），从数据库重建
+            self.bloom = ScalableBloomFilter(self.capacity, self.error_rate)
+            for (fp,) in self.conn.execute('SELECT fp FROM seen'):
+                self.bloom.add(fp & 0xFFFFFFFFFFFFFFFF)
+        logger.info(
+            f"Dupefilter opened: {total} known URLs, {removed} unfinished URLs from the last run dropped, "
+            f"bloom filter {self.bloom.nbytes / 1024 / 1024:.1f} MB"
+        )
+
+    def request_seen(self, request):
+        fp = request_url_fingerprint(request)
+        if fp in self.bloom:
+            key = _signed(fp)
+            if key in self.pending or self.conn.execute('SELECT 1 FROM seen WHERE fp = ?', (key,)).fetchone():
+                return True
+            # Bloom filter 误判
+            if self.stats:
+                self.stats.inc_value('dupefilter/bloom_false_positive')
+        self.bloom.add(fp)
+        self.pending.add(_signed(fp))
+        self._maybe_flush()
+        return False
+
+    def page_persisted(self, request, spider):
+        """页面的 item 都已落盘，重启后不再请求"""
+        if request.dont_filter:
+            return
+        # 重定向前的 URL 也记为已完成
+        for url in (*request.meta.get('redirect_urls', ()), request.url):
+            self.pending_done.add(_signed(url_fingerprint(canonicalize_url(url), request.method)))
+        self._maybe_flush()
+
+    def spider_error(self, failure, response, spider):
+        """回调出错的页面下次重新抓取（Bloom filter 不能删除，由精确确认兜底）"""
+        key = _signed(request_url_fingerprint(response.request))
+        self.pending.discard(key)
+        self.pending_done.discard(key)
+        with self.conn:
+            self.conn.execute('DELETE FROM seen WHERE fp = ?', (key,))
+
+    def _maybe_flush(self):
+        if (len(self.pending) + len(self.pending_done) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self.pending or self.pending_done:
+            with self.conn:
+                self.conn.executemany('INSERT OR IGNORE INTO seen (fp) VALUES (?)', ((fp,) for fp in self.pending))
+                self.conn.executemany(
+                    'INSERT INTO seen (fp, done) VALUES (?, 1) ON CONFLICT(fp) DO UPDATE SET done = 1',
+                    ((fp,) for fp in self.pending_done)
+                )
+            self.pending = set()
+            self.pending_done = set()
+        self._last_flush = time.monotonic()
+
+    def close(self, reason):
+        if self.conn is None:
+            return
+        self.flush()
+        self.bloom.save(self.bloom_path)
+        self.conn.close()
+        self.conn = None
+
+    def log(self, request, spider):
+        if self.debug:
+            logger.debug("Filtered duplicate request: %(request)s", {'request': request}, extra={'spider': spider})
+        elif not self._logged_duplicate:
+            logger.debug(
+                "Filtered duplicate request: %(request)s - no more duplicates will be shown "
+                "(see DUPEFILTER_DEBUG to show all duplicates)",
+                {'request': request}, extra={'spider': spider}
+            )
+            self._logged_duplicate = True
+        if self.stats:
+            self.stats.inc_value('dupefilter/filtered')
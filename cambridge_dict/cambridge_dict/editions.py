@@ -0,0 +1,96 @@
+"""
+词典版本
+
+每个版本（英汉简体、英越、英日……）对应：
+- 剑桥词典网站上的路径，例如 english-chinese-simplified
+- settings.py 中的配置字典（DATA_DIR、STATE_DIR、STATE_BACKEND），例如 CAMBRIDGE_DICT_VI
+- 单词详情页的解析配置（extraction.PROFILES），例如 vi
+
+pipeline 和 dictionary_multi 爬虫通过这里把 URL、爬虫和输出目录对应起来。
+没有单独页面结构的版本使用 zh 配置：各双语词典的释义翻译使用相同的 trans / dtrans-se 标记。
+"""
+
+from urllib.parse import urlparse
+
+BASE_URL = 'https://dictionary.cambridge.org'
+
+
+class Edition:
+    """一个词典版本"""
+
+    def __init__(self, key, path, settings_key, profile='zh'):
+        self.key = key
+        self.path = path
+        self.settings_key = settings_key
+        self.profile = profile
+
+    @property
+    def browse_url(self):
+        return f'{BASE_URL}/browse/{self.path}/'
+
+    def word_url(self, slug):
+        """词头在该版本中的单词页"""
+        return f'{BASE_URL}/dictionary/{self.path}/{slug}'
+
+    def options(self, settings):
+        """该版本的 DATA_DIR / STATE_DIR / STATE_BACKEND，没有配置时按版本名生成目录"""
+        options = dict(settings.get(self.settings_key) or {})
+        suffix = self.key.lower().replace('-', '_')
+        options.setdefault('DATA_DIR', f'data_{suffix}')
+        options.setdefault('STATE_DIR', f'spider_state_{suffix}')
+        options.setdefault('STATE_BACKEND', 'journal')
+        return options
+
+    def __repr__(self):
+        return f'Edition({self.key!r})'
+
+
+EDITIONS = {
+    edition.key: edition
+    for edition in (
+        Edition('zh-Hans', 'english-chinese-simplified', 'CAMBRIDGE_DICT'),
+        Edition('zh-Hant', 'english-chinese-traditional', 'CAMBRIDGE_DICT_ZH_HANT'),
+        Edition('vi', 'english-vietnamese', 'CAMBRIDGE_DICT_VI', profile='vi'),
+        Edition('ja', 'english-japanese', 'CAMBRIDGE_DICT_JA', profile='ja'),
+        Edition('ko', 'english-korean', 'CAMBRIDGE_DICT_KO'),
+        Edition('fr', 'english-french', 'CAMBRIDGE_DICT_FR'),
+        Edition('de', 'english-german', 'CAMBRIDGE_DICT_DE'),
+        Edition('es', 'english-spanish', 'CAMBRIDGE_DICT_ES'),
+        Edition('pt', 'english-portuguese', 'CAMBRIDGE_DICT_PT'),
+        Edition('ru', 'english-russian', 'CAMBRIDGE_DICT_RU'),
+        Edition('ar', 'english-arabic', 'CAMBRIDGE_DICT_AR'),
+        Edition('it', 'english-italian', 'CAMBRIDGE_DICT_IT'),
+    )
+}
+
+_EDITIONS_BY_PATH = {edition.path: edition for edition in EDITIONS.values()}
+
+
+def get_edition(key):
+    try:
+        return EDITIONS[key]
+    except KeyError:
+        raise ValueError(f"Unknown edition {key!r}, available: {', '.join(EDITIONS)}")
+
+
+def parse_editions(value):
+    """解析逗号分隔的版本列表，例如 'zh-Hans,vi,ja'"""
+    keys = [key.strip() for key in value.split(',') if key.strip()] if isinstance(value, str) else list(value)
+    return [get_edition(key) for key in keys]
+
+
+def edition_for_url(url):
+    """根据 /browse/<路径>/ 或 /dictionary/<路径>/ 判断 URL 属于哪个版本，无法判断时返回 None"""
+    parts = [part for part in urlparse(url).path.split('/') if part]
+    for i, part in enumerate(parts[:-1]):
+        if part in ('browse', 'dictionary'):
+            return _EDITIONS_BY_PATH.get(parts[i + 1])
+    return None
+
+
+def headword_slug(url):
+    """单词页 URL /dictionary/<路径>/<slug> 中的词头，不是单词页时返回 None"""
+    parts = [part for part in urlparse(url).path.split('/') if part]
+    if len(parts) >= 3 and parts[0] == 'dictionary' and parts[1] in _EDITIONS_BY_PATH:
+        return '/'.join(parts[2:])
+    return None
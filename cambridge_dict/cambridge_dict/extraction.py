@@ -0,0 +1,292 @@
+"""
+单词详情页解析
+
+所有爬虫共用的解析逻辑。不同词典页面的结构略有差别，差别集中在 ExtractionProfile 中：
+- zh: 英汉词典（cambridge.py、single_word.py）
+- ja: 英日词典（single_word_ja*.py），标题和词条块的选择器更宽松，没有英文释义的词义也保留
+- vi: 英越词典（cambridge_vi.py、sing_word_vi.py），页面没有发音、指导词、等级等信息
+
+XPath 表达式在创建 WordExtractor 时一次性编译为 lxml.etree.XPath，解析时直接在 lxml 节点上求值，
+不再为每个响应、每个节点重新编译字符串表达式。返回的是普通 dict，字段顺序与 DictionaryItem 一致，
+可以直接构造 DictionaryItem，也可以在其他进程中解析后再传回。
+"""
+
+from urllib.parse import urljoin
+
+from lxml import etree
+from lxml.html import HTMLParser
+
+# 短语动词和习语列表在整个页面上查找（与原来的实现一致），每页只计算一次
+PHRASAL_VERBS_XPATH = '//div[contains(@class, "xref phrasal_verbs")]//div[contains(@class, "lcs")]//a'
+IDIOMS_XPATH = '//div[contains(@class, "xref idioms")]//div[contains(@class, "lcs")]//a'
+
+# 除词条块外，页面上另外三类内容块，三种词典相同
+EXTRA_BLOCK_XPATHS = (
+    '//div[contains(@class, "pr idiom-block")]',
+    '//span[contains(@class, "phrase-di-block dphrase-di-block")]',
+    '//div[contains(@class, "pv-block")]',
+)
+
+
+class ExtractionProfile:
+    """一种词典页面的选择器
+
+    值为 None 的字段表示该词典页面没有这项信息，解析结果中填空字符串（发音除外，见 pronunciation）。
+    """
+
+    def __init__(self, name, title, entry_blocks, block_word, part_of_speech, senses,
+                 definition, def_translation, examples, example_text, more_examples,
+                 pronunciation=True, guide_word=None, level=None, attribute=None,
+                 example_translation=None, require_definition=True):
+        self.name = name
+        self.title = title
+        self.entry_blocks = entry_blocks
+        self.block_word = block_word
+        self.part_of_speech = part_of_speech
+        # False 时发音字段总是填空的 PronunciationItem
+        self.pronunciation = pronunciation
+        self.senses = senses
+        self.guide_word = guide_word
+        self.definition = definition
+        self.def_translation = def_translation
+        self.level = level
+        self.attribute = attribute
+        self.examples = examples
+        self.example_text = example_text
+        self.example_translation = example_translation
+        self.more_examples = more_examples
+        # True 时没有英文释义的词义不生成 definition
+        self.require_definition = require_definition
+
+
+ZH_PROFILE = ExtractionProfile(
+    name='zh',
+    title='//div[contains(@class, "di-title")]//span[contains(@class, "hw")]/text() | //div[contains(@class, "di-title")]//b/text()',
+    entry_blocks='//div[contains(@class, "entry-body")]//div[contains(@class, "pr entry-body__el")]',
+    block_word='.//div[contains(@class, "di-title")]//span[contains(@class, "hw")]/text() | .//div[contains(@class, "di-title")]//b//text()',
+    part_of_speech='.//div[contains(@class, "posgram")]//span[contains(@class, "pos")]/text()',
+    senses='.//div[contains(@class, "def-block")]',
+    guide_word=(
+        './/ancestor::div[contains(@class, "pr dsense")]/h3[contains(@class, "dsense_h")]'
+        '/span[contains(@class, "guideword dsense_gw")]/span/text()'
+    ),
+    definition='.//div[contains(@class, "ddef_d")]//text()',
+    def_translation='.//div[@class="def-body ddef_b"]/span[contains(@class, "dtrans-se") and not(contains(@class, "hdb"))]//text()',
+    level='.//span[contains(@class, "epp-xref")]/text()',
+    attribute='.//div[contains(@class, "ddef_h")]//span[contains(@class, "gram dgram")]/a//text()',
+    examples='.//div[contains(@class, "examp")]',
+    example_text='.//span[contains(@class, "eg")]//text()',
+    example_translation='.//span[contains(@class, "trans")]/text()',
+    more_examples='.//following-sibling::div[contains(@class, "daccord")][1]//ul[contains(@class, "hul-u")]//li',
+)
+
+JA_PROFILE = ExtractionProfile(
+    name='ja',
+    title=(
+        '//div[contains(@class, "di-title")]//span[contains(@class, "hw")]/text()'
+        ' | //div[contains(@class, "di-title")]/text() | //div[contains(@class, "di-title")]//b/text()'
+    ),
+    entry_blocks='//div[contains(@class, "entry-body")]//div[contains(@class, "entry-body__el")]',
+    block_word=ZH_PROFILE.block_word,
+    part_of_speech=ZH_PROFILE.part_of_speech,
+    senses=ZH_PROFILE.senses,
+    guide_word=ZH_PROFILE.guide_word,
+    definition=ZH_PROFILE.definition,
+    def_translation='.//div[@class="def-body ddef_b"]//span[contains(@class, "dtrans-se") and not(contains(@class, "hdb"))]//text()',
+    level=ZH_PROFILE.level,
+    attribute=ZH_PROFILE.attribute,
+    examples=ZH_PROFILE.examples,
+    example_text=ZH_PROFILE.example_text,
+    example_translation=ZH_PROFILE.example_translation,
+    more_examples=ZH_PROFILE.more_examples,
+    require_definition=False,
+)
+
+VI_PROFILE = ExtractionProfile(
+    name='vi',
+    title='//h2[contains(@class, "di-title")]/text()',
+    entry_blocks='//div[contains(@class, "entry-body")]//div[contains(@class, "english-vietnamese")]',
+    block_word='.//h2[contains(@class, "di-title")]/text()',
+    part_of_speech='.//div[contains(@class, "dpos-g")]//span[contains(@class, "pos")]/text()',
+    pronunciation=False,
+    senses='.//div[contains(@class, "sense-block")]//div[contains(@class, "sense-body")]',
+    definition='.//div[contains(@class, "ddef_h")]//div[contains(@class, "ddef_d db")]//text()',
+    def_translation='.//div[contains(@class, "def-body")]//span[contains(@class, "dtrans")]/text()',
+    examples='.//div[contains(@class, "def-body")]//div[contains(@class, "examp dexamp")]',
+    example_text='.//span[contains(@class, "eg deg")]//text()',
+    more_examples='.//div[contains(@class, "daccord")]//div[contains(@class, "deg")]',
+)
+
+PROFILES = {
+    ZH_PROFILE.name: ZH_PROFILE,
+    JA_PROFILE.name: JA_PROFILE,
+    VI_PROFILE.name: VI_PROFILE,
+}
+
+_PRON_XPATHS = {
+    'uk': (
+        './/span[contains(@class, "uk dpron-i")]//span[contains(@class, "ipa")]/text()',
+        './/span[contains(@class, "uk dpron-i")]//source[@type="audio/mpeg"]/@src',
+    ),
+    'us': (
+        './/span[contains(@class, "us dpron-i")]//span[contains(@class, "ipa")]/text()',
+        './/span[contains(@class, "us dpron-i")]//source[@type="audio/mpeg"]/@src',
+    ),
+}
+
+
+def _compile(expression):
+    if expression is None:
+        return None
+    return etree.XPath(expression, smart_strings=False)
+
+
+def _first(results):
+    return results[0] if results else ''
+
+
+def clean_text(text):
+    """清理文本"""
+    if not text:
+        return ''
+    return text.strip().rstrip('，；').strip()
+
+
+class WordExtractor:
+    """按 ExtractionProfile 解析单词详情页"""
+
+    def __init__(self, profile):
+        if isinstance(profile, str):
+            profile = PROFILES[profile]
+        self.profile = profile
+        self._title = _compile(profile.title)
+        self._blocks = [_compile(profile.entry_blocks)] + [_compile(xp) for xp in EXTRA_BLOCK_XPATHS]
+        self._block_word = _compile(profile.block_word)
+        self._part_of_speech = _compile(profile.part_of_speech)
+        self._pron = {
+            region: (_compile(ipa), _compile(audio)) for region, (ipa, audio) in _PRON_XPATHS.items()
+        }
+        self._senses = _compile(profile.senses)
+        self._guide_word = _compile(profile.guide_word)
+        self._definition = _compile(profile.definition)
+        self._def_translation = _compile(profile.def_translation)
+        self._level = _compile(profile.level)
+        self._attribute = _compile(profile.attribute)
+        self._examples = _compile(profile.examples)
+        self._example_text = _compile(profile.example_text)
+        self._example_translation = _compile(profile.example_translation)
+        self._more_examples = _compile(profile.more_examples)
+        self._all_text = _compile('.//text()')
+        self._href = _compile('.//@href')
+        self._phrasal_verbs = _compile(PHRASAL_VERBS_XPATH)
+        self._idioms = _compile(IDIOMS_XPATH)
+
+    def extract_response(self, response, letter):
+        """解析 scrapy 响应，复用响应已经构建好的 lxml 树"""
+        return self.extract(response.selector.root, response.url, letter)
+
+    def extract_html(self, body, url, letter, encoding='utf-8'):
+        """解析原始 HTML（bytes），用于不在 scrapy 进程中的解析"""
+        parser = HTMLParser(recover=True, encoding=encoding)
+        root = etree.fromstring(body.replace(b'\x00', b'') or b'<html/>', parser=parser, base_url=url)
+        if root is None:
+            return []
+        return self.extract(root, url, letter)
+
+    def extract(self, root, url, letter):
+        """解析整页，每个内容块返回一条记录；没有内容块时返回空列表"""
+        pos_blocks = []
+        for blocks in self._blocks:
+            pos_blocks.extend(blocks(root))
+        if not pos_blocks:
+            return []
+
+        title_word = _first(self._title(root)).strip()
+        phrasal_verbs = self._parse_phrases(self._phrasal_verbs(root), url)
+        idioms = self._parse_phrases(self._idioms(root), url)
+
+        records = []
+        for pos_block in pos_blocks:
+            block_word = ''.join(self._block_word(pos_block)).strip()
+            record = {
+                'word': block_word if block_word else title_word,
+                'url': url,
+                'letter': letter,
+                'part_of_speech': clean_text(_first(self._part_of_speech(pos_block))),
+            }
+            self._parse_pronunciation(record, pos_block, url)
+            record['senses'] = self._parse_senses(pos_block)
+            if phrasal_verbs:
+                record['phrasal_verbs'] = [dict(pv) for pv in phrasal_verbs]
+            if idioms:
+                record['idioms'] = [dict(idiom) for idiom in idioms]
+            records.append(record)
+        return records
+
+    def _parse_pronunciation(self, record, pos_block, url):
+        if not self.profile.pronunciation:
+            record['uk_pronunciation'] = {'pron': '', 'audio_url': ''}
+            record['us_pronunciation'] = {'pron': '', 'audio_url': ''}
+            return
+        for region, (ipa, audio) in self._pron.items():
+            pron = ''.join(ipa(pos_block)).strip()
+            if not pron:
+                continue
+            mp3 = _first(audio(pos_block))
+            record[f'{region}_pronunciation'] = {
+                'pron': f"/{pron}/",
+                'audio_url': urljoin(url, mp3) if mp3 else None,
+            }
+
+    def _parse_senses(self, pos_block):
+        profile = self.profile
+        senses = []
+        for sense_block in self._senses(pos_block):
+            sense = {}
+            if self._guide_word is None:
+                sense['guide_word'] = ''
+            else:
+                guide_word = clean_text(_first(self._guide_word(sense_block)))
+                if guide_word:
+                    sense['guide_word'] = guide_word.strip('()').strip()
+
+            def_text = ' '.join(text.strip() for text in self._definition(sense_block) if text.strip())
+            if def_text or not profile.require_definition:
+                definition = {
+                    'definition': def_text,
+                    'def_translation': clean_text(''.join(self._def_translation(sense_block))),
+                    'level': clean_text(_first(self._level(sense_block))) if self._level else '',
+                    'attribute': clean_text(''.join(self._attribute(sense_block))) if self._attribute else '',
+                    'examples': [],
+                }
+                for example in self._examples(sense_block):
+                    ex = {
+                        'text': clean_text(''.join(self._example_text(example))),
+                        'translation': (
+                            clean_text(_first(self._example_translation(example)))
+                            if self._example_translation else ''
+                        ),
+                    }
+                    if ex['text'] or ex['translation']:
+                        definition['examples'].append(ex)
+                sense['definitions'] = [definition]
+
+            more_examples = []
+            for more_example in self._more_examples(sense_block):
+                text = clean_text(''.join(self._all_text(more_example)))
+                if text:
+                    more_examples.append({'text': text, 'translation': ''})
+            if more_examples:
+                sense['more_examples'] = more_examples
+
+            if sense.get('definitions') or sense.get('more_examples'):
+                senses.append(sense)
+        return senses
+
+    def _parse_phrases(self, links, url):
+        phrases = []
+        for link in links:
+            text = clean_text(' '.join(self._all_text(link)))
+            if text:
+                phrases.append({'text': text, 'link': urljoin(url, _first(self._href(link)))})
+        return phrases
@@ -51,3 +51,5 @@ class DictionaryItem(scrapy.Item):
     senses = scrapy.Field(serializer=list)  # 存储 SenseItem 列表
     phrasal_verbs = scrapy.Field(serializer=list)  # 存储 PhraseItem 列表
     idioms = scrapy.Field(serializer=list)  # 存储 PhraseItem 列表
+    # 多版本爬虫按最初请求的 URL 标记的词典版本，只用于选择输出目录，不写入文件
+    edition = scrapy.Field()
@@ -4,11 +4,20 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
-from scrapy.exceptions import IgnoreRequest
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import HtmlResponse
 import logging
+import os
 from scrapy.downloadermiddlewares.retry import RetryMiddleware
 from scrapy.utils.response import response_status_message
-import time
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import task
+
+from .utils.archive import PageArchive
+from .utils.throttle import AdaptiveThrottle, parse_retry_after
+from .utils.validators import ContentUnchanged, ValidatorStore, content_hash
+from .signals import page_persisted
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
@@ -85,18 +94,8 @@ class CustomRetryMiddleware(RetryMiddleware):
 
 
 class CustomDownloaderMiddleware:
-    def __init__(self):
-        self.last_request_time = time.time()
-
     def process_request(self, request, spider):
-        # 实现自适应延迟
-        current_time = time.time()
-        time_passed = current_time - self.last_request_time
-        if time_passed < spider.settings.get('DOWNLOAD_DELAY', 3):
-            time.sleep(spider.settings.get('DOWNLOAD_DELAY', 3) - time_passed)
-        
-        self.last_request_time = time.time()
-        
+        # 限速由 AdaptiveThrottleMiddleware 负责，这里不能阻塞 reactor
         # 添加自定义请求头
         request.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -129,6 +128,296 @@ class CustomDownloaderMiddleware:
         spider.logger.info("Spider opened: %s" % spider.name)
 
 
+class AdaptiveThrottleMiddleware:
+    """非阻塞自适应限速中间件
+
+    - 每个主机一个令牌桶，等待通过 reactor 定时器完成，不会卡住引擎
+    - AIMD 控制器根据 429/503 比例和响应延迟调整速率和下载槽并发数
+    - 限速统计写入 crawler.stats，并定期输出到日志
+
+    优先级需要高于 CustomRetryMiddleware，这样 429/503 在被重试之前就能被统计到。
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.throttle = AdaptiveThrottle.from_settings(crawler.settings)
+        self.log_interval = crawler.settings.getfloat('ADAPTIVE_THROTTLE_LOG_INTERVAL', 60)
+        self.log_task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('ADAPTIVE_THROTTLE_ENABLED'):
+            raise NotConfigured
+        s = cls(crawler)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    async def process_request(self, request, spider):
+        if request.meta.get('dont_throttle'):
+            return None
+        host = urlparse_cached(request).hostname or ''
+        wait = self.throttle.reserve(host)
+        if wait > 0:
+            self.stats.inc_value('throttle/delayed_requests')
+            self.stats.inc_value('throttle/delay_time', wait)
+            # 项目包加载时 scrapy 还没有安装 TWISTED_REACTOR，不能在模块顶层导入 reactor
+            from twisted.internet import reactor
+            await maybe_deferred_to_future(task.deferLater(reactor, wait, lambda: None))
+        return None
+
+    def process_response(self, request, response, spider):
+        if request.meta.get('dont_throttle'):
+            return response
+        host = urlparse_cached(request).hostname or ''
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        state = self.throttle.record_response(
+            host,
+            response.status,
+            request.meta.get('download_latency', 0.0),
+            retry_after
+        )
+        if response.status in (429, 503):
+            self.stats.inc_value(f'throttle/overload/{response.status}')
+        self._apply(request, host, state)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if request.meta.get('dont_throttle'):
+            return None
+        host = urlparse_cached(request).hostname or ''
+        state = self.throttle.record_error(host)
+        self.stats.inc_value('throttle/download_errors')
+        self._apply(request, host, state)
+        return None
+
+    def _apply(self, request, host, state):
+        """把控制器的结果同步到下载槽和统计信息"""
+        slot = self.crawler.engine.downloader.slots.get(request.meta.get('download_slot'))
+        if slot is not None:
+            slot.concurrency = state.controller.slot_concurrency
+            # 发送间隔由令牌桶控制，关闭下载槽自身的延迟避免重复等待
+            slot.delay = 0
+        self.stats.set_value(f'throttle/{host}/rate', round(state.controller.rate, 3))
+        self.stats.set_value(f'throttle/{host}/concurrency', state.controller.slot_concurrency)
+
+    def log_stats(self, spider):
+        """输出各主机的限速状态"""
+        for host, snapshot in self.throttle.stats().items():
+            spider.logger.info(f"Throttle {host}: {snapshot}")
+
+    def spider_opened(self, spider):
+        if self.log_interval > 0:
+            self.log_task = task.LoopingCall(self.log_stats, spider)
+            self.log_task.start(self.log_interval, now=False)
+
+    def spider_closed(self, spider):
+        if self.log_task and self.log_task.running:
+            self.log_task.stop()
+        self.log_stats(spider)
+
+
+class ArchiveMiddleware:
+    """原始页面归档中间件
+
+    把成功的响应体压缩后写入 PageArchive，相同内容只存一次。
+    优先级需要低于 HttpCompressionMiddleware (590)，这样拿到的是解压后的响应体。
+    request.meta 中设置 dont_archive 可以跳过单个请求。
+    """
+
+    def __init__(self, crawler, archive):
+        self.stats = crawler.stats
+        self.archive = archive
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('ARCHIVE_ENABLED'):
+            raise NotConfigured
+        archive = PageArchive(
+            settings.get('ARCHIVE_DIR', 'archive'),
+            compression=settings.get('ARCHIVE_COMPRESSION', 'gzip'),
+            segment_size=settings.getint('ARCHIVE_SEGMENT_SIZE', 256 * 1024 * 1024),
+            batch_size=settings.getint('ARCHIVE_BATCH_SIZE', 100),
+            flush_interval=settings.getfloat('ARCHIVE_FLUSH_INTERVAL', 5.0),
+        )
+        s = cls(crawler, archive)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_response(self, request, response, spider):
+        if response.status != 200 or request.meta.get('dont_archive') or request.meta.get('from_archive'):
+            return response
+        callback = request.callback
+        _, is_new = self.archive.add(
+            response.url,
+            response.body,
+            status=response.status,
+            encoding=getattr(response, 'encoding', None),
+            spider=spider.name,
+            callback=getattr(callback, '__name__', None) if callback else 'parse',
+            letter=request.meta.get('letter'),
+        )
+        self.stats.inc_value('archive/pages')
+        if is_new:
+            self.stats.inc_value('archive/bytes', len(response.body))
+        else:
+            self.stats.inc_value('archive/duplicates')
+        return response
+
+    def spider_closed(self, spider):
+        self.archive.close()
+        spider.logger.info(f"Archive closed: {self.archive.archive_dir}")
+
+
+class IncrementalMiddleware:
+    """增量抓取中间件
+
+    对单词详情页（回调在 INCREMENTAL_CALLBACKS 中）：
+    - 请求时带上上次的 ETag / Last-Modified，发送条件请求
+    - 响应为 304，或响应体的内容哈希与上次相同时发送 page_persisted 并抛出 ContentUnchanged，
+      跳过解析和写入
+    - 内容有变化时 request.meta['incremental_change'] 为 'new' 或 'changed'，新的校验信息
+      等到该页面的 item 都已写入并落盘（page_persisted）后才保存；在此之前崩溃、
+      item 被丢弃或回调出错，下次刷新仍会重新解析，变化不会漏掉
+
+    优先级需要低于 AdaptiveThrottleMiddleware (560)，304 和未变化的页面同样计入限速统计。
+    """
+
+    def __init__(self, crawler, store_dir, callbacks):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.store_dir = store_dir
+        self.callbacks = set(callbacks)
+        self.store = None
+        # URL -> 还没有保存的校验信息 (etag, last_modified, body_hash)
+        self.pending = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('INCREMENTAL_ENABLED'):
+            raise NotConfigured
+        s = cls(
+            crawler,
+            settings.get('INCREMENTAL_DIR', 'incremental'),
+            settings.getlist('INCREMENTAL_CALLBACKS', ['parse_word_details', 'parse_word_details_pooled']),
+        )
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(s.spider_error, signal=signals.spider_error)
+        crawler.signals.connect(s.page_persisted, signal=page_persisted)
+        crawler.signals.connect(s.item_dropped, signal=signals.item_dropped)
+        return s
+
+    def _tracked(self, request):
+        if request.meta.get('from_archive'):
+            return False
+        return getattr(request.callback, '__name__', None) in self.callbacks
+
+    def process_request(self, request, spider):
+        if not self._tracked(request):
+            return None
+        validators = self.store.get(request.url)
+        if validators:
+            if validators['etag']:
+                request.headers.setdefault('If-None-Match', validators['etag'])
+            if validators['last_modified']:
+                request.headers.setdefault('If-Modified-Since', validators['last_modified'])
+        return None
+
+    def process_response(self, request, response, spider):
+        if not self._tracked(request):
+            return response
+        if response.status == 304:
+            self.store.update(request.url)
+            self.stats.inc_value('incremental/not_modified')
+            self._unchanged(request, spider)
+            raise ContentUnchanged(f"Not modified: {request.url}")
+        if response.status != 200:
+            return response
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        etag = etag.decode('latin-1') if etag else None
+        last_modified = last_modified.decode('latin-1') if last_modified else None
+        body_hash = content_hash(response.body)
+        old = self.store.get(request.url)
+        if old and old['body_hash'] == body_hash:
+            self.store.update(request.url, etag, last_modified)
+            self.stats.inc_value('incremental/unchanged')
+            self._unchanged(request, spider)
+            raise ContentUnchanged(f"Content unchanged: {request.url}")
+
+        change = 'changed' if old else 'new'
+        self.pending[request.url] = (etag, last_modified, body_hash)
+        self.stats.inc_value(f'incremental/{change}')
+        request.meta['incremental_change'] = change
+        return response
+
+    def _unchanged(self, request, spider):
+        """内容没有变化，上次的 item 已经保存过，与落盘的页面同样处理（记录完成、去重）"""
+        self.crawler.signals.send_catch_log(page_persisted, request=request, spider=spider)
+
+    def page_persisted(self, request, spider):
+        """页面的 item 都已落盘，保存新的校验信息"""
+        validators = self.pending.pop(request.url, None)
+        if validators is not None:
+            self.store.update(request.url, *validators, changed=True)
+
+    def item_dropped(self, item, response, exception, spider):
+        """页面的 item 被丢弃，下次刷新重新解析（同一页面之前的 item 可能已经保存了校验信息）"""
+        if response is not None and self._tracked(response.request):
+            self.pending.pop(response.request.url, None)
+            self.store.forget(response.request.url)
+
+    def spider_error(self, failure, response, spider):
+        if self.store is not None and self._tracked(response.request):
+            self.pending.pop(response.request.url, None)
+            self.store.forget(response.request.url)
+
+    def spider_opened(self, spider):
+        self.store = ValidatorStore(os.path.join(self.store_dir, f'{spider.name}.sqlite3'))
+        spider.logger.info(f"Incremental mode: {self.store.count()} known URLs in {self.store.path}")
+
+    def spider_closed(self, spider):
+        if self.store is not None:
+            self.store.close()
+
+
+class ArchiveReplayMiddleware:
+    """从本地归档回放响应，不发出网络请求
+
+    request.meta 中带有 archive_hash 的请求直接从 spider.archive 读取响应体，
+    找不到对应内容时忽略该请求。用于 reparse 爬虫。
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    def process_request(self, request, spider):
+        body_hash = request.meta.get('archive_hash')
+        if body_hash is None:
+            return None
+        body = spider.archive.read_blob(body_hash)
+        if body is None:
+            self.stats.inc_value('archive/replay_missing')
+            raise IgnoreRequest(f"Archived body not found: {request.url}")
+        self.stats.inc_value('archive/replayed')
+        return HtmlResponse(
+            url=request.url,
+            body=body,
+            encoding=request.meta.get('archive_encoding') or 'utf-8',
+            request=request,
+            flags=['archive'],
+        )
+
+
 class SpiderProgressMiddleware:
     @classmethod
     def from_crawler(cls, crawler):
@@ -142,10 +431,20 @@ class SpiderProgressMiddleware:
         spider.logger.info('Spider opened: %s' % spider.name)
 
     def spider_closed(self, spider):
+        # 关闭状态后端，journal 后端会在这里写入最终快照
+        if hasattr(spider, 'state_manager'):
+            spider.state_manager.close()
         spider.logger.info('Spider closed: %s' % spider.name)
 
-    def item_scraped(self, item, spider):
-        # 更新爬虫进度
-        spider.state_manager.update_progress(
-            processed_words=spider.state_manager.get_progress()['processed_words'] + 1
+    def item_scraped(self, item, response, spider):
+        if not hasattr(spider, 'state_manager'):
+            return
+        # 更新爬虫进度，按最初请求的 URL 找到所属的状态（item 的 url 是重定向后的 URL）
+        if response is not None:
+            url = (response.meta.get('redirect_urls') or [response.url])[0]
+        else:
+            url = ItemAdapter(item).get('url')
+        state = spider.state_manager.for_url(url)
+        state.update_progress(
+            processed_words=state.get_progress()['processed_words'] + 1
         )
@@ -8,7 +8,15 @@
 from itemadapter import ItemAdapter
 import json
 import os
+from collections import deque
+from datetime import datetime
+from scrapy import signals
 from scrapy.exceptions import DropItem
+from twisted.internet import defer, task
+
+from .editions import edition_for_url, get_edition
+from .signals import page_persisted
+from .utils.writers import BackgroundLetterWriter, create_letter_writer
 
 
 class DictionaryValidationPipeline:
@@ -22,75 +30,236 @@ class DictionaryValidationPipeline:
         return item
 
 class DictionaryPipeline:
-    """数据存储 Pipeline"""
-    def __init__(self, data_dir):
+    """数据存储 Pipeline
+
+    多版本爬虫（带 editions 属性）的词条按 URL 所属的版本写入各自的 DATA_DIR，
+    每个输出目录一个写入器和一份 stats.json。
+
+    每隔 flush_interval 秒 fsync 所有写入器，之后对这段时间内所有 item 都已写入的页面
+    发送 page_persisted 信号。爬虫在 response.meta['item_count'] 中给出页面的 item 数，
+    没有给出时每个 item 单独视为一个完整的页面。
+    """
+    def __init__(self, data_dir, output_format='json', writer_options=None, background_options=None,
+                 data_dirs=None, crawler=None, flush_interval=5.0):
         self.data_dir = data_dir
-        self.files = {}
-        self.stats = {
-            'total_items': 0,
-            'items_by_letter': {}
-        }
+        # 版本 -> 输出目录，为空时所有词条写入 data_dir
+        self.data_dirs = data_dirs or {}
+        self.output_format = output_format
+        self.writer_options = writer_options or {}
+        # 为 None 时在 reactor 线程中同步写入
+        self.background_options = background_options
+        # 输出目录 -> 写入器 / 统计信息
+        self.writers = {}
+        self.stats = {}
+        self.logger = None
+        self._waiters = deque()
+        self.crawler = crawler
+        self.flush_interval = flush_interval
+        self._flush_loop = None
+        # 请求 -> 已经通过 pipeline 的 item 数
+        self._scraped_counts = {}
+        # item 都已写入、等待 fsync 的请求
+        self._unflushed = []
+        # 正在 fsync 的批次：编号 -> [还没有完成的写入器数, 请求列表]
+        self._flushing = {}
+        self._flush_seq = 0
 
     @classmethod
     def from_crawler(cls, crawler):
-        # 根据爬虫名称选择不同的配置
-        if crawler.spider.name == 'dictionary_vi_4':
-            data_dir = crawler.settings.get('CAMBRIDGE_DICT_VI', {}).get('DATA_DIR', 'data/v4')
+        spider = crawler.spider
+        settings = crawler.settings
+        data_dirs = {}
+        # 爬虫自己指定了 data_dir 时优先使用，否则按爬虫对应的词典版本选择目录
+        if getattr(spider, 'data_dir', None):
+            data_dir = spider.data_dir
+        elif getattr(spider, 'edition', None):
+            data_dir = get_edition(spider.edition).options(settings)['DATA_DIR']
         else:
-            data_dir = crawler.settings.get('CAMBRIDGE_DICT', {}).get('DATA_DIR', 'data/v3')
-        return cls(data_dir=data_dir)
+            data_dir = settings.get('CAMBRIDGE_DICT', {}).get('DATA_DIR', 'data/v3')
+        if getattr(spider, 'data_dirs', None):
+            # 爬虫自己指定了各版本的输出目录（reparse）
+            data_dirs = dict(spider.data_dirs)
+        for edition in getattr(spider, 'editions', None) or ():
+            data_dirs.setdefault(edition.key, edition.options(settings)['DATA_DIR'])
+        if data_dirs and not getattr(spider, 'data_dir', None):
+            # 无法判断版本的词条写入第一个版本的目录
+            data_dir = data_dirs[spider.editions[0].key]
+        if settings.getbool('INCREMENTAL_ENABLED'):
+            # 增量抓取只输出有变化的词条，单独写到本次运行的 delta 目录
+            run = datetime.now().strftime('%Y%m%d-%H%M%S')
+            data_dir = os.path.join(data_dir, 'delta', run)
+            data_dirs = {key: os.path.join(path, 'delta', run) for key, path in data_dirs.items()}
+        output_format = settings.get('DICT_OUTPUT_FORMAT', 'json')
+        writer_options = {}
+        if output_format == 'jsonl':
+            writer_options = {
+                'buffer_size': settings.getint('DICT_OUTPUT_BUFFER_SIZE', 256 * 1024),
+                'fsync_interval': settings.getfloat('DICT_OUTPUT_FSYNC_INTERVAL', 5.0),
+                'rotate_bytes': settings.getint('DICT_OUTPUT_ROTATE_BYTES', 512 * 1024 * 1024),
+                'compression': settings.get('DICT_OUTPUT_COMPRESSION') or None,
+                'compression_level': settings.get('DICT_OUTPUT_COMPRESSION_LEVEL'),
+                'frame_size': settings.getint('DICT_OUTPUT_FRAME_SIZE', 1024 * 1024),
+            }
+        background_options = None
+        if settings.getbool('DICT_OUTPUT_BACKGROUND'):
+            background_options = {
+                'queue_size': settings.getint('DICT_OUTPUT_QUEUE_SIZE', 1000),
+                'batch_size': settings.getint('DICT_OUTPUT_BATCH_SIZE', 200),
+            }
+        pipeline = cls(data_dir=data_dir, output_format=output_format, writer_options=writer_options,
+                       background_options=background_options, data_dirs=data_dirs, crawler=crawler,
+                       flush_interval=settings.getfloat('DICT_OUTPUT_FSYNC_INTERVAL', 5.0))
+        crawler.signals.connect(pipeline.item_scraped, signal=signals.item_scraped)
+        return pipeline
 
     def open_spider(self, spider):
-        """爬虫启动时确保目录存在"""
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
+        """爬虫启动时创建默认输出目录的写入器，其他版本的写入器在第一次写入时创建"""
+        self.logger = spider.logger
+        if not self.data_dirs:
+            self._get_writer(self.data_dir)
+        if self.flush_interval > 0:
+            self._flush_loop = task.LoopingCall(self.flush)
+            self._flush_loop.start(self.flush_interval, now=False)
+
+    def _get_writer(self, data_dir):
+        writer = self.writers.get(data_dir)
+        if writer is not None:
+            return writer
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        writer = create_letter_writer(
+            self.output_format, data_dir, logger=self.logger, **self.writer_options
+        )
+        if self.background_options is not None:
+            # 项目包加载时 scrapy 还没有安装 TWISTED_REACTOR，不能在模块顶层导入 reactor
+            from twisted.internet import reactor
+            # 序列化和文件 I/O 放到写线程，写线程每写完一批通知 reactor 放行等待的 item
+            writer = BackgroundLetterWriter(
+                writer,
+                on_batch_done=lambda: reactor.callFromThread(self._release_waiters),
+                **self.background_options
+            )
+        self.writers[data_dir] = writer
+        self.stats[data_dir] = {
+            'total_items': 0,
+            'items_by_letter': {}
+        }
+        return writer
+
+    def _data_dir_for(self, adapter):
+        """词条的输出目录
+
+        优先使用爬虫标记的版本：item 的 url 是重定向后的 URL，可能不带词典路径
+        """
+        if self.data_dirs:
+            key = adapter.get('edition')
+            if key is None:
+                edition = edition_for_url(adapter.get('url') or '')
+                key = edition.key if edition is not None else None
+            if key in self.data_dirs:
+                return self.data_dirs[key]
+        return self.data_dir
 
     def process_item(self, item, spider):
         """处理单个数据项"""
-        self.stats['total_items'] += 1
-        
         adapter = ItemAdapter(item)
         letter = adapter['letter']
+        data_dir = self._data_dir_for(adapter)
+        writer = self._get_writer(data_dir)
         
         # 更新统计信息
-        if letter not in self.stats['items_by_letter']:
-            self.stats['items_by_letter'][letter] = 0
-        self.stats['items_by_letter'][letter] += 1
-        
-        # 准备文件路径
-        file_path = os.path.join(self.data_dir, f"{letter}.json")
+        stats = self.stats[data_dir]
+        stats['total_items'] += 1
+        if letter not in stats['items_by_letter']:
+            stats['items_by_letter'][letter] = 0
+        stats['items_by_letter'][letter] += 1
         
-        # 懒加载文件数据
-        if file_path not in self.files:
-            self.files[file_path] = []
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    try:
-                        self.files[file_path] = json.load(f)
-                    except json.JSONDecodeError:
-                        spider.logger.error(f"Error reading {file_path}")
-
-        # 添加新数据
-        self.files[file_path].append(adapter.asdict())
-        
-        # 定期保存数据（每100个词条保存一次）
-        if self.stats['total_items'] % 100 == 0:
-            self._save_file(file_path)
+        # 写入对应字母的文件
+        record = adapter.asdict()
+        record.pop('edition', None)
+        if self.background_options is not None and (self._waiters or writer.full()):
+            # 队列已满：返回 Deferred，引擎会等它完成后再处理更多 item，形成背压
+            d = defer.Deferred()
+            self._waiters.append((d, writer, letter, record))
+            self._release_waiters()
+            return d.addCallback(lambda _: item)
+        writer.write(letter, record)
             
         return item
 
-    def _save_file(self, file_path):
-        """保存数据到文件"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.files[file_path], f, ensure_ascii=False, indent=2)
+    def _release_waiters(self):
+        """队列有空位时按顺序放行等待中的 item"""
+        while self._waiters and not self._waiters[0][1].full():
+            d, writer, letter, record = self._waiters.popleft()
+            try:
+                writer.write(letter, record)
+            except Exception as e:
+                d.errback(e)
+            else:
+                d.callback(None)
+
+    def item_scraped(self, item, response, spider):
+        """item 通过了所有 pipeline；页面的 item 都到齐后等待下一次 fsync"""
+        if response is None:
+            return
+        request = response.request
+        count = self._scraped_counts.get(request, 0) + 1
+        if count < response.meta.get('item_count', 1):
+            self._scraped_counts[request] = count
+            return
+        self._scraped_counts.pop(request, None)
+        self._unflushed.append(request)
+
+    def flush(self):
+        """fsync 所有写入器，完成后对之前 item 都已写入的页面发送 page_persisted"""
+        requests, self._unflushed = self._unflushed, []
+        writers = list(self.writers.values())
+        if self.background_options is None or not writers:
+            for writer in writers:
+                writer.flush()
+            self._send_persisted(requests)
+            return
+        from twisted.internet import reactor
+        self._flush_seq += 1
+        seq = self._flush_seq
+        self._flushing[seq] = [len(writers), requests]
+        for writer in writers:
+            # 写线程中回调，回到 reactor 线程后再处理
+            writer.flush_async(lambda: reactor.callFromThread(self._writer_flushed, seq))
+
+    def _writer_flushed(self, seq):
+        entry = self._flushing.get(seq)
+        if entry is None:
+            # 爬虫已经关闭，close_spider 中已经处理
+            return
+        entry[0] -= 1
+        if not entry[0]:
+            del self._flushing[seq]
+            self._send_persisted(entry[1])
+
+    def _send_persisted(self, requests):
+        if self.crawler is None:
+            return
+        for request in requests:
+            self.crawler.signals.send_catch_log(page_persisted, request=request, spider=self.crawler.spider)
 
     def close_spider(self, spider):
         """爬虫关闭时的清理工作"""
-        # 保存所有未保存的数据
-        for file_path in self.files:
-            self._save_file(file_path)
-            
-        # 保存统计信息
-        stats_file = os.path.join(self.data_dir, 'stats.json')
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+        if self._flush_loop is not None and self._flush_loop.running:
+            self._flush_loop.stop()
+        # 保存所有未保存的数据（后台写入时会等待队列写完）
+        self._release_waiters()
+        for data_dir, writer in self.writers.items():
+            writer.close()
+
+            # 保存统计信息
+            stats_file = os.path.join(data_dir, 'stats.json')
+            with open(stats_file, 'w', encoding='utf-8') as f:
+                json.dump(self.stats[data_dir], f, ensure_ascii=False, indent=2)
+
+        # 写入器都已正常关闭（出错时 close 抛出异常，不会走到这里），剩余页面的 item 都已落盘
+        requests = [request for _, pending in self._flushing.values() for request in pending]
+        self._flushing.clear()
+        requests.extend(self._unflushed)
+        self._unflushed = []
+        self._send_persisted(requests)
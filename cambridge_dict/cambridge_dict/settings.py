@@ -21,7 +21,9 @@ USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTM
 ROBOTSTXT_OBEY = False
 
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
-CONCURRENT_REQUESTS = 1
+# 实际并发由 AdaptiveThrottleMiddleware 按站点的承受能力动态调整，这里只是上限
+CONCURRENT_REQUESTS = 16
+CONCURRENT_REQUESTS_PER_DOMAIN = 8
 
 # Configure a delay for requests for the same website (default: 0)
 DOWNLOAD_DELAY = 3
@@ -58,6 +60,9 @@ SPIDER_MIDDLEWARES = {
 DOWNLOADER_MIDDLEWARES = {
     'cambridge_dict.middlewares.CustomDownloaderMiddleware': 543,
     'cambridge_dict.middlewares.CustomRetryMiddleware': 550,
+    'cambridge_dict.middlewares.AdaptiveThrottleMiddleware': 560,
+    'cambridge_dict.middlewares.IncrementalMiddleware': 555,
+    'cambridge_dict.middlewares.ArchiveMiddleware': 580,
     'scrapy.downloadermiddlewares.retry.RetryMiddleware': None,
 }
 
@@ -99,12 +104,52 @@ REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 FEED_EXPORT_ENCODING = "utf-8"
 
+# 进程池解析（dictionary / dictionary_vi 爬虫）
+# 开启后单词详情页在子进程中解析，多核机器上解析不再受限于单个 reactor 线程
+PARSE_POOL_ENABLED = False
+PARSE_POOL_WORKERS = 0                  # 0 表示使用 CPU 核数
+PARSE_POOL_MAX_IN_FLIGHT = 0            # 同时在进程池中的页面数，0 表示 4 * 进程数
+PARSE_POOL_START_METHOD = 'spawn'
+
+# URL 去重：Bloom filter + SQLite 精确确认，保存在爬虫的状态目录中（dupefilters.py）
+DUPEFILTER_CLASS = 'cambridge_dict.dupefilters.BloomDupeFilter'
+BLOOM_DUPEFILTER_CAPACITY = 1000000         # 第一个过滤器的容量，用完后自动扩容
+BLOOM_DUPEFILTER_ERROR_RATE = 0.01          # 误判率（误判的请求再查 SQLite，不会漏抓）
+BLOOM_DUPEFILTER_DIR = 'dupefilter'         # 没有状态目录的爬虫使用 <目录>/<爬虫名>
+
 # 重试设置
 RETRY_ENABLED = True
 RETRY_TIMES = 3
 RETRY_HTTP_CODES = [500, 502, 503, 504, 408, 429]
 HTTPERROR_ALLOWED_CODES = [404]
 
+# 自适应限速设置（令牌桶 + AIMD，不阻塞 reactor）
+ADAPTIVE_THROTTLE_ENABLED = True
+ADAPTIVE_THROTTLE_START_DELAY = 3          # 初始请求间隔（秒）
+ADAPTIVE_THROTTLE_MIN_DELAY = 0.25         # 最小请求间隔
+ADAPTIVE_THROTTLE_MAX_DELAY = 60           # 最大请求间隔
+ADAPTIVE_THROTTLE_START_CONCURRENCY = 1    # 初始并发
+ADAPTIVE_THROTTLE_MAX_CONCURRENCY = 8      # 最大并发，不超过 CONCURRENT_REQUESTS_PER_DOMAIN
+ADAPTIVE_THROTTLE_INCREASE = 0.05          # 加性增长步长
+ADAPTIVE_THROTTLE_DECREASE = 0.5           # 乘性下降系数
+ADAPTIVE_THROTTLE_TARGET_LATENCY = 2.0     # 超过该响应延迟视为过载
+ADAPTIVE_THROTTLE_COOLDOWN = 10            # 两次回退之间的最短间隔
+ADAPTIVE_THROTTLE_LOG_INTERVAL = 60        # 限速统计日志间隔，0 表示关闭
+
+# 原始页面归档（按内容去重，压缩后追加写入分段文件，修改解析逻辑后可以离线重新解析）
+ARCHIVE_ENABLED = True
+ARCHIVE_DIR = 'archive'
+ARCHIVE_COMPRESSION = 'gzip'                # 'gzip' 或 'zstd'（需要安装 zstandard）
+ARCHIVE_SEGMENT_SIZE = 256 * 1024 * 1024    # 单个分段文件大小上限
+ARCHIVE_BATCH_SIZE = 100                    # 攒够多少个页面写一次磁盘
+ARCHIVE_FLUSH_INTERVAL = 5                  # 最长写入间隔（秒）
+
+# 增量抓取（定期刷新时使用）：单词页发送条件请求，内容未变化的页面不再解析和写入，
+# 有变化的词条写入 <DATA_DIR>/delta/<时间>/ 目录
+INCREMENTAL_ENABLED = False
+INCREMENTAL_DIR = 'incremental'             # 每个爬虫一个 <爬虫名>.sqlite3，保存 ETag / Last-Modified / 内容哈希
+INCREMENTAL_CALLBACKS = ['parse_word_details', 'parse_word_details_pooled']
+
 # 下载超时设置
 DOWNLOAD_TIMEOUT = 180
 
@@ -117,20 +162,48 @@ LOG_FILE = 'cambridge_spider_v3.log'
 CAMBRIDGE_DICT = {
     'DATA_DIR': 'data',  # 默认使用 v3 目录
     'STATE_DIR': 'spider_state',
+    'STATE_BACKEND': 'journal',  # json: 每次全量重写；journal: 追加日志 + 定期压缩；sqlite: 本地 SQLite，适合几十万级URL
 }
 
 # 越南语版本的特定设置
 CAMBRIDGE_DICT_VI = {
     'DATA_DIR': 'data_vi',
     'STATE_DIR': 'spider_state_vi',
+    'STATE_BACKEND': 'journal',
 }
 
 # 日文版本的特定设置
 CAMBRIDGE_DICT_JA = {
     'DATA_DIR': 'data_ja',
     'STATE_DIR': 'spider_state_ja',
+    'STATE_BACKEND': 'journal',
 }
 
+# 其他词典版本（见 editions.py）的配置名为 CAMBRIDGE_DICT_ZH_HANT、CAMBRIDGE_DICT_KO 等，
+# 没有配置时使用 data_<版本> / spider_state_<版本> 目录
+
+# 按词频 / CEFR 词表确定抓取优先级（utils/priority.py），高频和低等级单词先抓取；
+# 也可以用 -a priority_files=... 指定。抓取整部词典时建议同时设置 JOBDIR，
+# 调度器队列保存在磁盘上，重启后保持优先级顺序：scrapy crawl dictionary -s JOBDIR=jobs/dictionary
+WORD_PRIORITY_FILES = []
+
+# dictionary_multi 各版本共用的词头列表，浏览页只需要遍历一次
+HEADWORD_CACHE = 'spider_state_headwords/headwords.sqlite3'
+
 FEED_EXPORT_ENCODING = 'utf-8'
 FEED_EXPORT_INDENT = 2
 
+# DictionaryPipeline 输出设置
+# json: 每个字母一个 JSON 数组，整体重写；jsonl: 每行一个词条，只追加新数据
+DICT_OUTPUT_FORMAT = 'jsonl'
+DICT_OUTPUT_BUFFER_SIZE = 256 * 1024            # 写缓冲大小
+DICT_OUTPUT_FSYNC_INTERVAL = 5                  # fsync 间隔（秒），落盘后才记录单词页完成
+DICT_OUTPUT_ROTATE_BYTES = 512 * 1024 * 1024    # 单个文件超过该大小时轮转
+# jsonl 输出压缩：None / 'gzip' / 'zstd'（需要安装 zstandard），按帧压缩并生成 .idx 帧索引
+DICT_OUTPUT_COMPRESSION = None
+DICT_OUTPUT_COMPRESSION_LEVEL = None            # None 表示使用默认级别
+DICT_OUTPUT_FRAME_SIZE = 1024 * 1024            # 每帧的未压缩字节数
+DICT_OUTPUT_BACKGROUND = True                   # 在独立线程中序列化和写文件
+DICT_OUTPUT_QUEUE_SIZE = 1000                   # 写线程队列长度，满了之后对引擎施加背压
+DICT_OUTPUT_BATCH_SIZE = 200                    # 写线程每批最多处理的词条数
+
@@ -0,0 +1,10 @@
+"""
+项目自定义信号
+
+page_persisted: 页面的所有 item 都已写入输出文件并 fsync（由 DictionaryPipeline 发送），
+或者页面内容与上次相同、无需重新写入（由 IncrementalMiddleware 发送）。
+参数为 request（产生 item 的请求，重定向时是重定向后的请求）和 spider。
+单词页的完成状态、去重记录等需要在崩溃后仍然成立的记录，都应该在这个信号之后再保存。
+"""
+
+page_persisted = object()
@@ -1,4 +1,5 @@
 import scrapy
+from scrapy.utils.defer import maybe_deferred_to_future
 from urllib.parse import urljoin
 import logging
 import os
@@ -12,33 +13,76 @@ if project_root not in sys.path:
 
 try:
     from cambridge_dict.utils.spider_state import SpiderState
-    from cambridge_dict.items import (
-        DictionaryItem, PronunciationItem, ExampleItem,
-        DefinitionItem, SenseItem, PhraseItem
-    )
+    from cambridge_dict.items import DictionaryItem
+    from cambridge_dict.extraction import WordExtractor
+    from cambridge_dict.utils.parse_pool import ParsePool
+    from cambridge_dict.signals import page_persisted
+    from cambridge_dict.utils.validators import ContentUnchanged
+    from cambridge_dict.utils.priority import INDEX_PRIORITY, load_word_priorities
+    from cambridge_dict.editions import edition_for_url, get_edition
 except ImportError:
     from ..utils.spider_state import SpiderState
-    from ..items import (
-        DictionaryItem, PronunciationItem, ExampleItem,
-        DefinitionItem, SenseItem, PhraseItem
-    )
+    from ..items import DictionaryItem
+    from ..extraction import WordExtractor
+    from ..utils.parse_pool import ParsePool
+    from ..signals import page_persisted
+    from ..utils.validators import ContentUnchanged
+    from ..utils.priority import INDEX_PRIORITY, load_word_priorities
+    from ..editions import edition_for_url, get_edition
 
 class DictionarySpider(scrapy.Spider):
     name = 'dictionary'
+    # 词典版本（editions.py），决定输出目录
+    edition = 'zh-Hans'
+    # 单词详情页解析器（zh 词典页面）
+    extractor = WordExtractor('zh')
+    # 开启 PARSE_POOL_ENABLED 时由 from_crawler 创建
+    parse_pool = None
+    # 词表优先级（utils/priority.py），没有词表时按字母顺序抓取
+    priorities = None
     start_urls = ['https://dictionary.cambridge.org/browse/english-chinese-simplified/']
 
-    def __init__(self, start_url=None, *args, **kwargs):
+    def __init__(self, start_url=None, state_dir=None, priority_files=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if start_url:
             self.start_urls = [start_url]
-        # 初始化状态管理器
+            # 其他语言的词典按 URL 确定版本，输出和状态目录随之改变
+            edition = edition_for_url(start_url)
+            if edition is not None:
+                self.edition = edition.key
+                if edition.profile != self.extractor.profile.name:
+                    self.extractor = WordExtractor(edition.profile)
+        # 初始化状态管理器（增量刷新时用 -a state_dir 为每轮刷新指定新的状态目录）
         from scrapy.utils.project import get_project_settings
         settings = get_project_settings()
+        dict_settings = get_edition(self.edition).options(settings)
         self.state_manager = SpiderState(
-            state_dir=settings.get('CAMBRIDGE_DICT', {}).get('STATE_DIR', 'spider_state/v3')
+            state_dir=state_dir or dict_settings['STATE_DIR'],
+            backend=dict_settings['STATE_BACKEND']
         )
+        self._load_priorities(priority_files, settings)
         self.logger.info(f"Spider initialized with start_url: {self.start_urls[0]}")
 
+    def _load_priorities(self, priority_files, settings):
+        """加载词表（-a priority_files=a.txt,b.csv 或 WORD_PRIORITY_FILES 设置）"""
+        self.priorities = load_word_priorities(priority_files or settings.getlist('WORD_PRIORITY_FILES'))
+        if self.priorities:
+            self.logger.info(f"Word priorities loaded: {self.priorities.tier_counts()}")
+
+    def _index_priority(self):
+        # 有词表时先抓完所有浏览页，单词页全部进入调度器后再按优先级抓取
+        return INDEX_PRIORITY if self.priorities else 0
+
+    def _word_priority(self, url):
+        return self.priorities.priority_for_url(url) if self.priorities else 0
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.parse_pool = ParsePool.from_crawler(crawler)
+        crawler.signals.connect(spider.page_persisted, signal=page_persisted)
+        return spider
+
     def start_requests(self):
         """开始请求，支持断点续传"""
         progress = self.state_manager.get_progress()
@@ -52,12 +96,18 @@ class DictionarySpider(scrapy.Spider):
                 'dont_merge_cookies': True,
                 'current_letter': current_letter
             },
+            priority=self._index_priority(),
             dont_filter=True
         )
 
+    @staticmethod
+    def _first_level_links(response):
+        """浏览页上的字母页链接"""
+        return response.xpath('//div[@class="hfl-s lt2b lmt-10 lmb-25 lp-s_r-20"]//ul[@class="hul-i hul-ib lm-0"]/li/a/@href').getall()
+
     def parse_first_level(self, response):
         """解析一级页面"""
-        links = response.xpath('//div[@class="hfl-s lt2b lmt-10 lmb-25 lp-s_r-20"]//ul[@class="hul-i hul-ib lm-0"]/li/a/@href').getall()
+        links = self._first_level_links(response)
         
         # 获取当前处理的字母
         current_letter = response.meta.get('current_letter')
@@ -74,7 +124,7 @@ class DictionarySpider(scrapy.Spider):
         
         for link in links:
             letter = link.split('/')[-2]  # 获取字母
-            url_status = self.state_manager.get_url_status(link, 'first')
+            url_status = self._state_for(response).get_url_status(link, 'first')
             
             if url_status.get('status') == 'success':
                 continue
@@ -84,29 +134,27 @@ class DictionarySpider(scrapy.Spider):
                 callback=self.parse_second_level,
                 errback=self.errback_httpbin,
                 meta={'letter': letter},
+                priority=self._index_priority(),
                 dont_filter=True
             )
 
     def parse_second_level(self, response):
         """解析二级页面"""
         letter = response.meta['letter']
-        self.state_manager.update_progress(letter=letter)
+        self._state_for(response).update_progress(letter=letter)
         
         links = response.xpath('//div[@class="hdf ff-50 lmt-15 i-browse"]//a[@class="hlh32 hdb dil tcbd"]/@href').getall()
         self.logger.info(f"Found {len(links)} second-level URLs for letter {letter}")
         
-        for link in links:
-            full_url = urljoin(response.url, link)
-            url_status = self.state_manager.get_url_status(full_url, 'second')
-            
-            if url_status.get('status') == 'success':
-                continue
-                
+        # 只抓取尚未完成的范围页，全部完成后字母页也会被标记为完成
+        full_urls = [urljoin(response.url, link) for link in links]
+        for full_url in self._state_for(response).register_children(self._request_url(response), 'first', full_urls, 'second'):
             yield scrapy.Request(
                 url=full_url,
                 callback=self.parse_word_links,
                 errback=self.errback_httpbin,
                 meta={'letter': letter},
+                priority=self._index_priority(),
                 dont_filter=True
             )
 
@@ -115,210 +163,72 @@ class DictionarySpider(scrapy.Spider):
         letter = response.meta['letter']
         word_links = response.xpath('//div[contains(@class, "hlh32 han")]/a[@class="tc-bd"]/@href').getall()
         
-        for link in word_links:
-            full_url = urljoin(response.url, link)
-            url_status = self.state_manager.get_url_status(full_url, 'word')
-            
-            if url_status.get('status') == 'success':
-                continue
-                
+        # 跳过已经抓取完成的单词页；单词页不设置 dont_filter，从多个范围页进入的同一个单词只抓取一次
+        full_urls = [urljoin(response.url, link) for link in word_links]
+        for full_url in self._state_for(response).register_children(self._request_url(response), 'second', full_urls, 'word'):
             yield scrapy.Request(
                 url=full_url,
-                callback=self.parse_word_details,
+                callback=self.parse_word_details_pooled if self.parse_pool else self.parse_word_details,
                 errback=self.errback_httpbin,
                 meta={'letter': letter},
-                dont_filter=True
+                priority=self._word_priority(full_url)
             )
 
     def parse_word_details(self, response):
         """解析单词详情页"""
         letter = response.meta['letter']
-        # 从页面标题获取单词作为后备
-        title_word = response.xpath('//div[contains(@class, "di-title")]//span[contains(@class, "hw")]/text() | //div[contains(@class, "di-title")]//b/text()').get('').strip()
-        
-        # 获取所有可能的内容块
-        pos_blocks = []
+        return self._handle_word_records(response, self._extractor_for(response).extract_response(response, letter))
+
+    async def parse_word_details_pooled(self, response):
+        """在进程池中解析单词详情页"""
+        letter = response.meta['letter']
+        records = await maybe_deferred_to_future(
+            self.parse_pool.extract(self._extractor_for(response), response, letter)
+        )
+        return self._handle_word_records(response, records)
+
+    def _handle_word_records(self, response, records):
+        """把解析结果包装为item并更新状态"""
+        # 每个内容块（词条、习语、短语、短语动词）解析为一个item
+        items = [DictionaryItem(record) for record in records]
         
-        # 获取普通词条内容
-        entry_blocks = response.xpath('//div[contains(@class, "entry-body")]//div[contains(@class, "pr entry-body__el")]')
-        if entry_blocks:
-            pos_blocks.extend(entry_blocks)
-            
-        # 获取习语内容
-        idiom_blocks = response.xpath('//div[contains(@class, "pr idiom-block")]')
-        if idiom_blocks:
-            pos_blocks.extend(idiom_blocks)
-            
-        # 获取短语内容
-        phrase_blocks = response.xpath('//span[contains(@class, "phrase-di-block dphrase-di-block")]')
-        if phrase_blocks:
-            pos_blocks.extend(phrase_blocks)
-            
-        # 获取短语动词内容
-        phrasal_verb_blocks = response.xpath('//div[contains(@class, "pv-block")]')
-        if phrasal_verb_blocks:
-            pos_blocks.extend(phrasal_verb_blocks)
-            
         # 如果没有找到任何内容块，记录警告
-        if not pos_blocks:
+        if not items:
             self.logger.warning(f"No content blocks found for URL: {response.url}")
+            self._empty_page(response)
             return []
-        
-        # 解析词条内容
-        items = []  # 创建列表存储所有items
-
-        for pos_block in pos_blocks:
-            # 尝试从pos_block获取单词，如果获取不到则使用title_word
-            block_word = ''.join(pos_block.xpath('.//div[contains(@class, "di-title")]//span[contains(@class, "hw")]/text() | .//div[contains(@class, "di-title")]//b//text()').getall()).strip()
-            word = block_word if block_word else title_word
-            
-            # 为每个pos_block创建新的DictionaryItem实例
-            item = DictionaryItem()
-            item['word'] = word
-            item['url'] = response.url
-            item['letter'] = letter
             
-            self._parse_pos_block(item, pos_block, response.url)
-            items.append(item)
-            
-        # 更新URL状态
-        self.state_manager.mark_url_status(response.url, 'word', 'success')
-        
-        # 更新进度
-        progress = self.state_manager.get_progress()
-        self.state_manager.update_progress(
-            processed_words=progress['processed_words'] + 1
-        )
-        
+        # 这些 item 都写入并落盘后 DictionaryPipeline 发送 page_persisted，届时再记录完成；
+        # 在此之前崩溃，下次运行会重新抓取这个单词页
+        response.meta['item_count'] = len(items)
         return items  # 返回所有解析到的items
 
-    def _parse_pos_block(self, item, pos_block, url):
-        """解析词性块"""
-        item['part_of_speech'] = self._clean_text(pos_block.xpath('.//div[contains(@class, "posgram")]//span[contains(@class, "pos")]/text()').get(''))
-        
-        # 解析发音
-        self._parse_pronunciation(item, pos_block, url)
-        
-        # 解析词义
-        item['senses'] = self._parse_senses(pos_block)
-        
-        # 解析短语动词和习语
-        self._parse_phrases(item, pos_block, url)
-
-    def _parse_pronunciation(self, item, pos_block, url):
-        """解析发音信息"""
-        # 英式发音
-        uk_pron = ''.join(pos_block.xpath('.//span[contains(@class, "uk dpron-i")]//span[contains(@class, "ipa")]/text()').getall()).strip()
-        uk_mp3 = pos_block.xpath('.//span[contains(@class, "uk dpron-i")]//source[@type="audio/mpeg"]/@src').get('')
-        if uk_pron:
-            item['uk_pronunciation'] = PronunciationItem(
-                pron=f"/{uk_pron}/",
-                audio_url=urljoin(url, uk_mp3) if uk_mp3 else None
-            )
+    def page_persisted(self, request, spider):
+        """单词页的 item 都已落盘，更新URL状态和进度"""
+        # 按最初请求的 URL 记录（重定向后的 URL 与登记的子页面对不上）
+        state = self._state_for(request)
+        state.mark_url_status(self._request_url(request), 'word', 'success')
+        progress = state.get_progress()
+        state.update_progress(
+            processed_words=progress['processed_words'] + 1
+        )
 
-        # 美式发音
-        us_pron = ''.join(pos_block.xpath('.//span[contains(@class, "us dpron-i")]//span[contains(@class, "ipa")]/text()').getall()).strip()
-        us_mp3 = pos_block.xpath('.//span[contains(@class, "us dpron-i")]//source[@type="audio/mpeg"]/@src').get('')
-        if us_pron:
-            item['us_pronunciation'] = PronunciationItem(
-                pron=f"/{us_pron}/",
-                audio_url=urljoin(url, us_mp3) if us_mp3 else None
-            )
+    def _empty_page(self, response):
+        """没有内容的单词页记为 empty（终止状态），范围页不会因为它一直无法完成"""
+        self._state_for(response).mark_url_status(self._request_url(response), 'word', 'empty')
 
-    def _parse_senses(self, pos_block):
-        """解析词义信息"""
-        senses = []
-        for sense_block in pos_block.xpath('.//div[contains(@class, "def-block")]'):
-            sense = SenseItem()
-            
-            # 获取指导词
-            guide_word = self._clean_text(sense_block.xpath(
-                './/ancestor::div[contains(@class, "pr dsense")]/h3[contains(@class, "dsense_h")]'
-                '/span[contains(@class, "guideword dsense_gw")]/span/text()'
-            ).get(''))
-            if guide_word:
-                sense['guide_word'] = guide_word.strip('()').strip()
-            
-            # 获取定义
-            definitions = []
-            def_parts = sense_block.xpath('.//div[contains(@class, "ddef_d")]//text()').getall()
-            def_text = ' '.join([text.strip() for text in def_parts if text.strip()])
-            if def_text:
-                definition = DefinitionItem(
-                    definition=def_text,
-                    def_translation=self._clean_text(''.join(
-                        sense_block.xpath('.//div[@class="def-body ddef_b"]/span[contains(@class, "dtrans-se") and not(contains(@class, "hdb"))]//text()').getall()
-                    )),
-                    level=self._clean_text(sense_block.xpath('.//span[contains(@class, "epp-xref")]/text()').get('')),
-                    attribute=self._clean_text(''.join(
-                        sense_block.xpath('.//div[contains(@class, "ddef_h")]//span[contains(@class, "gram dgram")]/a//text()').getall()
-                    )),
-                    examples=[]
-                )
-                
-                # 获取例句
-                for example in sense_block.xpath('.//div[contains(@class, "examp")]'):
-                    ex = ExampleItem(
-                        text=self._clean_text(''.join(example.xpath('.//span[contains(@class, "eg")]//text()').getall())),
-                        translation=self._clean_text(example.xpath('.//span[contains(@class, "trans")]/text()').get(''))
-                    )
-                    if ex['text'] or ex['translation']:
-                        definition['examples'].append(dict(ex))
-                
-                definitions.append(dict(definition))
-            
-            if definitions:
-                sense['definitions'] = definitions
-                
-            # 获取更多例句
-            more_examples = []
-            for more_example in sense_block.xpath('.//following-sibling::div[contains(@class, "daccord")][1]//ul[contains(@class, "hul-u")]//li'):
-                ex = ExampleItem(
-                    text=self._clean_text(''.join(more_example.xpath('.//text()').getall())),
-                    translation=''
-                )
-                if ex['text']:
-                    more_examples.append(dict(ex))
-            
-            if more_examples:
-                sense['more_examples'] = more_examples
-                
-            if sense.get('definitions') or sense.get('more_examples'):
-                senses.append(dict(sense))
-                
-        return senses
+    @staticmethod
+    def _request_url(r):
+        """重定向之前最初请求的 URL（r 为请求或响应）"""
+        return (r.meta.get('redirect_urls') or [r.url])[0]
 
-    def _parse_phrases(self, item, pos_block, url):
-        """解析短语动词和习语"""
-        # 解析短语动词
-        phrasal_verbs = []
-        for phrasal_verb in pos_block.xpath('//div[contains(@class, "xref phrasal_verbs")]//div[contains(@class, "lcs")]//a'):
-            pv = PhraseItem(
-                text=self._clean_text(' '.join(phrasal_verb.xpath('.//text()').getall())),
-                link=urljoin(url, phrasal_verb.xpath('.//@href').get(''))
-            )
-            if pv['text']:
-                phrasal_verbs.append(dict(pv))
-        if phrasal_verbs:
-            item['phrasal_verbs'] = phrasal_verbs
-            
-        # 解析习语
-        idioms = []
-        for idiom in pos_block.xpath('//div[contains(@class, "xref idioms")]//div[contains(@class, "lcs")]//a'):
-            id = PhraseItem(
-                text=self._clean_text(' '.join(idiom.xpath('.//text()').getall())),
-                link=urljoin(url, idiom.xpath('.//@href').get(''))
-            )
-            if id['text']:
-                idioms.append(dict(id))
-        if idioms:
-            item['idioms'] = idioms
+    def _state_for(self, response):
+        """响应所属的爬虫状态"""
+        return self.state_manager.for_url(self._request_url(response))
 
-    def _clean_text(self, text):
-        """清理文本"""
-        if not text:
-            return ''
-        return text.strip().rstrip('，；').strip()
+    def _extractor_for(self, response):
+        """单词详情页使用的解析器"""
+        return self.extractor
 
     def _get_level(self, url):
         """根据URL判断层级"""
@@ -332,7 +242,10 @@ class DictionarySpider(scrapy.Spider):
 
     def errback_httpbin(self, failure):
         """处理请求错误"""
-        url = failure.request.url
+        url = self._request_url(failure.request)
+        if failure.check(ContentUnchanged):
+            # 增量抓取时内容未变化的单词页，IncrementalMiddleware 已经发送 page_persisted 记录完成
+            return
         self.logger.error(f'Request failed: {url}')
         self.state_manager.mark_url_status(
             url,
@@ -368,6 +281,8 @@ if __name__ == '__main__':
         'DOWNLOADER_MIDDLEWARES': {
             'cambridge_dict.middlewares.CustomDownloaderMiddleware': 543,
             'cambridge_dict.middlewares.CustomRetryMiddleware': 550,
+            'cambridge_dict.middlewares.AdaptiveThrottleMiddleware': 560,
+            'cambridge_dict.middlewares.ArchiveMiddleware': 580,
             'scrapy.downloadermiddlewares.retry.RetryMiddleware': None,
         },
     }
@@ -0,0 +1,210 @@
+import scrapy
+from urllib.parse import urljoin
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(file_path)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+try:
+    from cambridge_dict.spiders.cambridge import DictionarySpider
+    from cambridge_dict.utils.spider_state import SpiderState, SpiderStateRouter
+    from cambridge_dict.extraction import WordExtractor
+    from cambridge_dict.utils.headwords import HeadwordCache
+    from cambridge_dict.editions import edition_for_url, headword_slug, parse_editions
+except ImportError:
+    from .cambridge import DictionarySpider
+    from ..utils.spider_state import SpiderState, SpiderStateRouter
+    from ..extraction import WordExtractor
+    from ..utils.headwords import HeadwordCache
+    from ..editions import edition_for_url, headword_slug, parse_editions
+
+
+class MultiEditionSpider(DictionarySpider):
+    """在一个进程中同时抓取多个词典版本
+
+    所有版本共用一个下载器（连接池、并发上限）和同一个主机的限速预算；
+    每个版本有自己的状态目录和输出目录（settings.py 中的 CAMBRIDGE_DICT* 配置），
+    按 URL 中的词典路径分发。
+
+    浏览页只在第一个版本上遍历，发现的词头记录到共用的词头列表（utils/headwords.py），
+    每个新词头同时请求所有版本的单词页；词头列表已经完整时不再遍历浏览页，
+    直接按列表请求各版本的单词页。只在某些版本中存在的词头用 reconcile 参数
+    指定这些版本重新遍历浏览页来补齐。
+
+    用法：
+        scrapy crawl dictionary_multi -a editions=zh-Hans,zh-Hant,vi,ja,ko
+        scrapy crawl dictionary_multi -a editions=zh-Hans,ko -a reconcile=ko
+    """
+    name = 'dictionary_multi'
+    edition = None
+
+    def __init__(self, editions='zh-Hans,vi,ja', state_dir=None, reconcile=None, headwords=None,
+                 priority_files=None, *args, **kwargs):
+        # 不调用 DictionarySpider.__init__，它只创建一个版本的状态
+        scrapy.Spider.__init__(self, *args, **kwargs)
+        self.editions = parse_editions(editions)
+        if not self.editions:
+            raise ValueError("No editions given, e.g. -a editions=zh-Hans,vi,ja")
+        self.start_urls = [edition.browse_url for edition in self.editions]
+
+        from scrapy.utils.project import get_project_settings
+        settings = get_project_settings()
+        states = {}
+        extractors = {}
+        self.extractors = {}
+        for edition in self.editions:
+            options = edition.options(settings)
+            states[edition.key] = SpiderState(
+                state_dir=os.path.join(state_dir, edition.key) if state_dir else options['STATE_DIR'],
+                backend=options['STATE_BACKEND']
+            )
+            # 相同页面结构的版本共用一个解析器
+            if edition.profile not in extractors:
+                extractors[edition.profile] = WordExtractor(edition.profile)
+            self.extractors[edition.key] = extractors[edition.profile]
+        self.state_manager = SpiderStateRouter(states, self._edition_key, default=self.editions[0].key)
+
+        self._load_priorities(priority_files, settings)
+        self.headwords = HeadwordCache(headwords or settings.get('HEADWORD_CACHE'))
+        # 各版本没有的词头
+        self.missing = {edition.key: self.headwords.missing_slugs(edition.key) for edition in self.editions}
+        # 需要遍历浏览页的版本：reconcile 指定的版本；词头列表还没有完整遍历过时加上第一个版本
+        self.browse_editions = parse_editions(reconcile) if reconcile else []
+        # 版本 -> 浏览页上的字母页，关闭时据此判断该版本的浏览页是否遍历完整
+        self.letter_pages = {}
+        if not self.headwords.discovered_editions() and self.editions[0] not in self.browse_editions:
+            self.browse_editions.insert(0, self.editions[0])
+        self.logger.info(
+            f"Spider initialized with editions: {', '.join(e.key for e in self.editions)}, "
+            f"{len(self.headwords)} known headwords, "
+            f"browsing: {', '.join(e.key for e in self.browse_editions) or 'none'}"
+        )
+
+    @staticmethod
+    def _edition_key(url):
+        edition = edition_for_url(url)
+        return edition.key if edition else None
+
+    def _response_edition(self, response):
+        # 重定向后的 URL 可能不带词典路径，按最初请求的 URL 判断
+        return self._edition_key(self._request_url(response)) or self.editions[0].key
+
+    def start_requests(self):
+        """遍历需要补齐的版本的浏览页，已知词头直接请求各版本的单词页"""
+        for edition in self.browse_editions:
+            progress = self.state_manager.states[edition.key].get_progress()
+            yield scrapy.Request(
+                url=edition.browse_url,
+                callback=self.parse_first_level,
+                errback=self.errback_httpbin,
+                meta={
+                    'dont_merge_cookies': True,
+                    'current_letter': progress.get('current_letter')
+                },
+                priority=self._index_priority(),
+                dont_filter=True
+            )
+        # 词头列表在迭代前取出，遍历过程中发现的新词头由 parse_word_links 请求
+        headwords = self.headwords.iter_headwords()
+        if self.priorities:
+            # 调度器按需读取启动请求，高优先级的词头要先发出
+            headwords = sorted(headwords, key=lambda row: -self.priorities.priority(row[0]))
+        for slug, letter in headwords:
+            yield from self._headword_requests(slug, letter)
+
+    def parse_first_level(self, response):
+        self.letter_pages[self._response_edition(response)] = self._first_level_links(response)
+        yield from super().parse_first_level(response)
+
+    def _headword_requests(self, slug, letter):
+        """一个词头在各版本中还没有抓取成功的单词页"""
+        for edition in self.editions:
+            if slug in self.missing[edition.key]:
+                continue
+            url = edition.word_url(slug)
+            state = self.state_manager.states[edition.key]
+            if state.get_url_status(url, 'word').get('status') == 'success':
+                continue
+            self.crawler.stats.inc_value('headwords/word_requests')
+            yield scrapy.Request(
+                url=url,
+                callback=self.parse_word_details_pooled if self.parse_pool else self.parse_word_details,
+                errback=self.errback_httpbin,
+                meta={'letter': letter, 'headword': slug},
+                priority=self._word_priority(url)
+            )
+
+    def parse_word_links(self, response):
+        """解析单词链接列表页，只有新词头才请求单词页（已知词头由词头列表请求）"""
+        letter = response.meta['letter']
+        edition = self._response_edition(response)
+        word_links = response.xpath('//div[contains(@class, "hlh32 han")]/a[@class="tc-bd"]/@href').getall()
+        full_urls = [urljoin(response.url, link) for link in word_links]
+        # 登记子页面，所有单词页都完成后范围页标记为完成
+        self._state_for(response).register_children(self._request_url(response), 'second', full_urls, 'word')
+        for full_url in full_urls:
+            slug = headword_slug(full_url)
+            if slug is None or not self.headwords.add(slug, letter, edition):
+                continue
+            self.crawler.stats.inc_value('headwords/new')
+            yield from self._headword_requests(slug, letter)
+
+    @staticmethod
+    def _no_entry_page(response):
+        """确认该版本没有这个词头：404，或者重定向到了不是单词页的页面（拼写建议页等）"""
+        if response.status == 404:
+            return True
+        return bool(response.meta.get('redirect_urls')) and headword_slug(response.url) is None
+
+    def _handle_word_records(self, response, records):
+        items = super()._handle_word_records(response, records)
+        edition = self._response_edition(response)
+        # 输出目录按最初请求的 URL 所属的版本选择
+        for item in items:
+            item['edition'] = edition
+        return items
+
+    def _empty_page(self, response):
+        slug = response.meta.get('headword')
+        if not slug:
+            super()._empty_page(response)
+            return
+        edition = self._response_edition(response)
+        if self._no_entry_page(response):
+            # 该版本没有这个词头，以后不再请求；记为 empty，范围页可以完成
+            self.headwords.mark_missing(slug, edition)
+            self.missing[edition].add(slug)
+            self.crawler.stats.inc_value('headwords/missing')
+            super()._empty_page(response)
+        else:
+            # 限流页、临时错误页或解析失败，下次运行重新请求
+            self._state_for(response).mark_url_status(self._request_url(response), 'word', 'failed')
+            self.crawler.stats.inc_value('headwords/empty')
+
+    def _browse_complete(self, key):
+        """该版本浏览页上的所有字母页都已完成（所有范围页和单词页都抓取成功）"""
+        links = self.letter_pages.get(key)
+        if not links:
+            return False
+        state = self.state_manager.states[key]
+        return all(state.get_url_status(link, 'first').get('status') == 'success' for link in links)
+
+    def closed(self, reason):
+        if reason == 'finished':
+            for edition in self.browse_editions:
+                if self._browse_complete(edition.key):
+                    self.headwords.mark_discovered(edition.key)
+                else:
+                    # 有字母页没有完成（请求失败、页面为空等），下次运行继续遍历浏览页
+                    self.logger.warning(f"Browse pages of {edition.key} are incomplete, headword list not marked discovered")
+        self.headwords.close()
+
+    def _state_for(self, response):
+        return self.state_manager.states[self._response_edition(response)]
+
+    def _extractor_for(self, response):
+        return self.extractors[self._response_edition(response)]
@@ -0,0 +1,163 @@
+import scrapy
+from scrapy.utils.defer import maybe_deferred_to_future
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(file_path)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+try:
+    from cambridge_dict.items import DictionaryItem
+    from cambridge_dict.editions import EDITIONS, edition_for_url
+    from cambridge_dict.extraction import WordExtractor
+    from cambridge_dict.utils.archive import PageArchive
+    from cambridge_dict.utils.parse_pool import ParsePool
+except ImportError:
+    from ..items import DictionaryItem
+    from ..editions import EDITIONS, edition_for_url
+    from ..extraction import WordExtractor
+    from ..utils.archive import PageArchive
+    from ..utils.parse_pool import ParsePool
+
+# 归档中的爬虫名称对应的默认词典版本，None 表示抓取了多个版本
+# 每个页面按 URL 所属的版本选择解析配置，无法判断时使用默认版本（没有时为 zh）
+SOURCE_EDITIONS = {
+    'dictionary': 'zh-Hans',
+    'single_word': 'zh-Hans',
+    'dictionary_vi': 'vi',
+    'single_word_vi': 'vi',
+    'single_word_ja': 'ja',
+    'single_word_ja_batch': 'ja',
+    'single_word_ja_batch_parallel': 'ja',
+    'dictionary_multi': None,
+}
+
+# 单词详情页的回调名称（开启进程池时为 parse_word_details_pooled）
+WORD_CALLBACKS = ('parse_word_details', 'parse_word_details_pooled')
+
+
+class ReparseSpider(scrapy.Spider):
+    """从本地归档重新解析单词详情页，不访问网络
+
+    用法：
+        scrapy crawl reparse -a source=dictionary
+        scrapy crawl reparse -a source=single_word_ja -a letter=a -a data_dir=data_ja_new
+
+    默认版本的词条写入 data_dir，其他版本（例如 dictionary -a start_url=<越南语浏览页>
+    抓取的页面、dictionary_multi 的各个版本）写入 data_dir/<版本>/。
+    -a profile=zh|ja|vi 强制所有页面使用同一种解析配置。
+    """
+    name = 'reparse'
+    parse_pool = None
+    custom_settings = {
+        # 解析是唯一的瓶颈，用进程池占满所有核
+        'PARSE_POOL_ENABLED': True,
+        'CONCURRENT_REQUESTS': 64,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 64,
+        'DOWNLOAD_DELAY': 0,
+        'RANDOMIZE_DOWNLOAD_DELAY': False,
+        'ROBOTSTXT_OBEY': False,
+        'COOKIES_ENABLED': False,
+        'RETRY_ENABLED': False,
+        'ARCHIVE_ENABLED': False,
+        'ADAPTIVE_THROTTLE_ENABLED': False,
+        # 归档中的每个页面都要重新解析
+        'DUPEFILTER_CLASS': 'scrapy.dupefilters.BaseDupeFilter',
+        'DOWNLOADER_MIDDLEWARES': {
+            'cambridge_dict.middlewares.ArchiveReplayMiddleware': 50,
+            'cambridge_dict.middlewares.CustomDownloaderMiddleware': None,
+            'cambridge_dict.middlewares.CustomRetryMiddleware': None,
+        },
+        # 重新解析不记录爬虫状态
+        'SPIDER_MIDDLEWARES': {
+            'cambridge_dict.middlewares.SpiderProgressMiddleware': None,
+        },
+    }
+
+    def __init__(self, source='dictionary', profile=None, letter=None,
+                 archive_dir=None, data_dir=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if profile is None and source not in SOURCE_EDITIONS:
+            raise ValueError(f"Unknown source spider {source!r}, pass -a profile=zh|ja|vi")
+        self.source = source
+        self.default_edition = SOURCE_EDITIONS.get(source)
+        self.profile = profile
+        self.letter = letter.lower() if letter else None
+        # 解析配置 -> 解析器
+        self.extractors = {}
+        self.archive_dir = archive_dir
+        # DictionaryPipeline 优先使用爬虫的 data_dir，避免覆盖原来的输出
+        self.data_dir = data_dir or os.path.join('data_reparse', source)
+        # 版本 -> 输出目录，DictionaryPipeline 按词条 URL 所属的版本选择
+        self.data_dirs = {
+            key: self.data_dir if key == self.default_edition else os.path.join(self.data_dir, key)
+            for key in EDITIONS
+        }
+        self.archive = None
+
+    def _extractor_for(self, url):
+        """页面 URL 所属版本的解析器"""
+        profile = self.profile
+        if profile is None:
+            edition = edition_for_url(url) or EDITIONS.get(self.default_edition)
+            profile = edition.profile if edition else 'zh'
+        extractor = self.extractors.get(profile)
+        if extractor is None:
+            extractor = self.extractors[profile] = WordExtractor(profile)
+        return extractor
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.archive = PageArchive(
+            spider.archive_dir or crawler.settings.get('ARCHIVE_DIR', 'archive'),
+            readonly=True,
+        )
+        spider.parse_pool = ParsePool.from_crawler(crawler)
+        return spider
+
+    def start_requests(self):
+        """按归档中的存储顺序为每个单词页生成一个本地请求"""
+        count = 0
+        for page in self.archive.iter_page_info(spider=self.source, status=200):
+            if page['callback'] not in WORD_CALLBACKS:
+                continue
+            letter = page['letter'] or page['url'].rstrip('/').split('/')[-1][:1].lower()
+            if self.letter and letter != self.letter:
+                continue
+            count += 1
+            yield scrapy.Request(
+                url=page['url'],
+                callback=self.parse_word_details,
+                errback=self.errback_archive,
+                dont_filter=True,
+                meta={
+                    'letter': letter,
+                    'archive_hash': page['hash'],
+                    'archive_encoding': page['encoding'],
+                    'from_archive': True,
+                },
+            )
+        self.logger.info(f"Queued {count} archived pages from {self.source}")
+
+    async def parse_word_details(self, response):
+        """解析归档的单词详情页"""
+        letter = response.meta['letter']
+        extractor = self._extractor_for(response.url)
+        if self.parse_pool:
+            records = await maybe_deferred_to_future(self.parse_pool.extract(extractor, response, letter))
+        else:
+            records = extractor.extract_response(response, letter)
+        if not records:
+            self.logger.warning(f"No content blocks found for URL: {response.url}")
+        return [DictionaryItem(record) for record in records]
+
+    def errback_archive(self, failure):
+        self.logger.error(f'Replay failed: {failure.request.url}: {failure.value!r}')
+
+    def closed(self, reason):
+        if self.archive is not None:
+            self.archive.close()
@@ -1,10 +1,11 @@
 import scrapy
-from urllib.parse import urljoin
+from scrapy import signals
 import logging
 import os
 import sys
 import argparse
 import json
+import time
 from pathlib import Path
 from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
@@ -17,85 +18,215 @@ if project_root not in sys.path:
 
 try:
     from cambridge_dict.utils.spider_state import SpiderState
-    from cambridge_dict.items import (
-        DictionaryItem, PronunciationItem, ExampleItem,
-        DefinitionItem, SenseItem, PhraseItem
-    )
+    from cambridge_dict.items import DictionaryItem
+    from cambridge_dict.extraction import WordExtractor
+    from cambridge_dict.utils.validators import ContentUnchanged
+    from cambridge_dict.utils.frontier import FingerprintLog, url_fingerprint
+    from cambridge_dict.utils.work_queue import WorkQueue, read_chunk_urls
+    from cambridge_dict.utils.url_feed import open_url_feeds
+    from cambridge_dict.utils.priority import load_word_priorities
+    from cambridge_dict.signals import page_persisted
 except ImportError:
     from ..utils.spider_state import SpiderState
-    from ..items import (
-        DictionaryItem, PronunciationItem, ExampleItem,
-        DefinitionItem, SenseItem, PhraseItem
-    )
+    from ..items import DictionaryItem
+    from ..extraction import WordExtractor
+    from ..utils.validators import ContentUnchanged
+    from ..utils.frontier import FingerprintLog, url_fingerprint
+    from ..utils.work_queue import WorkQueue, read_chunk_urls
+    from ..utils.url_feed import open_url_feeds
+    from ..utils.priority import load_word_priorities
+    from ..signals import page_persisted
 
 class SingleWordSpider4JaParallel(scrapy.Spider):
     """单词爬虫 - 用于批量抓取指定单词的数据"""
     name = 'single_word_ja_batch_parallel'
+    # 词典版本（editions.py），决定输出目录
+    edition = 'ja'
+    # 单词详情页解析器（ja 词典页面）
+    extractor = WordExtractor('ja')
     allowed_domains = ['dictionary.cambridge.org']
     
-    def __init__(self, word_url=None, word=None, urls_file=None, start_index=0, end_index=None, *args, **kwargs):
+    def __init__(self, word_url=None, word=None, urls_file=None, start_index=0, end_index=None,
+                 shard=None, processed_dir='processed_urls', work_queue=None, lease_seconds=600,
+                 data_dir=None, stats_file=None, checkpoint_file=None, priority_files=None,
+                 *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.word_url = word_url
         self.word = word
         self.urls_file = urls_file
-        self.start_index = start_index
-        self.end_index = end_index
-        self.total_urls = 0
+        self.start_index = int(start_index)
+        self.end_index = int(end_index) if end_index is not None else None
         self.current_url_index = 0
-        self.processed_urls = set()
+        # 每个分片只追加写自己的指纹文件，启动时读取所有分片的记录
+        self.shard = shard or f"{self.start_index}-{self.end_index if self.end_index is not None else 'end'}"
+        self.processed_dir = processed_dir
+        # 记录URL文件读取进度，重启后从检查点继续（每个分片一个检查点）
+        self.checkpoint_file = checkpoint_file or (
+            os.path.join('url_checkpoints', f"{self.name}-{os.path.basename(urls_file)}-{self.shard}.json")
+            if urls_file else None
+        )
+        # 优先级 -> URL 文件读取器
+        self.url_feeds = {}
+        # 词表（-a priority_files=a.txt,b.csv 或 WORD_PRIORITY_FILES 设置），高频 / 低等级单词先抓取
+        from scrapy.utils.project import get_project_settings
+        self.priorities = load_word_priorities(priority_files or get_project_settings().getlist('WORD_PRIORITY_FILES'))
+        if self.priorities:
+            self.logger.info(f"按词表优先级抓取: {self.priorities.tier_counts()}")
+        # 由 run_shards.py 启动时从工作队列领取 URL 块，而不是固定的 start_index / end_index
+        self.work_queue = work_queue
+        self.lease_seconds = float(lease_seconds)
+        self.queue = None
+        # 块 id -> [未完成的请求数, 是否已全部发出, 失败的请求数]
+        self.open_chunks = {}
+        self._last_renew = 0
+        if data_dir:
+            self.data_dir = data_dir
+        self.stats_file = stats_file
         self.logger.info("Single word spider initialized")
         
         # 加载已处理的URL
         self._load_processed_urls()
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.page_persisted, signal=page_persisted)
+        crawler.signals.connect(spider.item_dropped, signal=signals.item_dropped)
+        return spider
+
     def _load_processed_urls(self):
-        """加载已处理的URL"""
-        processed_file = 'processed_urls.json'
-        if os.path.exists(processed_file):
+        """加载已处理的URL（本分片和其他分片的指纹文件）"""
+        os.makedirs(self.processed_dir, exist_ok=True)
+        shared_paths = [
+            os.path.join(self.processed_dir, filename)
+            for filename in sorted(os.listdir(self.processed_dir))
+            if filename.endswith('.fp')
+        ]
+        self.processed_urls = FingerprintLog(
+            os.path.join(self.processed_dir, f'{self.shard}.fp'),
+            shared_paths=shared_paths,
+        )
+        # 兼容旧版本的 processed_urls.json，只读取不再写入
+        legacy_file = 'processed_urls.json'
+        if os.path.exists(legacy_file):
             try:
-                with open(processed_file, 'r') as f:
-                    self.processed_urls = set(json.load(f))
-                self.logger.info(f"已加载 {len(self.processed_urls)} 个已处理的URL")
+                with open(legacy_file, 'r') as f:
+                    self.processed_urls.fingerprints.update(url_fingerprint(url) for url in json.load(f))
             except Exception as e:
                 self.logger.error(f"加载已处理URL失败: {str(e)}")
+        self.logger.info(f"已加载 {len(self.processed_urls)} 个已处理的URL（分片 {self.shard}）")
 
-    def _save_processed_urls(self):
-        """保存已处理的URL"""
-        processed_file = 'processed_urls.json'
-        try:
-            with open(processed_file, 'w') as f:
-                json.dump(list(self.processed_urls), f)
-        except Exception as e:
-            self.logger.error(f"保存已处理URL失败: {str(e)}")
+    def _mark_processed(self, r):
+        """记录已处理的URL（r 为请求或响应），每个URL只追加 8 字节"""
+        for url in {r.url, *r.meta.get('redirect_urls', ())}:
+            self.processed_urls.add(url_fingerprint(url))
+
+    def _feed_done(self, meta):
+        url_feed = self.url_feeds.get(meta.get('feed_tier', 0))
+        if url_feed is not None and 'feed_offset' in meta:
+            url_feed.done(meta['feed_offset'])
+
+    def closed(self, reason):
+        self.processed_urls.close()
+        for url_feed in self.url_feeds.values():
+            url_feed.close()
+        if self.queue is not None:
+            # 未完成的块归还给队列，其他进程可以立即领取
+            self.queue.release(self.shard)
+            self.queue.close()
+        if self.stats_file:
+            with open(self.stats_file, 'w', encoding='utf-8') as f:
+                json.dump(self.crawler.stats.get_stats(), f, ensure_ascii=False, indent=2, default=str)
+
+    def _queue_requests(self):
+        """逐块领取URL，调度器有空位时才会领取下一块"""
+        self.queue = WorkQueue(self.work_queue)
+        while True:
+            chunk = self.queue.lease(self.shard, self.lease_seconds)
+            if chunk is None:
+                break
+            chunk_id = chunk['id']
+            state = self.open_chunks[chunk_id] = [0, False, 0]
+            self.logger.info(f"领取第 {chunk_id} 块: 第 {chunk['start_line']}-{chunk['end_line']} 行")
+            for url in read_chunk_urls(self.urls_file, chunk):
+                if url_fingerprint(url) in self.processed_urls:
+                    continue
+                state[0] += 1
+                yield scrapy.Request(
+                    url=url,
+                    callback=self.parse_word_details,
+                    errback=self.errback_httpbin,
+                    meta={'letter': url.split('/')[-1][0].lower(), 'chunk_id': chunk_id},
+                    # 块内按词表优先级抓取
+                    priority=self.priorities.priority_for_url(url) if self.priorities else 0,
+                    dont_filter=True
+                )
+            state[1] = True
+            self._finish_chunk_request(chunk_id, 0)
+        self.logger.info("工作队列中没有可领取的块")
+
+    def _finish_chunk_request(self, chunk_id, done=1, failed=False):
+        """请求结束（成功或失败）时调用，块中所有请求都结束后标记完成
+
+        有请求失败的块放回队列，之后（本进程或其他进程）重新领取时只请求失败的 URL。
+        """
+        if chunk_id is None or self.queue is None:
+            return
+        now = time.monotonic()
+        if now - self._last_renew >= self.lease_seconds / 3:
+            self.queue.renew(self.shard, self.lease_seconds)
+            self._last_renew = now
+        state = self.open_chunks.get(chunk_id)
+        if state is None:
+            return
+        state[0] -= done
+        if failed:
+            state[2] += 1
+        if state[0] <= 0 and state[1]:
+            del self.open_chunks[chunk_id]
+            if state[2]:
+                status = self.queue.retry(chunk_id, self.shard)
+                if status == 'pending':
+                    self.logger.warning(f"第 {chunk_id} 块有 {state[2]} 个请求失败，放回队列重试")
+                elif status == 'failed':
+                    self.logger.error(f"第 {chunk_id} 块有 {state[2]} 个请求失败，重试次数已用完")
+                else:
+                    self.logger.warning(f"第 {chunk_id} 块的租约已过期并被重新分配")
+            elif not self.queue.complete(chunk_id, self.shard):
+                self.logger.warning(f"第 {chunk_id} 块的租约已过期并被重新分配")
 
     def start_requests(self):
         """开始请求"""
-        if self.urls_file:
+        if self.urls_file and self.work_queue:
+            yield from self._queue_requests()
+        elif self.urls_file:
+            # 从文件逐行读取URL，调度器需要时才读下一行
             try:
-                # 使用生成器方式读取文件，避免一次性加载所有URL
-                with open(self.urls_file, 'r', encoding='utf-8') as f:
-                    urls = []
-                    for i, line in enumerate(f):
-                        if line.strip():
-                            if i >= self.start_index and (self.end_index is None or i < self.end_index):
-                                url = line.strip()
-                                if url not in self.processed_urls:
-                                    urls.append(url)
-                
-                self.total_urls = len(urls)
-                self.logger.info(f"从文件读取到 {self.total_urls} 个URL")
-                
-                for url in urls:
-                    self.current_url_index += 1
-                    word = url.split('/')[-1]
-                    self.logger.info(f"正在处理第 {self.current_url_index}/{self.total_urls} 个单词: {word}")
-                    yield scrapy.Request(
-                        url=url,
-                        callback=self.parse_word_details,
-                        errback=self.errback_httpbin,
-                        meta={'letter': url.split('/')[-1][0].lower()},
-                        dont_filter=True
-                    )
+                # 有词表时按优先级从高到低各读一遍文件，每遍只读该优先级的URL
+                feeds = open_url_feeds(
+                    self.urls_file, self.checkpoint_file, self.priorities,
+                    start_line=self.start_index, end_line=self.end_index
+                )
+                self.url_feeds = dict(feeds)
+                for tier, url_feed in feeds:
+                    if url_feed.resumed:
+                        self.logger.info(f"从检查点继续: 第 {url_feed.committed_line} 行（优先级 {tier}）")
+                    for line_no, offset, url in url_feed:
+                        if url_fingerprint(url) in self.processed_urls:
+                            url_feed.done(offset)
+                            continue
+                        self.current_url_index += 1
+                        if self.current_url_index % 1000 == 0:
+                            self.logger.info(f"已读取 {self.current_url_index} 个URL（第 {line_no} 行）")
+                        yield scrapy.Request(
+                            url=url,
+                            callback=self.parse_word_details,
+                            errback=self.errback_httpbin,
+                            meta={'letter': url.split('/')[-1][0].lower(), 'feed_offset': offset, 'feed_tier': tier},
+                            priority=tier,
+                            dont_filter=True
+                        )
+                self.logger.info(f"URL文件读取完毕，共 {self.current_url_index} 个待处理URL")
             except Exception as e:
                 self.logger.error(f"读取URL文件失败: {str(e)}")
                 return
@@ -115,196 +246,52 @@ class SingleWordSpider4JaParallel(scrapy.Spider):
 
     def parse_word_details(self, response):
         """解析单词详情页"""
-        # 记录已处理的URL
-        self.processed_urls.add(response.url)
-        self._save_processed_urls()
-        
         letter = response.meta['letter']
-        # 从页面标题获取单词作为后备
-        title_word = response.xpath('//div[contains(@class, "di-title")]//span[contains(@class, "hw")]/text() | //div[contains(@class, "di-title")]/text() | //div[contains(@class, "di-title")]//b/text()').get('').strip()
-        
-        # 获取所有可能的内容块
-        pos_blocks = []
+        try:
+            # 每个内容块（词条、习语、短语、短语动词）解析为一个item
+            items = [DictionaryItem(record) for record in self.extractor.extract_response(response, letter)]
+        except Exception:
+            # 解析出错算作失败，URL 不记为已处理，块放回队列重试
+            self._finish_chunk_request(response.meta.get('chunk_id'), failed=True)
+            raise
+        finally:
+            # 解析出错时同样释放读取位置，否则检查点永远停在这一行之前
+            self._feed_done(response.meta)
         
-        # 获取普通词条内容
-        entry_blocks = response.xpath('//div[contains(@class, "entry-body")]//div[contains(@class, "entry-body__el")]')
-        if entry_blocks:
-            pos_blocks.extend(entry_blocks)
-            
-        # 获取习语内容
-        idiom_blocks = response.xpath('//div[contains(@class, "pr idiom-block")]')
-        if idiom_blocks:
-            pos_blocks.extend(idiom_blocks)
-            
-        # 获取短语内容
-        phrase_blocks = response.xpath('//span[contains(@class, "phrase-di-block dphrase-di-block")]')
-        if phrase_blocks:
-            pos_blocks.extend(phrase_blocks)
-            
-        # 获取短语动词内容
-        phrasal_verb_blocks = response.xpath('//div[contains(@class, "pv-block")]')
-        if phrasal_verb_blocks:
-            pos_blocks.extend(phrasal_verb_blocks)
-            
         # 如果没有找到任何内容块，记录警告
-        if not pos_blocks:
+        if not items:
             self.logger.warning(f"No content blocks found for URL: {response.url}")
+            # 没有需要写入的数据，直接记录已处理
+            self._mark_processed(response)
+            self._finish_chunk_request(response.meta.get('chunk_id'))
             return []
             
-        # 解析词条内容
-        items = []  # 创建列表存储所有items
-
-        for pos_block in pos_blocks:
-            # 尝试从pos_block获取单词，如果获取不到则使用title_word
-            block_word = ''.join(pos_block.xpath('.//div[contains(@class, "di-title")]//span[contains(@class, "hw")]/text() | .//div[contains(@class, "di-title")]//b//text()').getall()).strip()
-            word = block_word if block_word else title_word
-            
-            # 为每个pos_block创建新的DictionaryItem实例
-            item = DictionaryItem()
-            item['word'] = word
-            item['url'] = response.url
-            item['letter'] = letter
-            
-            self._parse_pos_block(item, pos_block, response.url)
-            items.append(item)
-            
-        # 返回所有解析到的items
+        # item 都写入并落盘后（page_persisted）再记录已处理、结束块中的请求
+        response.meta['item_count'] = len(items)
         return items
 
-    def _parse_pos_block(self, item, pos_block, url):
-        """解析词性块"""
-        item['part_of_speech'] = self._clean_text(pos_block.xpath('.//div[contains(@class, "posgram")]//span[contains(@class, "pos")]/text()').get(''))
-        
-        # 解析发音
-        self._parse_pronunciation(item, pos_block, url)
-        
-        # 解析词义
-        item['senses'] = self._parse_senses(pos_block)
-        
-        # 解析短语动词和习语
-        self._parse_phrases(item, pos_block, url)
-
-    def _parse_pronunciation(self, item, pos_block, url):
-        """解析发音信息"""
-        # 英式发音
-        uk_pron = ''.join(pos_block.xpath('.//span[contains(@class, "uk dpron-i")]//span[contains(@class, "ipa")]/text()').getall()).strip()
-        uk_mp3 = pos_block.xpath('.//span[contains(@class, "uk dpron-i")]//source[@type="audio/mpeg"]/@src').get('')
-        if uk_pron:
-            item['uk_pronunciation'] = PronunciationItem(
-                pron=f"/{uk_pron}/",
-                audio_url=urljoin(url, uk_mp3) if uk_mp3 else None
-            )
-
-        # 美式发音
-        us_pron = ''.join(pos_block.xpath('.//span[contains(@class, "us dpron-i")]//span[contains(@class, "ipa")]/text()').getall()).strip()
-        us_mp3 = pos_block.xpath('.//span[contains(@class, "us dpron-i")]//source[@type="audio/mpeg"]/@src').get('')
-        if us_pron:
-            item['us_pronunciation'] = PronunciationItem(
-                pron=f"/{us_pron}/",
-                audio_url=urljoin(url, us_mp3) if us_mp3 else None
-            )
-
-    def _parse_senses(self, pos_block):
-        """解析词义信息"""
-        senses = []
-        for sense_block in pos_block.xpath('.//div[contains(@class, "def-block")]'):
-            sense = SenseItem()
-            
-            # 获取指导词
-            guide_word = self._clean_text(sense_block.xpath(
-                './/ancestor::div[contains(@class, "pr dsense")]/h3[contains(@class, "dsense_h")]'
-                '/span[contains(@class, "guideword dsense_gw")]/span/text()'
-            ).get(''))
-            if guide_word:
-                sense['guide_word'] = guide_word.strip('()').strip()
-            
-            # 获取定义
-            definitions = []
-            def_parts = sense_block.xpath('.//div[contains(@class, "ddef_d")]//text()').getall()
-            def_text = ' '.join([text.strip() for text in def_parts if text.strip()])
-            # if def_text:
-            definition = DefinitionItem(
-                definition=def_text,
-                def_translation=self._clean_text(''.join(
-                    sense_block.xpath(
-                        './/div[@class="def-body ddef_b"]//span[contains(@class, "dtrans-se") and not(contains(@class, "hdb"))]//text()').getall()
-                )),
-                level=self._clean_text(sense_block.xpath('.//span[contains(@class, "epp-xref")]/text()').get('')),
-                attribute=self._clean_text(''.join(
-                    sense_block.xpath(
-                        './/div[contains(@class, "ddef_h")]//span[contains(@class, "gram dgram")]/a//text()').getall()
-                )),
-                examples=[]
-            )
-
-            # 获取例句
-            for example in sense_block.xpath('.//div[contains(@class, "examp")]'):
-                ex = ExampleItem(
-                    text=self._clean_text(''.join(example.xpath('.//span[contains(@class, "eg")]//text()').getall())),
-                    translation=self._clean_text(example.xpath('.//span[contains(@class, "trans")]/text()').get(''))
-                )
-                if ex['text'] or ex['translation']:
-                    definition['examples'].append(dict(ex))
-
-            definitions.append(dict(definition))
-            
-            if definitions:
-                sense['definitions'] = definitions
-                
-            # 获取更多例句
-            more_examples = []
-            for more_example in sense_block.xpath('.//following-sibling::div[contains(@class, "daccord")][1]//ul[contains(@class, "hul-u")]//li'):
-                ex = ExampleItem(
-                    text=self._clean_text(''.join(more_example.xpath('.//text()').getall())),
-                    translation=''
-                )
-                if ex['text']:
-                    more_examples.append(dict(ex))
-            
-            if more_examples:
-                sense['more_examples'] = more_examples
-                
-            if sense.get('definitions') or sense.get('more_examples'):
-                senses.append(dict(sense))
-                
-        return senses
+    def page_persisted(self, request, spider):
+        """单词页的 item 都已落盘（或者内容没有变化），记录已处理的URL"""
+        self._mark_processed(request)
+        self._finish_chunk_request(request.meta.get('chunk_id'))
 
-    def _parse_phrases(self, item, pos_block, url):
-        """解析短语动词和习语"""
-        # 解析短语动词
-        phrasal_verbs = []
-        for phrasal_verb in pos_block.xpath('//div[contains(@class, "xref phrasal_verbs")]//div[contains(@class, "lcs")]//a'):
-            pv = PhraseItem(
-                text=self._clean_text(' '.join(phrasal_verb.xpath('.//text()').getall())),
-                link=urljoin(url, phrasal_verb.xpath('.//@href').get(''))
-            )
-            if pv['text']:
-                phrasal_verbs.append(dict(pv))
-        if phrasal_verbs:
-            item['phrasal_verbs'] = phrasal_verbs
-            
-        # 解析习语
-        idioms = []
-        for idiom in pos_block.xpath('//div[contains(@class, "xref idioms")]//div[contains(@class, "lcs")]//a'):
-            id = PhraseItem(
-                text=self._clean_text(' '.join(idiom.xpath('.//text()').getall())),
-                link=urljoin(url, idiom.xpath('.//@href').get(''))
-            )
-            if id['text']:
-                idioms.append(dict(id))
-        if idioms:
-            item['idioms'] = idioms
-
-    def _clean_text(self, text):
-        """清理文本"""
-        if not text:
-            return ''
-        return text.strip().rstrip('，；').strip()
+    def item_dropped(self, item, response, exception, spider):
+        """页面有 item 被丢弃，这个页面不会再发送 page_persisted，算作失败"""
+        if response is None or response.meta.get('item_dropped'):
+            return
+        response.meta['item_dropped'] = True
+        self._finish_chunk_request(response.meta.get('chunk_id'), failed=True)
 
     def errback_httpbin(self, failure):
         """处理请求错误"""
         url = failure.request.url
+        self._feed_done(failure.request.meta)
+        if failure.check(ContentUnchanged):
+            # 增量抓取时内容未变化的单词页，IncrementalMiddleware 已经发送 page_persisted
+            self.logger.debug(f'Unchanged: {url}')
+            return
         self.logger.error(f'Request failed: {url}')
+        self._finish_chunk_request(failure.request.meta.get('chunk_id'), failed=True)
 
 if __name__ == '__main__':
     # 获取项目设置
@@ -325,11 +312,14 @@ if __name__ == '__main__':
             'cambridge_dict.pipelines.DictionaryPipeline': 300,
         },
         'FEEDS': {
-            'output/cambridge_special_words_ja_parallel.json': {
+            # 批量输出按帧 gzip 压缩，不缩进，导入模块可直接读取 .json.gz
+            'output/cambridge_special_words_ja_parallel.json.gz': {
                 'format': 'json',
                 'encoding': 'utf-8',
-                'indent': 2,
+                'indent': None,
                 'overwrite': True,
+                'postprocessing': ['cambridge_dict.utils.compression.FramedCompressionPlugin'],
+                'framed_compression': 'gzip',
             },
         },
         'DOWNLOAD_TIMEOUT': 30,  # 设置下载超时
@@ -2,6 +2,42 @@
 Cambridge Dictionary Spider Utilities
 """
 
-from .spider_state import SpiderState
+from .spider_state import SpiderState, SpiderStateRouter
+from .archive import PageArchive
+from .compression import FramedCompressedFile, FramedCompressionPlugin, create_codec
+from .parse_pool import ParsePool
+from .bloom import BloomFilter, ScalableBloomFilter
+from .headwords import HeadwordCache
+from .frontier import (
+    FingerprintLog, FingerprintSet, SuccessFrontier, merge_fingerprint_logs, url_fingerprint
+)
+from .state_backends import (
+    JsonStateBackend, JournalStateBackend, SqliteStateBackend, create_state_backend
+)
+from .throttle import AdaptiveThrottle, AIMDController, TokenBucket
+from .priority import WordPriorities, load_word_priorities
+from .url_feed import UrlFeed, open_url_feeds
+from .validators import ContentUnchanged, ValidatorStore, content_hash
+from .writers import (
+    BackgroundLetterWriter, JsonArrayLetterWriter, JsonLinesLetterWriter, create_letter_writer,
+    merge_letter_outputs
+)
+from .work_queue import WorkQueue
 
-__all__ = ['SpiderState'] 
\ No newline at end of file
+__all__ = [
+    'SpiderState', 'SpiderStateRouter',
+    'PageArchive',
+    'FramedCompressedFile', 'FramedCompressionPlugin', 'create_codec',
+    'ParsePool',
+    'BloomFilter', 'ScalableBloomFilter',
+    'HeadwordCache',
+    'FingerprintLog', 'FingerprintSet', 'SuccessFrontier', 'merge_fingerprint_logs', 'url_fingerprint',
+    'JsonStateBackend', 'JournalStateBackend', 'SqliteStateBackend', 'create_state_backend',
+    'AdaptiveThrottle', 'AIMDController', 'TokenBucket',
+    'WordPriorities', 'load_word_priorities',
+    'UrlFeed', 'open_url_feeds',
+    'ContentUnchanged', 'ValidatorStore', 'content_hash',
+    'BackgroundLetterWriter', 'JsonArrayLetterWriter', 'JsonLinesLetterWriter',
+    'create_letter_writer', 'merge_letter_outputs',
+    'WorkQueue',
+]
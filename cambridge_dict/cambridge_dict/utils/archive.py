@@ -0,0 +1,257 @@
+"""
+原始页面归档
+
+抓取时把响应体压缩后追加写入分段文件，相同内容（按 sha256）只保存一次：
+    archive/segment-00001.dat   每个响应体压缩为一个独立的帧，依次追加
+    archive/archive.sqlite3     blobs: 内容哈希 -> (分段, 偏移, 长度)
+                                pages: URL -> 内容哈希、状态码、编码、爬虫、回调、字母、抓取时间
+
+写入先在内存中攒批，满 batch_size 条或超过 flush_interval 秒后一次写入分段文件、fsync，
+再在一个事务中写入索引，索引中出现的记录在分段文件中一定是完整的。
+崩溃后分段文件末尾多出的数据在下次打开时按索引截掉。
+修改解析逻辑后可以从归档中重新解析，不需要重新下载页面。
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from datetime import datetime
+from urllib.request import pathname2url
+
+from .compression import create_codec
+
+SEGMENT_NAME = 'segment-{:05d}.dat'
+
+
+class PageArchive:
+    """内容寻址的页面归档"""
+
+    def __init__(self, archive_dir, compression='gzip', compression_level=None,
+                 segment_size=256 * 1024 * 1024, batch_size=100, flush_interval=5.0, readonly=False):
+        self.archive_dir = archive_dir
+        self.readonly = readonly
+        self.codec = create_codec(compression, compression_level)
+        self.segment_size = segment_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        db_path = os.path.join(archive_dir, 'archive.sqlite3')
+        # 已归档的内容哈希，用于去重（只读时不需要，不加载）
+        self.hashes = set()
+        if readonly:
+            # 只读打开：不创建目录和表、不修改日志模式，归档不存在时直接报错
+            if not os.path.exists(db_path):
+                raise FileNotFoundError(f"Archive not found: {db_path}")
+            self.conn = sqlite3.connect(f'file:{pathname2url(os.path.abspath(db_path))}?mode=ro', uri=True)
+        else:
+            os.makedirs(archive_dir, exist_ok=True)
+            self.conn = sqlite3.connect(db_path)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self._create_tables()
+            self.hashes = {row[0] for row in self.conn.execute('SELECT hash FROM blobs')}
+
+        self.pending_blobs = {}
+        self.pending_pages = []
+        self._last_flush = time.monotonic()
+        self.segment = None
+        self.segment_file = None
+        if not readonly:
+            self._open_segment()
+
+    def _create_tables(self):
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                raw_length INTEGER NOT NULL,
+                codec TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                encoding TEXT,
+                spider TEXT,
+                callback TEXT,
+                letter TEXT,
+                fetched_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_spider_callback
+                ON pages (spider, callback, letter);
+        ''')
+        self.conn.commit()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.archive_dir, SEGMENT_NAME.format(segment))
+
+    def _open_segment(self):
+        """打开最后一个分段继续追加，先按索引截掉崩溃时写了一半的数据"""
+        row = self.conn.execute(
+            'SELECT segment, MAX(offset + length) FROM blobs GROUP BY segment ORDER BY segment DESC LIMIT 1'
+        ).fetchone()
+        segment, end = (row[0], row[1]) if row else (1, 0)
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) > end:
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+        if end >= self.segment_size:
+            segment, path = segment + 1, self._segment_path(segment + 1)
+        self.segment = segment
+        self.segment_file = open(path, 'ab')
+
+    def __contains__(self, body_hash):
+        if self.readonly:
+            return self.conn.execute('SELECT 1 FROM blobs WHERE hash = ?', (body_hash,)).fetchone() is not None
+        return body_hash in self.hashes or body_hash in self.pending_blobs
+
+    @staticmethod
+    def content_hash(body):
+        return hashlib.sha256(body).hexdigest()
+
+    def add(self, url, body, status=200, encoding=None, spider=None, callback=None, letter=None):
+        """归档一个页面，返回内容哈希；内容已存在时只更新 URL 索引"""
+        body_hash = self.content_hash(body)
+        is_new = body_hash not in self
+        if is_new:
+            self.pending_blobs[body_hash] = body
+        self.pending_pages.append((
+            url, body_hash, status, encoding, spider, callback, letter,
+            datetime.now().isoformat(timespec='seconds'),
+        ))
+        if (len(self.pending_pages) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+        return body_hash, is_new
+
+    def flush(self):
+        if not self.pending_pages:
+            self._last_flush = time.monotonic()
+            return
+        blob_rows = []
+        for body_hash, body in self.pending_blobs.items():
+            if self.segment_file.tell() >= self.segment_size:
+                self._rotate()
+            data = self.codec.compress(body)
+            offset = self.segment_file.tell()
+            self.segment_file.write(data)
+            blob_rows.append((body_hash, self.segment, offset, len(data), len(body), self.codec.name))
+        # 数据落盘后再提交索引
+        self.segment_file.flush()
+        os.fsync(self.segment_file.fileno())
+
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO blobs (hash, segment, offset, length, raw_length, codec) '
+                'VALUES (?, ?, ?, ?, ?, ?)', blob_rows
+            )
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO pages '
+                '(url, hash, status, encoding, spider, callback, letter, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', self.pending_pages
+            )
+        self.hashes.update(self.pending_blobs)
+        self.pending_blobs = {}
+        self.pending_pages = []
+        self._last_flush = time.monotonic()
+
+    def _rotate(self):
+        self.segment_file.flush()
+        os.fsync(self.segment_file.fileno())
+        self.segment_file.close()
+        self.segment += 1
+        self.segment_file = open(self._segment_path(self.segment), 'ab')
+
+    def read_blob(self, body_hash):
+        """按内容哈希读取响应体"""
+        if body_hash in self.pending_blobs:
+            return self.pending_blobs[body_hash]
+        row = self.conn.execute(
+            'SELECT segment, offset, length, codec FROM blobs WHERE hash = ?', (body_hash,)
+        ).fetchone()
+        if row is None:
+            return None
+        segment, offset, length, codec = row
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        return create_codec(codec).decompress(data)
+
+    def get(self, url):
+        """读取某个 URL 最近一次归档的页面，返回 (页面信息, 响应体)"""
+        row = self.conn.execute(
+            'SELECT url, hash, status, encoding, spider, callback, letter, fetched_at '
+            'FROM pages WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        page = self._page_dict(row)
+        return page, self.read_blob(page['hash'])
+
+    @staticmethod
+    def _page_dict(row):
+        keys = ('url', 'hash', 'status', 'encoding', 'spider', 'callback', 'letter', 'fetched_at')
+        return dict(zip(keys, row))
+
+    def _query_pages(self, spider=None, callback=None, letter=None, status=None):
+        """按分段文件中的位置排序查询页面，返回 (页面信息, 分段, 偏移, 长度, 压缩方式)"""
+        self.flush()
+        conditions, params = [], []
+        for column, value in (('p.spider', spider), ('p.callback', callback),
+                              ('p.letter', letter), ('p.status', status)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        sql = ('SELECT p.url, p.hash, p.status, p.encoding, p.spider, p.callback, p.letter, p.fetched_at, '
+               'b.segment, b.offset, b.length, b.codec FROM pages p JOIN blobs b ON b.hash = p.hash')
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY b.segment, b.offset'
+        for row in self.conn.execute(sql, params).fetchall():
+            yield (self._page_dict(row[:8]),) + tuple(row[8:])
+
+    def iter_page_info(self, spider=None, callback=None, letter=None, status=None):
+        """遍历页面信息（不读取响应体），顺序与分段文件中的位置一致"""
+        for page, *_ in self._query_pages(spider, callback, letter, status):
+            yield page
+
+    def iter_pages(self, spider=None, callback=None, letter=None, status=None):
+        """按分段文件中的顺序遍历归档页面，返回 (页面信息, 响应体)
+
+        顺序读取分段文件，每个分段只打开一次。
+        """
+        current_segment, f = None, None
+        codecs = {}
+        try:
+            for page, segment, offset, length, codec in self._query_pages(spider, callback, letter, status):
+                if segment != current_segment:
+                    if f is not None:
+                        f.close()
+                    f = open(self._segment_path(segment), 'rb')
+                    current_segment = segment
+                if codec not in codecs:
+                    codecs[codec] = create_codec(codec)
+                f.seek(offset)
+                yield page, codecs[codec].decompress(f.read(length))
+        finally:
+            if f is not None:
+                f.close()
+
+    def count(self):
+        self.flush()
+        pages = self.conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+        if self.readonly:
+            return pages, self.conn.execute('SELECT COUNT(*) FROM blobs').fetchone()[0]
+        return pages, len(self.hashes)
+
+    def close(self):
+        if self.conn is None:
+            return
+        if self.segment_file is not None:
+            self.flush()
+            self.segment_file.close()
+            self.segment_file = None
+        self.conn.close()
+        self.conn = None
@@ -0,0 +1,122 @@
+"""
+可扩容的 Bloom filter
+
+按 64 位 URL 指纹（frontier.url_fingerprint）判断是否出现过，每个元素约占
+-ln(p) / ln(2)^2 位（误判率 1% 时约 1.2 字节），几百万个 URL 只需要几 MB 内存。
+
+容量用完后追加一个容量翻倍、误判率减半的新过滤器（Scalable Bloom Filter），
+总误判率不超过初始误判率的两倍，不需要预先知道 URL 总数。
+位置由指纹的高低 32 位做双重哈希得到，所以可以从保存的指纹重新构建。
+
+文件格式（先写临时文件再原子替换）：
+    头部      b'CDBF' + 版本(B) + 过滤器个数(I)
+    每个过滤器 容量(Q) + 误判率(d) + 元素数(Q) + 位数(Q) + 哈希个数(I) + 位数组
+"""
+
+import math
+import os
+import struct
+
+_MAGIC = b'CDBF'
+_VERSION = 1
+_HEADER = struct.Struct('<4sBI')
+_FILTER_HEADER = struct.Struct('<QdQQI')
+_MASK32 = 0xFFFFFFFF
+
+
+class BloomFilter:
+    """固定容量的 Bloom filter"""
+
+    def __init__(self, capacity, error_rate, num_bits=None, num_hashes=None, bits=None, count=0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = num_bits or max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = num_hashes or max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, fingerprint):
+        h1 = fingerprint & _MASK32
+        h2 = (fingerprint >> 32) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, fingerprint):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(fingerprint))
+
+    def add(self, fingerprint):
+        bits = self.bits
+        for pos in self._positions(fingerprint):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """容量不够时自动追加新过滤器的 Bloom filter"""
+
+    def __init__(self, capacity=1000000, error_rate=0.01, growth=2, tightening=0.5):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+
+    def __contains__(self, fingerprint):
+        return any(fingerprint in f for f in self.filters)
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    def add(self, fingerprint):
+        if not self.filters or self.filters[-1].full:
+            self._grow()
+        self.filters[-1].add(fingerprint)
+
+    def _grow(self):
+        n = len(self.filters)
+        self.filters.append(BloomFilter(
+            self.capacity * self.growth ** n,
+            # 第一个过滤器占总误判率的一半，之后每个减半
+            self.error_rate * (1 - self.tightening) * self.tightening ** n,
+        ))
+
+    @property
+    def nbytes(self):
+        return sum(len(f.bits) for f in self.filters)
+
+    def save(self, path):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(self.filters)))
+            for bf in self.filters:
+                f.write(_FILTER_HEADER.pack(bf.capacity, bf.error_rate, bf.count, bf.num_bits, bf.num_hashes))
+                f.write(bf.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, capacity=1000000, error_rate=0.01):
+        """读取保存的过滤器，文件不存在或已损坏时返回 None"""
+        if not os.path.exists(path):
+            return None
+        bloom = cls(capacity, error_rate)
+        try:
+            with open(path, 'rb') as f:
+                magic, version, num_filters = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or version != _VERSION:
+                    return None
+                for _ in range(num_filters):
+                    cap, rate, count, num_bits, num_hashes = _FILTER_HEADER.unpack(f.read(_FILTER_HEADER.size))
+                    bits = bytearray(f.read((num_bits + 7) // 8))
+                    if len(bits) != (num_bits + 7) // 8:
+                        return None
+                    bloom.filters.append(BloomFilter(cap, rate, num_bits, num_hashes, bits, count))
+        except struct.error:
+            return None
+        return bloom
@@ -0,0 +1,274 @@
+"""
+分帧压缩输出
+
+数据按帧压缩：每积累 frame_size 字节的未压缩数据（只在行边界切分）就压缩成一个独立的帧，
+追加到文件末尾。多个 gzip member / zstd frame 直接拼接仍然是合法的 .gz / .zst 文件，
+gzip、zstd 命令行和导入模块都可以直接流式解压。
+
+每个压缩文件旁边有一个 .idx 索引文件，每帧一行：
+    压缩后偏移<TAB>压缩后长度<TAB>未压缩偏移<TAB>未压缩长度
+借助索引可以只解压需要的那一帧，崩溃后也可以把数据文件截断到最后一个完整帧。
+
+帧只在积累满 frame_size、轮转和关闭时结束，定期 fsync 不会切出很小的帧。还没有
+压缩的数据在 fsync 时追加到未压缩的 .tail 文件（第一行是这些数据的未压缩偏移），
+重新打开时放回缓冲区；帧结束后清空。崩溃在写完帧之后、清空 .tail 之前时，
+.tail 的偏移与索引对不上，直接丢弃，不会重复写入。
+"""
+
+import gzip
+import os
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCodec:
+    name = 'gzip'
+    suffix = '.gz'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def decompress(self, data):
+        return gzip.decompress(data)
+
+
+class ZstdCodec:
+    name = 'zstd'
+    suffix = '.zst'
+
+    def __init__(self, level=3):
+        if zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        self.level = level
+        self.compressor = zstandard.ZstdCompressor(level=level, write_content_size=True)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def decompress(self, data):
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+CODECS = {
+    GzipCodec.name: GzipCodec,
+    ZstdCodec.name: ZstdCodec,
+}
+
+
+def create_codec(name, level=None):
+    """根据名称创建压缩编码器"""
+    try:
+        codec_cls = CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown compression: {name}")
+    return codec_cls() if level is None else codec_cls(level=level)
+
+
+def index_path(path):
+    return path + '.idx'
+
+
+def tail_path(path):
+    return path + '.tail'
+
+
+def codec_for_path(path):
+    """根据文件后缀选择压缩编码器，不是压缩文件时返回 None"""
+    for codec_cls in CODECS.values():
+        if path.endswith(codec_cls.suffix):
+            return codec_cls()
+    return None
+
+
+def read_frame_index(path):
+    """读取帧索引，返回 [(压缩偏移, 压缩长度, 未压缩偏移, 未压缩长度), ...]"""
+    frames = []
+    idx = index_path(path)
+    if not os.path.exists(idx):
+        return frames
+    with open(idx, 'r', encoding='ascii') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            frames.append(tuple(int(v) for v in line.split('\t')))
+    return frames
+
+
+def read_frame(path, frame, codec):
+    """按索引读取并解压单个帧"""
+    offset, length = frame[0], frame[1]
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return codec.decompress(f.read(length))
+
+
+class FramedCompressedFile:
+    """追加写的分帧压缩文件，接口与 _LetterFile 相同"""
+
+    def __init__(self, path, codec, frame_size=1024 * 1024):
+        self.path = path
+        self.codec = codec
+        self.frame_size = frame_size
+        self.buffer = []
+        self.buffered = 0
+        self._recover()
+        self.file = open(path, 'ab')
+        self.index_file = open(index_path(path), 'a', encoding='ascii')
+        self.size = self.file.tell()
+        self.raw_size = self._raw_size
+        self._recover_tail()
+        self.last_fsync = time.monotonic()
+
+    def _recover(self):
+        """以索引为准：截掉最后一个完整帧之后的数据和不完整的索引行"""
+        self._raw_size = 0
+        idx = index_path(self.path)
+        if not os.path.exists(idx):
+            return
+        frames = read_frame_index(self.path)
+        if frames:
+            self._raw_size = frames[-1][2] + frames[-1][3]
+        end = frames[-1][0] + frames[-1][1] if frames else 0
+        if os.path.exists(self.path) and os.path.getsize(self.path) != end:
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+        with open(idx, 'w', encoding='ascii') as f:
+            f.writelines('\t'.join(str(v) for v in frame) + '\n' for frame in frames)
+
+    def _recover_tail(self):
+        """把上次 fsync 过但还没有压缩的数据放回缓冲区"""
+        tail = tail_path(self.path)
+        data = b''
+        if os.path.exists(tail):
+            with open(tail, 'rb') as f:
+                header = f.readline()
+                data = f.read()
+            try:
+                offset = int(header)
+            except ValueError:
+                offset = None
+            if offset != self.raw_size:
+                # 这些数据已经在最后一帧中（或者是无效的 .tail）
+                data = b''
+            # 最后一行可能只写了一半
+            data = data[:data.rfind(b'\n') + 1]
+        self.tail_file = open(tail, 'wb')
+        self._reset_tail()
+        if data:
+            self.write(data)
+            self.sync()
+
+    def _reset_tail(self):
+        self.tail_file.seek(0)
+        self.tail_file.truncate()
+        self.tail_file.write(f"{self.raw_size}\n".encode('ascii'))
+        self.tail_file.flush()
+        # 缓冲区中已经写入 .tail 的条数
+        self.tail_written = 0
+
+    def write(self, data):
+        # 调用方每次写入的都是完整的行，帧只会在行边界切分
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= self.frame_size:
+            self._end_frame()
+
+    def _end_frame(self):
+        if not self.buffered:
+            return
+        raw = b''.join(self.buffer)
+        frame = self.codec.compress(raw)
+        self.file.write(frame)
+        self.file.flush()
+        # 先写数据再写索引，索引中出现的帧一定是完整的
+        self.index_file.write(f"{self.size}\t{len(frame)}\t{self.raw_size}\t{len(raw)}\n")
+        self.index_file.flush()
+        self.size += len(frame)
+        self.raw_size += len(raw)
+        self.buffer = []
+        self.buffered = 0
+        self._reset_tail()
+
+    def sync(self):
+        """fsync 已经结束的帧和缓冲区中还没有压缩的数据（写入 .tail），不结束当前帧"""
+        self.tail_file.writelines(self.buffer[self.tail_written:])
+        self.tail_written = len(self.buffer)
+        self.tail_file.flush()
+        os.fsync(self.file.fileno())
+        os.fsync(self.index_file.fileno())
+        os.fsync(self.tail_file.fileno())
+        self.last_fsync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self._end_frame()
+            os.fsync(self.file.fileno())
+            os.fsync(self.index_file.fileno())
+            self.file.close()
+            self.index_file.close()
+            self.tail_file.close()
+            os.remove(tail_path(self.path))
+
+
+class FramedCompressionPlugin:
+    """FEEDS 的 postprocessing 插件，输出分帧压缩的文件
+
+    feed 选项：
+        framed_compression: 'gzip'（默认）或 'zstd'
+        framed_compression_level: 压缩级别
+        framed_frame_size: 每帧的未压缩字节数
+    feed 导出器按条目写入，帧在 write() 调用之间切分，不会切开一个条目。
+
+    输出到本地文件（file:// 或普通路径）时同样生成 .idx 帧索引；S3、FTP 等存储
+    写入的是临时文件，没有索引，只能整体流式解压。
+    """
+
+    def __init__(self, file, feed_options):
+        self.file = file
+        self.codec = create_codec(
+            feed_options.get('framed_compression', 'gzip'),
+            feed_options.get('framed_compression_level'),
+        )
+        self.frame_size = feed_options.get('framed_frame_size', 1024 * 1024)
+        self.buffer = []
+        self.buffered = 0
+        self.index_file = None
+        path = getattr(file, 'name', None)
+        if isinstance(path, str) and os.path.isfile(path):
+            # 追加到已有文件（overwrite=False）时接着已有的帧编号
+            frames = read_frame_index(path)
+            self.size = file.tell()
+            self.raw_size = frames[-1][2] + frames[-1][3] if frames else 0
+            self.index_file = open(index_path(path), 'a' if self.size else 'w', encoding='ascii')
+
+    def write(self, data):
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= self.frame_size:
+            self._end_frame()
+        return len(data)
+
+    def _end_frame(self):
+        if self.buffered:
+            raw = b''.join(self.buffer)
+            frame = self.codec.compress(raw)
+            self.file.write(frame)
+            if self.index_file is not None:
+                self.index_file.write(f"{self.size}\t{len(frame)}\t{self.raw_size}\t{len(raw)}\n")
+                self.size += len(frame)
+                self.raw_size += len(raw)
+            self.buffer = []
+            self.buffered = 0
+
+    def close(self):
+        self._end_frame()
+        self.file.close()
+        if self.index_file is not None:
+            self.index_file.close()
@@ -0,0 +1,258 @@
+"""
+已完成URL记录
+
+SpiderState 只记录失败的URL，断点续传时无法知道哪些页面已经抓完。
+这里用 64 位指纹记录已完成的URL（三个层级都记录），磁盘上是追加写的定长记录，
+内存中是紧凑的有序整数数组（FingerprintSet）；索引页只有在它的所有子页面都完成后才算完成，
+这样续爬时可以整页跳过已经抓完的字母和范围页。
+"""
+
+import hashlib
+import heapq
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+
+FINGERPRINT_SIZE = 8
+_FINGERPRINT_STRUCT = struct.Struct('<Q')
+
+
+def url_fingerprint(url, level=''):
+    """计算 URL 的 64 位指纹，不同层级的同一 URL 指纹不同"""
+    digest = hashlib.blake2b(f'{level}:{url}'.encode('utf-8'), digest_size=FINGERPRINT_SIZE).digest()
+    return _FINGERPRINT_STRUCT.unpack(digest)[0]
+
+
+def _unique_sorted(values):
+    """有序序列去重"""
+    last = None
+    for value in values:
+        if value != last:
+            yield value
+            last = value
+
+
+def read_fingerprints(path):
+    """读取指纹文件中完整的记录，返回 array('Q')（不修改文件）"""
+    fingerprints = array('Q')
+    if not os.path.exists(path):
+        return fingerprints
+    with open(path, 'rb') as f:
+        data = f.read()
+    fingerprints.frombytes(data[:len(data) - len(data) % FINGERPRINT_SIZE])
+    if sys.byteorder == 'big':
+        fingerprints.byteswap()
+    return fingerprints
+
+
+class FingerprintSet:
+    """紧凑的 64 位指纹集合
+
+    大部分指纹保存在有序的 array('Q') 中（每个 8 字节，二分查找），
+    新增的指纹先放在普通 set 里，数量超过有序部分的 1/8 时归并进数组，
+    百万级 URL 只占十几 MB 内存。
+    """
+
+    def __init__(self, fingerprints=(), min_merge=65536):
+        self.min_merge = min_merge
+        self._sorted = array('Q')
+        self._recent = set()
+        self.update(fingerprints)
+
+    def __contains__(self, fingerprint):
+        if fingerprint in self._recent:
+            return True
+        i = bisect_left(self._sorted, fingerprint)
+        return i < len(self._sorted) and self._sorted[i] == fingerprint
+
+    def __len__(self):
+        return len(self._sorted) + len(self._recent)
+
+    def __iter__(self):
+        return heapq.merge(self._sorted, sorted(self._recent))
+
+    def add(self, fingerprint):
+        """添加指纹，返回是否为新指纹"""
+        if fingerprint in self:
+            return False
+        self._recent.add(fingerprint)
+        if len(self._recent) >= max(self.min_merge, len(self._sorted) // 8):
+            self._merge_recent()
+        return True
+
+    def update(self, fingerprints):
+        """批量添加（加载文件时使用），一次排序归并"""
+        incoming = array('Q', fingerprints)
+        if not incoming:
+            return
+        incoming = sorted(incoming)
+        self._sorted = array('Q', _unique_sorted(heapq.merge(self._sorted, incoming)))
+        if self._recent:
+            self._merge_recent()
+
+    def _merge_recent(self):
+        self._sorted = array('Q', _unique_sorted(heapq.merge(self._sorted, sorted(self._recent))))
+        self._recent = set()
+
+
+class FingerprintLog:
+    """追加写的指纹集合
+
+    文件由连续的 8 字节小端整数组成，崩溃时末尾不完整的记录会在加载时截掉。
+    shared_paths 中的其他指纹文件（例如其他分片的记录）只读取、不修改，
+    它们的指纹也算在集合中，但不会写入本文件。
+    """
+
+    def __init__(self, path, fsync_interval=5.0, shared_paths=()):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.fingerprints = FingerprintSet()
+        self._load()
+        for shared_path in shared_paths:
+            if os.path.abspath(shared_path) != os.path.abspath(path):
+                self.fingerprints.update(read_fingerprints(shared_path))
+        self._file = open(path, 'ab')
+        self._last_fsync = time.monotonic()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        valid_size = os.path.getsize(self.path)
+        valid_size -= valid_size % FINGERPRINT_SIZE
+        if valid_size != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+        self.fingerprints.update(read_fingerprints(self.path))
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self.fingerprints
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def add(self, fingerprint):
+        """添加指纹，返回是否为新指纹"""
+        if not self.fingerprints.add(fingerprint):
+            return False
+        self._file.write(_FINGERPRINT_STRUCT.pack(fingerprint))
+        self._file.flush()
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+        return True
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+def merge_fingerprint_logs(paths, target):
+    """把多个指纹文件合并为一个排好序、无重复的文件，返回指纹数
+
+    先写临时文件再原子替换，target 也可以是 paths 中的一个。
+    合并时这些文件不能有爬虫正在写入。
+    """
+    merged = FingerprintSet()
+    for path in paths:
+        merged.update(read_fingerprints(path))
+    data = array('Q', merged)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    tmp_path = f'{target}.tmp'
+    with open(tmp_path, 'wb') as f:
+        data.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, target)
+    return len(data)
+
+
+class SuccessFrontier:
+    """三个层级的已完成URL记录，以及索引页的完成度跟踪"""
+
+    def __init__(self, state_dir, filename='completed_urls.fp'):
+        self.log = FingerprintLog(os.path.join(state_dir, filename))
+        # 父页面指纹 -> (url, level, 未完成子页面指纹集合)
+        self.pending = {}
+        # 子页面指纹 -> 父页面指纹列表
+        self.parents = {}
+
+    def __len__(self):
+        return len(self.log)
+
+    def is_complete(self, url, level):
+        return url_fingerprint(url, level) in self.log
+
+    def register_children(self, parent_url, parent_level, child_urls, child_level):
+        """登记索引页的子页面，返回尚未完成的子页面URL
+
+        返回空列表时说明索引页已经可以标记为完成，由调用方调用 mark_complete。
+        """
+        parent_fp = url_fingerprint(parent_url, parent_level)
+        remaining = set()
+        pending_urls = []
+        for url in child_urls:
+            child_fp = url_fingerprint(url, child_level)
+            if child_fp in self.log or child_fp in remaining:
+                continue
+            remaining.add(child_fp)
+            pending_urls.append(url)
+            self.parents.setdefault(child_fp, []).append(parent_fp)
+
+        if remaining:
+            self.pending[parent_fp] = (parent_url, parent_level, remaining)
+        return pending_urls
+
+    def mark_complete(self, url, level):
+        """标记URL完成，并向上传播到所有子页面都已完成的索引页
+
+        返回本次新完成的 (url, level) 列表
+        """
+        completed = []
+        stack = [(url, level, url_fingerprint(url, level))]
+        while stack:
+            current_url, current_level, fp = stack.pop()
+            if not self.log.add(fp):
+                continue
+            completed.append((current_url, current_level))
+            self.pending.pop(fp, None)
+            for parent_fp in self.parents.pop(fp, ()):
+                entry = self.pending.get(parent_fp)
+                if entry is None:
+                    continue
+                parent_url, parent_level, remaining = entry
+                remaining.discard(fp)
+                if not remaining:
+                    stack.append((parent_url, parent_level, parent_fp))
+        return completed
+
+    def flush(self):
+        self.log.flush()
+
+    def close(self):
+        self.log.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='合并多个已处理URL指纹文件（合并前先停止相关爬虫）')
+    parser.add_argument('target', help='输出文件，可以是输入文件之一')
+    parser.add_argument('paths', nargs='+', help='要合并的 .fp 文件')
+    args = parser.parse_args()
+    count = merge_fingerprint_logs(args.paths, args.target)
+    for path in args.paths:
+        if os.path.abspath(path) != os.path.abspath(args.target):
+            os.remove(path)
+    print(f"merged {len(args.paths)} files into {args.target}: {count} fingerprints")
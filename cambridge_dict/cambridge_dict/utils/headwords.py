@@ -0,0 +1,135 @@
+"""
+各词典版本共用的词头列表
+
+各双语词典（英汉、英越、英日……）的英文词头基本相同，浏览页遍历
+（字母页 -> 范围页 -> 单词列表页）只需要在一个版本上做一次，其他版本直接
+用 /dictionary/<版本路径>/<slug> 请求单词页：
+    headwords:  slug -> 字母、最先发现它的版本、发现时间
+    missing:    (slug, 版本) -> 该版本没有这个词头（404 或没有词条内容），以后不再请求
+    discovered: 版本 -> 浏览页遍历完成的时间
+
+只在某个版本中存在的词头需要在该版本上再遍历一次浏览页来补齐。
+新增的词头在内存中攒批，满 batch_size 条或超过 flush_interval 秒后在一个事务中提交。
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+
+class HeadwordCache:
+    """词头列表"""
+
+    def __init__(self, path, batch_size=1000, flush_interval=5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS headwords (
+                slug TEXT PRIMARY KEY,
+                letter TEXT,
+                edition TEXT,
+                found_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS missing (
+                slug TEXT NOT NULL,
+                edition TEXT NOT NULL,
+                checked_at TEXT,
+                PRIMARY KEY (slug, edition)
+            );
+            CREATE TABLE IF NOT EXISTS discovered (
+                edition TEXT PRIMARY KEY,
+                finished_at TEXT
+            );
+        ''')
+        self.conn.commit()
+        # 已知词头，判断新词头时不需要查询数据库
+        self.slugs = {row[0] for row in self.conn.execute('SELECT slug FROM headwords')}
+        self.pending = []
+        self.pending_missing = []
+        self._last_flush = time.monotonic()
+
+    def __len__(self):
+        return len(self.slugs)
+
+    def __contains__(self, slug):
+        return slug in self.slugs
+
+    def add(self, slug, letter, edition):
+        """记录词头，返回是否是新词头"""
+        if slug in self.slugs:
+            return False
+        self.slugs.add(slug)
+        self.pending.append((slug, letter, edition, datetime.now().isoformat(timespec='seconds')))
+        self._maybe_flush()
+        return True
+
+    def mark_missing(self, slug, edition):
+        """记录某个版本没有该词头"""
+        self.pending_missing.append((slug, edition, datetime.now().isoformat(timespec='seconds')))
+        self._maybe_flush()
+
+    def iter_headwords(self, edition=None):
+        """按字母顺序返回 (slug, 字母)；指定版本时跳过该版本没有的词头"""
+        self.flush()
+        if edition is None:
+            rows = self.conn.execute('SELECT slug, letter FROM headwords ORDER BY letter, slug')
+        else:
+            rows = self.conn.execute(
+                'SELECT slug, letter FROM headwords WHERE slug NOT IN '
+                '(SELECT slug FROM missing WHERE edition = ?) ORDER BY letter, slug',
+                (edition,)
+            )
+        # 先取出全部结果，迭代过程中还会有新的写入
+        return iter(rows.fetchall())
+
+    def missing_slugs(self, edition):
+        """某个版本没有的词头"""
+        self.flush()
+        return {row[0] for row in self.conn.execute('SELECT slug FROM missing WHERE edition = ?', (edition,))}
+
+    def discovered_editions(self):
+        """已经完整遍历过浏览页的版本"""
+        return {row[0] for row in self.conn.execute('SELECT edition FROM discovered')}
+
+    def mark_discovered(self, edition):
+        """记录某个版本的浏览页遍历已经完成"""
+        self.flush()
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO discovered (edition, finished_at) VALUES (?, ?)',
+                (edition, datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def _maybe_flush(self):
+        if (len(self.pending) + len(self.pending_missing) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self.pending or self.pending_missing:
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO headwords (slug, letter, edition, found_at) VALUES (?, ?, ?, ?)',
+                    self.pending
+                )
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO missing (slug, edition, checked_at) VALUES (?, ?, ?)',
+                    self.pending_missing
+                )
+            self.pending = []
+            self.pending_missing = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self.conn is not None:
+            self.flush()
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,137 @@
+"""
+进程池解析
+
+单词详情页的解析是纯 CPU 计算，全部在 reactor 线程中执行时只能用到一个核。
+开启 PARSE_POOL_ENABLED 后，响应体交给 ProcessPoolExecutor 中的子进程解析，
+子进程返回普通 dict，通过 Deferred 交回 reactor 线程。
+
+- 同时在进程池中的页面数不超过 PARSE_POOL_MAX_IN_FLIGHT，超出的在 reactor 中排队，
+  避免大量响应体堆积在进程池队列里
+- 进程池不可用（创建失败、子进程崩溃）或单个页面在子进程中出错时，退回到当前进程解析
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from scrapy import signals
+from twisted.internet import defer
+
+from ..extraction import WordExtractor
+
+logger = logging.getLogger(__name__)
+
+# 子进程中按解析配置缓存的 WordExtractor（XPath 只编译一次）
+_worker_extractors = {}
+
+
+def _extract_in_worker(profile_name, body, url, letter, encoding):
+    extractor = _worker_extractors.get(profile_name)
+    if extractor is None:
+        extractor = _worker_extractors[profile_name] = WordExtractor(profile_name)
+    return extractor.extract_html(body, url, letter, encoding=encoding)
+
+
+class ParsePool:
+    """把单词详情页的解析放到进程池中执行"""
+
+    def __init__(self, max_workers=None, max_in_flight=None, start_method='spawn', stats=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.max_workers * 4
+        self.stats = stats
+        self.semaphore = defer.DeferredSemaphore(self.max_in_flight)
+        self.broken = False
+        try:
+            # 默认用 spawn：reactor 进程中有其他线程，fork 出的子进程可能继承被持有的锁
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(start_method),
+            )
+        except (OSError, ValueError) as e:
+            logger.warning(f"Parse pool unavailable, parsing in-process: {e}")
+            self.executor = None
+            self.broken = True
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """PARSE_POOL_ENABLED 未开启时返回 None"""
+        settings = crawler.settings
+        if not settings.getbool('PARSE_POOL_ENABLED'):
+            return None
+        pool = cls(
+            max_workers=settings.getint('PARSE_POOL_WORKERS') or None,
+            max_in_flight=settings.getint('PARSE_POOL_MAX_IN_FLIGHT') or None,
+            start_method=settings.get('PARSE_POOL_START_METHOD', 'spawn'),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(pool.close, signal=signals.spider_closed)
+        logger.info(f"Parse pool started: {pool.max_workers} workers, "
+                    f"{pool.max_in_flight} pages in flight")
+        return pool
+
+    def _inc_stat(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(f'parse_pool/{key}')
+
+    def extract(self, extractor, response, letter):
+        """解析单词详情页，返回结果为记录列表的 Deferred"""
+        if self.broken:
+            return defer.succeed(self._extract_local(extractor, response, letter))
+        return self.semaphore.run(self._submit, extractor, response, letter)
+
+    def _extract_local(self, extractor, response, letter):
+        self._inc_stat('local')
+        return extractor.extract_response(response, letter)
+
+    def _submit(self, extractor, response, letter):
+        if self.broken:
+            return self._extract_local(extractor, response, letter)
+        try:
+            future = self.executor.submit(
+                _extract_in_worker, extractor.profile.name,
+                response.body, response.url, letter, response.encoding,
+            )
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._mark_broken(e)
+            return self._extract_local(extractor, response, letter)
+
+        # 爬虫模块加载时 scrapy 还没有安装 reactor，不能在模块顶层导入
+        from twisted.internet import reactor
+
+        d = defer.Deferred()
+        future.add_done_callback(
+            lambda f: reactor.callFromThread(self._on_done, d, f, extractor, response, letter)
+        )
+        return d
+
+    def _on_done(self, d, future, extractor, response, letter):
+        try:
+            try:
+                records = future.result()
+            except BrokenProcessPool as e:
+                self._mark_broken(e)
+                records = self._extract_local(extractor, response, letter)
+            except Exception as e:
+                logger.warning(f"Parse pool failed on {response.url}, parsing in-process: {e!r}")
+                self._inc_stat('error')
+                records = self._extract_local(extractor, response, letter)
+            else:
+                self._inc_stat('remote')
+        except Exception:
+            # 本进程中解析也失败时把异常交给回调链，由 scrapy 记录
+            d.errback()
+        else:
+            d.callback(records)
+
+    def _mark_broken(self, error):
+        if not self.broken:
+            logger.error(f"Parse pool is broken, falling back to in-process parsing: {error!r}")
+            self.broken = True
+
+    def close(self, spider=None):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.broken = True
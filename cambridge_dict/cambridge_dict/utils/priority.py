@@ -0,0 +1,106 @@
+"""
+按词频 / CEFR 等级排列的抓取优先级
+
+词表文件每行一个单词，空行和 # 开头的行忽略，可以有用制表符或逗号分隔的其他列：
+- 某一列是 CEFR 等级（A1-C2）时按等级确定优先级
+- 否则按单词在文件中的顺序作为词频排名（第一行排名最高）
+多个词表的优先级取最高值，不在词表中的单词优先级为 0。
+
+Scrapy 的优先级队列为每个优先级值建一个子队列（使用 JOBDIR 时每个子队列是一个磁盘文件），
+所以排名按档位换算成少数几个优先级，而不是每个单词一个优先级。
+"""
+
+import re
+from urllib.parse import unquote, urlparse
+
+CEFR_PRIORITIES = {'A1': 60, 'A2': 50, 'B1': 40, 'B2': 30, 'C1': 20, 'C2': 10}
+# 词频排名分档：(排名上限, 优先级)
+FREQUENCY_TIERS = ((1000, 60), (3000, 50), (6000, 40), (10000, 30), (20000, 20), (50000, 10))
+# 浏览页（字母页、范围页、单词列表页）先于所有单词页抓取，尽早发现全部单词
+INDEX_PRIORITY = 100
+
+_CEFR_RE = re.compile(r'^(A1|A2|B1|B2|C1|C2)$', re.IGNORECASE)
+_SPLIT_RE = re.compile(r'[\t,]')
+
+
+def normalize_word(word):
+    """单词统一为单词页 URL 中的写法：小写，空格换成 -"""
+    return '-'.join(word.strip().lower().split())
+
+
+def word_from_url(url):
+    """单词页 URL 的最后一段"""
+    path = urlparse(url).path.rstrip('/')
+    return normalize_word(unquote(path.rsplit('/', 1)[-1]))
+
+
+def _frequency_priority(rank):
+    for limit, priority in FREQUENCY_TIERS:
+        if rank < limit:
+            return priority
+    return 0
+
+
+class WordPriorities:
+    """单词 -> 抓取优先级"""
+
+    def __init__(self):
+        self.priorities = {}
+
+    @classmethod
+    def from_files(cls, paths):
+        priorities = cls()
+        for path in paths:
+            priorities.load(path)
+        return priorities
+
+    def load(self, path):
+        """读取一个词表文件"""
+        rank = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                fields = [field.strip() for field in _SPLIT_RE.split(line)]
+                word = normalize_word(fields[0])
+                if not word:
+                    continue
+                level = next((field.upper() for field in fields[1:] if _CEFR_RE.match(field)), None)
+                if level:
+                    priority = CEFR_PRIORITIES[level]
+                else:
+                    priority = _frequency_priority(rank)
+                    rank += 1
+                if priority > self.priorities.get(word, 0):
+                    self.priorities[word] = priority
+
+    def __len__(self):
+        return len(self.priorities)
+
+    def priority(self, word):
+        return self.priorities.get(normalize_word(word), 0)
+
+    def priority_for_url(self, url):
+        return self.priorities.get(word_from_url(url), 0)
+
+    @property
+    def tiers(self):
+        """出现的优先级，从高到低，包括不在词表中的 0"""
+        return sorted(set(self.priorities.values()) | {0}, reverse=True)
+
+    def tier_counts(self):
+        counts = {}
+        for priority in self.priorities.values():
+            counts[priority] = counts.get(priority, 0) + 1
+        return dict(sorted(counts.items(), reverse=True))
+
+
+def load_word_priorities(value):
+    """按爬虫参数或 WORD_PRIORITY_FILES 设置加载词表（逗号分隔的路径或路径列表），没有词表时返回 None"""
+    if isinstance(value, str):
+        value = value.split(',')
+    paths = [path.strip() for path in value or () if path and path.strip()]
+    if not paths:
+        return None
+    return WordPriorities.from_files(paths)
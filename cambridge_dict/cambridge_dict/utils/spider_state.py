@@ -1,13 +1,18 @@
-import json
 import os
 from datetime import datetime
 
+from .frontier import SuccessFrontier
+from .state_backends import create_state_backend
+
+# 算作完成的状态
+DONE_STATUSES = ('success', 'empty')
+
 class SpiderState:
-    def __init__(self, state_dir='spider_state'):
+    def __init__(self, state_dir='spider_state', backend='journal', **backend_options):
         self.state_dir = state_dir
-        self.url_state_file = os.path.join(state_dir, 'failed_urls.json')
-        self.progress_file = os.path.join(state_dir, 'progress.json')
         self._ensure_state_dir()
+        self.backend = create_state_backend(backend, state_dir, **backend_options)
+        self.frontier = SuccessFrontier(state_dir)
         self._load_state()
 
     def _ensure_state_dir(self):
@@ -22,23 +27,9 @@ class SpiderState:
             os.makedirs(self.state_dir)
 
     def _load_state(self):
-        """加载状态数据"""
-        # 加载失败URL状态
-        if os.path.exists(self.url_state_file):
-            with open(self.url_state_file, 'r', encoding='utf-8') as f:
-                self.url_state = json.load(f)
-        else:
-            self.url_state = {
-                'first_level': {},
-                'second_level': {},
-                'word_level': {}
-            }
-
-        # 加载进度信息
-        if os.path.exists(self.progress_file):
-            with open(self.progress_file, 'r', encoding='utf-8') as f:
-                self.progress = json.load(f)
-        else:
+        """加载进度信息，URL 状态由后端按需读取"""
+        self.progress = self.backend.load_progress()
+        if self.progress is None:
             self.progress = {
                 'total_words': 0,
                 'processed_words': 0,
@@ -49,35 +40,58 @@ class SpiderState:
 
     def save_state(self):
         """保存状态数据"""
-        with open(self.url_state_file, 'w', encoding='utf-8') as f:
-            json.dump(self.url_state, f, ensure_ascii=False, indent=2)
-
         self.progress['last_update'] = datetime.now().isoformat()
-        with open(self.progress_file, 'w', encoding='utf-8') as f:
-            json.dump(self.progress, f, ensure_ascii=False, indent=2)
+        self.backend.save_progress(self.progress)
+        self.backend.flush()
+        self.frontier.flush()
 
     def mark_url_status(self, url, level, status='success', retry_count=0):
-        """标记URL状态，只记录失败状态"""
-        state_dict = self.url_state[f'{level}_level']
-        
-        if status == 'success':
-            # 如果请求成功，删除之前的失败记录（如果存在）
-            if url in state_dict:
-                del state_dict[url]
-        else:
-            # 只记录失败状态
-            state_dict[url] = {
+        """标记URL状态，失败状态记录到后端，成功状态记录到已完成集合
+
+        empty（页面没有内容）也是终止状态：记录到已完成集合，索引页可以随之完成，
+        同时在后端保留记录，可以用 iter_url_status(status='empty') 找出来重新抓取。
+        """
+        if status in DONE_STATUSES:
+            # 记录完成（可能连带索引页一起完成），并删除之前的失败记录（如果存在）
+            completed = self.frontier.mark_complete(url, level)
+            for completed_url, completed_level in completed:
+                self.backend.set_url(completed_url, completed_level, None)
+            if status == 'success' and not completed and self.backend.get_url(url, level):
+                # 之前记为 empty 的页面重新抓取成功
+                self.backend.set_url(url, level, None)
+        if status != 'success':
+            # 记录失败（或其他非成功的终止）状态
+            self.backend.set_url(url, level, {
                 'status': status,
                 'retry_count': retry_count,
                 'last_update': datetime.now().isoformat()
-            }
-        
-        # 只有状态发生变化时才保存
-        self.save_state()
+            })
 
     def get_url_status(self, url, level):
-        """获取URL状态，如果没有记录说明成功或未访问"""
-        return self.url_state[f'{level}_level'].get(url, {})
+        """获取URL状态，已完成返回 success，没有记录说明未访问"""
+        record = self.backend.get_url(url, level)
+        if record:
+            return record
+        if self.frontier.is_complete(url, level):
+            return {'status': 'success'}
+        return {}
+
+    def register_children(self, parent_url, parent_level, child_urls, child_level):
+        """登记索引页的子页面，返回还需要抓取的子页面URL
+
+        所有子页面完成后索引页自动标记为完成，续爬时整页跳过。
+        """
+        pending_urls = self.frontier.register_children(parent_url, parent_level, child_urls, child_level)
+        if not pending_urls:
+            self.mark_url_status(parent_url, parent_level, 'success')
+        return pending_urls
+
+    def iter_url_status(self, level=None, status=None, letter=None):
+        """遍历已记录的URL状态，返回 (url, level, record)
+
+        例如 iter_url_status('word', 'failed', 's') 返回字母 s 下所有失败的单词页
+        """
+        return self.backend.iter_urls(level=level, status=status, letter=letter)
 
     def update_progress(self, letter=None, processed_words=None, total_words=None):
         """更新进度信息"""
@@ -87,8 +101,66 @@ class SpiderState:
             self.progress['processed_words'] = processed_words
         if total_words is not None:
             self.progress['total_words'] = total_words
-        self.save_state()
+        self.progress['last_update'] = datetime.now().isoformat()
+        self.backend.save_progress(self.progress)
 
     def get_progress(self):
         """获取进度信息"""
-        return self.progress 
\ No newline at end of file
+        return self.progress
+
+    def for_url(self, url):
+        """URL 所属的状态（与 SpiderStateRouter 接口一致）"""
+        return self
+
+    def close(self):
+        """关闭状态后端，写入最终状态"""
+        self.progress['last_update'] = datetime.now().isoformat()
+        self.backend.save_progress(self.progress)
+        self.backend.close()
+        self.frontier.close()
+
+
+class SpiderStateRouter:
+    """多个词典版本的状态，按 URL 分发到对应版本的 SpiderState
+
+    接口与 SpiderState 中按 URL 操作的方法一致，供中间件和爬虫统一使用；
+    进度信息没有 URL，需要先用 for_url 取到对应版本的状态。
+    """
+
+    def __init__(self, states, resolve, default=None):
+        # 版本 -> SpiderState
+        self.states = states
+        # URL -> 版本，无法判断时返回 None
+        self.resolve = resolve
+        # 无法判断版本的 URL（例如重定向到英英词典的页面）记到默认版本
+        self.default = default
+
+    @property
+    def state_dir(self):
+        # 整个爬虫共用的文件（例如 URL 去重记录）放在默认版本的状态目录
+        return self.states[self.default].state_dir
+
+    def for_url(self, url):
+        key = self.resolve(url)
+        if key not in self.states:
+            key = self.default
+        if key not in self.states:
+            raise KeyError(f"No spider state for URL: {url}")
+        return self.states[key]
+
+    def mark_url_status(self, url, level, status='success', retry_count=0):
+        self.for_url(url).mark_url_status(url, level, status, retry_count)
+
+    def get_url_status(self, url, level):
+        return self.for_url(url).get_url_status(url, level)
+
+    def register_children(self, parent_url, parent_level, child_urls, child_level):
+        return self.for_url(parent_url).register_children(parent_url, parent_level, child_urls, child_level)
+
+    def save_state(self):
+        for state in self.states.values():
+            state.save_state()
+
+    def close(self):
+        for state in self.states.values():
+            state.close()
@@ -0,0 +1,398 @@
+"""
+爬虫状态存储后端
+
+SpiderState 只负责业务语义（失败记录、进度），具体的持久化方式由后端决定：
+- json: 原有方式，每次变更全量重写 failed_urls.json / progress.json
+- journal: 追加写日志 + 定期压缩快照，每次变更的 I/O 为 O(1)
+- sqlite: 本地 SQLite 文件，按层级/状态/字母建索引，批量提交，内存占用与状态规模无关
+"""
+
+import json
+import os
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+LEVELS = ('first', 'second', 'word')
+
+
+def empty_url_state():
+    """空的 URL 状态结构"""
+    return {f'{level}_level': {} for level in LEVELS}
+
+
+def atomic_write_json(path, data, indent=None):
+    """先写临时文件再替换，避免写到一半崩溃留下损坏的文件"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def url_letter(url):
+    """从URL中提取所属字母：索引页取路径中的字母段，单词页取单词首字母"""
+    segments = [seg for seg in urlsplit(url).path.split('/') if seg]
+    for marker in ('browse', 'dictionary'):
+        if marker in segments:
+            idx = segments.index(marker)
+            if len(segments) > idx + 2:
+                value = segments[idx + 2]
+                return value.lower() if marker == 'browse' else value[:1].lower()
+    return ''
+
+
+def load_json(path, default):
+    """读取 JSON 文件，不存在时返回默认值"""
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_journal_state(state_dir):
+    """读取 journal 后端的快照和日志，没有快照时读取旧的 JSON 状态文件
+
+    返回 (url_state, progress, 日志条数)
+    """
+    snapshot_file = os.path.join(state_dir, 'state_snapshot.json')
+    journal_file = os.path.join(state_dir, 'state.journal')
+    if os.path.exists(snapshot_file):
+        snapshot = load_json(snapshot_file, {})
+        url_state = empty_url_state()
+        url_state.update(snapshot.get('url_state', {}))
+        progress = snapshot.get('progress')
+    else:
+        legacy = JsonStateBackend(state_dir)
+        url_state = legacy.url_state
+        progress = legacy.load_progress()
+
+    entries = 0
+    if os.path.exists(journal_file):
+        with open(journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    # 崩溃时最后一行可能只写了一半（可能截断在多字节字符中间），直接忽略
+                    continue
+                entries += 1
+                if 'p' in entry:
+                    progress = entry['p']
+                    continue
+                state_dict = url_state[f"{entry['l']}_level"]
+                if entry.get('r') is None:
+                    state_dict.pop(entry['u'], None)
+                else:
+                    state_dict[entry['u']] = entry['r']
+    return url_state, progress, entries
+
+
+class JsonStateBackend:
+    """JSON 全量重写后端（兼容旧的状态目录）"""
+
+    name = 'json'
+
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        self.url_state_file = os.path.join(state_dir, 'failed_urls.json')
+        self.progress_file = os.path.join(state_dir, 'progress.json')
+        self.url_state = load_json(self.url_state_file, empty_url_state())
+
+    def load_progress(self):
+        return load_json(self.progress_file, None)
+
+    def get_url(self, url, level):
+        return self.url_state[f'{level}_level'].get(url)
+
+    def set_url(self, url, level, record):
+        """record 为 None 表示删除记录"""
+        state_dict = self.url_state[f'{level}_level']
+        if record is None:
+            if state_dict.pop(url, None) is None:
+                return
+        else:
+            state_dict[url] = record
+        with open(self.url_state_file, 'w', encoding='utf-8') as f:
+            json.dump(self.url_state, f, ensure_ascii=False, indent=2)
+
+    def iter_urls(self, level=None, status=None, letter=None):
+        """遍历 URL 记录，返回 (url, level, record)"""
+        levels = [level] if level else LEVELS
+        for lv in levels:
+            for url, record in self.url_state[f'{lv}_level'].items():
+                if status is not None and record.get('status') != status:
+                    continue
+                if letter is not None and url_letter(url) != letter:
+                    continue
+                yield url, lv, record
+
+    def save_progress(self, progress):
+        with open(self.progress_file, 'w', encoding='utf-8') as f:
+            json.dump(progress, f, ensure_ascii=False, indent=2)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def truncate_partial_line(path):
+    """崩溃后文件末尾可能有写了一半的行，截断到最后一个换行符"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r+b') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        pos = end
+        while pos > 0:
+            step = min(64 * 1024, pos)
+            f.seek(pos - step)
+            idx = f.read(step).rfind(b'\n')
+            if idx != -1:
+                pos = pos - step + idx + 1
+                break
+            pos -= step
+        if pos != end:
+            f.truncate(pos)
+
+
+class JournalStateBackend:
+    """追加写日志后端
+
+    每次变更只在 state.journal 末尾追加一行，日志条数达到 compact_every
+    （且不少于当前记录数）时把内存中的完整状态写成快照 state_snapshot.json 并清空日志。
+    启动时先读快照再重放日志；日志中的操作都是幂等的，压缩过程中崩溃也不会丢数据。
+    """
+
+    name = 'journal'
+
+    def __init__(self, state_dir, compact_every=10000, fsync_interval=5.0):
+        self.state_dir = state_dir
+        self.snapshot_file = os.path.join(state_dir, 'state_snapshot.json')
+        self.journal_file = os.path.join(state_dir, 'state.journal')
+        self.compact_every = compact_every
+        self.fsync_interval = fsync_interval
+        self.url_state = empty_url_state()
+        self.progress = None
+        self.journal_entries = 0
+        self._load()
+        # 新的日志行不能接在上次写了一半的行后面，否则下次读取时整行被丢弃
+        truncate_partial_line(self.journal_file)
+        self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self._last_fsync = time.monotonic()
+
+    def _load(self):
+        """读取快照并重放日志，没有快照时从旧的 JSON 文件迁移"""
+        self.url_state, self.progress, self.journal_entries = load_journal_state(self.state_dir)
+
+    def _append(self, entry):
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._journal.flush()
+        self.journal_entries += 1
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._journal.fileno())
+            self._last_fsync = now
+        # 压缩阈值随状态规模增长，保证压缩成本摊销到每次变更后仍是 O(1)
+        if self.journal_entries >= max(self.compact_every, self.record_count()):
+            self.compact()
+
+    def record_count(self):
+        """当前状态中的 URL 记录数"""
+        return sum(len(state_dict) for state_dict in self.url_state.values())
+
+    def load_progress(self):
+        return self.progress
+
+    def get_url(self, url, level):
+        return self.url_state[f'{level}_level'].get(url)
+
+    def set_url(self, url, level, record):
+        """record 为 None 表示删除记录"""
+        state_dict = self.url_state[f'{level}_level']
+        if record is None:
+            if state_dict.pop(url, None) is None:
+                return
+        else:
+            state_dict[url] = record
+        self._append({'l': level, 'u': url, 'r': record})
+
+    def iter_urls(self, level=None, status=None, letter=None):
+        """遍历 URL 记录，返回 (url, level, record)"""
+        levels = [level] if level else LEVELS
+        for lv in levels:
+            for url, record in self.url_state[f'{lv}_level'].items():
+                if status is not None and record.get('status') != status:
+                    continue
+                if letter is not None and url_letter(url) != letter:
+                    continue
+                yield url, lv, record
+
+    def save_progress(self, progress):
+        self.progress = progress
+        self._append({'p': progress})
+
+    def compact(self):
+        """写入完整快照并清空日志"""
+        atomic_write_json(self.snapshot_file, {
+            'url_state': self.url_state,
+            'progress': self.progress,
+        })
+        self._journal.close()
+        self._journal = open(self.journal_file, 'w', encoding='utf-8')
+        self.journal_entries = 0
+
+    def flush(self):
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._last_fsync = time.monotonic()
+
+    def close(self):
+        if self._journal.closed:
+            return
+        self.compact()
+        self._journal.close()
+
+
+class SqliteStateBackend:
+    """SQLite 后端
+
+    URL 状态保存在 url_state 表中，按 (level, status, letter) 建索引，
+    查询直接走数据库，不需要把整个状态加载到内存。
+    写操作在同一个事务中累积，满 batch_size 条或超过 flush_interval 秒提交一次。
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, state_dir, batch_size=500, flush_interval=5.0):
+        self.state_dir = state_dir
+        self.db_file = os.path.join(state_dir, 'spider_state.sqlite3')
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        is_new = not os.path.exists(self.db_file)
+        self.conn = sqlite3.connect(self.db_file)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_tables()
+        self.pending = 0
+        self._last_commit = time.monotonic()
+        if is_new:
+            self._migrate_file_state()
+
+    def _create_tables(self):
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS url_state (
+                url TEXT NOT NULL,
+                level TEXT NOT NULL,
+                letter TEXT NOT NULL DEFAULT '',
+                status TEXT NOT NULL,
+                retry_count INTEGER NOT NULL DEFAULT 0,
+                last_update TEXT,
+                PRIMARY KEY (url, level)
+            );
+            CREATE INDEX IF NOT EXISTS idx_url_state_level_status
+                ON url_state (level, status, letter);
+            CREATE TABLE IF NOT EXISTS progress (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                data TEXT NOT NULL
+            );
+        ''')
+        self.conn.commit()
+
+    def _migrate_file_state(self):
+        """首次创建数据库时导入 journal/json 后端留下的状态"""
+        url_state, progress, _ = load_journal_state(self.state_dir)
+        for level in LEVELS:
+            for url, record in url_state[f'{level}_level'].items():
+                self._upsert(url, level, record)
+        if progress is not None:
+            self.save_progress(progress)
+        self.flush()
+
+    def _upsert(self, url, level, record):
+        self.conn.execute(
+            '''INSERT OR REPLACE INTO url_state
+               (url, level, letter, status, retry_count, last_update)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (url, level, url_letter(url), record.get('status', ''),
+             record.get('retry_count', 0), record.get('last_update'))
+        )
+
+    def _written(self):
+        self.pending += 1
+        if (self.pending >= self.batch_size
+                or time.monotonic() - self._last_commit >= self.flush_interval):
+            self.flush()
+
+    def load_progress(self):
+        row = self.conn.execute('SELECT data FROM progress WHERE id = 1').fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_url(self, url, level):
+        row = self.conn.execute(
+            'SELECT status, retry_count, last_update FROM url_state WHERE url = ? AND level = ?',
+            (url, level)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'status': row[0], 'retry_count': row[1], 'last_update': row[2]}
+
+    def set_url(self, url, level, record):
+        """record 为 None 表示删除记录"""
+        if record is None:
+            cursor = self.conn.execute(
+                'DELETE FROM url_state WHERE url = ? AND level = ?', (url, level)
+            )
+            if cursor.rowcount == 0:
+                return
+        else:
+            self._upsert(url, level, record)
+        self._written()
+
+    def iter_urls(self, level=None, status=None, letter=None):
+        """遍历 URL 记录，返回 (url, level, record)"""
+        conditions, params = [], []
+        for column, value in (('level', level), ('status', status), ('letter', letter)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        sql = 'SELECT url, level, status, retry_count, last_update FROM url_state'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        for url, lv, st, retry_count, last_update in self.conn.execute(sql, params):
+            yield url, lv, {'status': st, 'retry_count': retry_count, 'last_update': last_update}
+
+    def save_progress(self, progress):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO progress (id, data) VALUES (1, ?)',
+            (json.dumps(progress, ensure_ascii=False),)
+        )
+        self._written()
+
+    def flush(self):
+        self.conn.commit()
+        self.pending = 0
+        self._last_commit = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+STATE_BACKENDS = {
+    JsonStateBackend.name: JsonStateBackend,
+    JournalStateBackend.name: JournalStateBackend,
+    SqliteStateBackend.name: SqliteStateBackend,
+}
+
+
+def create_state_backend(name, state_dir, **options):
+    """根据名称创建状态后端"""
+    try:
+        backend_cls = STATE_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown state backend: {name}")
+    return backend_cls(state_dir, **options)
@@ -0,0 +1,239 @@
+"""
+自适应限速工具
+
+提供按主机划分的令牌桶和 AIMD 并发控制器，供下载中间件在不阻塞
+reactor 的前提下计算每个请求需要等待的时间。
+"""
+
+import time
+
+
+class TokenBucket:
+    """令牌桶，按固定速率发放令牌，支持预约等待"""
+
+    def __init__(self, rate, burst=1.0, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated_at = self.clock()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def set_rate(self, rate):
+        """调整发放速率，先按旧速率结算已经过去的时间"""
+        self._refill(self.clock())
+        self.rate = float(rate)
+
+    def pause(self, seconds):
+        """暂停发放令牌（例如服务端返回 Retry-After）"""
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    def reserve(self):
+        """预约一个令牌，返回需要等待的秒数
+
+        令牌不足时余额会变为负数，后续请求依次排在后面，
+        这样并发的请求会被均匀错开，而不是同时醒来。
+        """
+        now = self.clock()
+        self._refill(now)
+        self.tokens -= 1
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        if self.paused_until > now:
+            wait = max(wait, self.paused_until - now)
+        return wait
+
+
+class AIMDController:
+    """加性增、乘性减的速率与并发控制器
+
+    - 正常且延迟低于目标的响应：速率和并发线性增加
+    - 429/503 或延迟超过目标：速率和并发按比例下降，
+      冷却期内只下降一次，避免一次突发的限流把速率打到底
+    """
+
+    def __init__(self, start_rate, min_rate, max_rate,
+                 start_concurrency=1, max_concurrency=8,
+                 increase=0.05, decrease=0.5,
+                 target_latency=2.0, cooldown=10.0, clock=time.monotonic):
+        self.rate = float(start_rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.concurrency = float(start_concurrency)
+        self.max_concurrency = float(max_concurrency)
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.target_latency = float(target_latency)
+        self.cooldown = float(cooldown)
+        self.clock = clock
+        self.last_backoff = float('-inf')
+        self.backoffs = 0
+
+    def on_success(self, latency):
+        """记录一次成功响应，返回是否发生了调整"""
+        if self.target_latency and latency > self.target_latency:
+            return self.on_overload()
+        # 每个成功响应增加 increase/concurrency，相当于每轮并发增加一次
+        step = self.increase / max(self.concurrency, 1.0)
+        self.rate = min(self.max_rate, self.rate + step)
+        self.concurrency = min(self.max_concurrency, self.concurrency + step)
+        return True
+
+    def on_overload(self):
+        """记录一次限流/过载信号，返回是否发生了回退"""
+        now = self.clock()
+        if now - self.last_backoff < self.cooldown:
+            return False
+        self.last_backoff = now
+        self.backoffs += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.concurrency = max(1.0, self.concurrency * self.decrease)
+        return True
+
+    @property
+    def slot_concurrency(self):
+        """下载槽位可用的整数并发数"""
+        return max(1, int(self.concurrency))
+
+
+class HostThrottle:
+    """单个主机的限速状态"""
+
+    def __init__(self, bucket, controller):
+        self.bucket = bucket
+        self.controller = controller
+        self.requests = 0
+        self.responses = 0
+        self.overloads = 0
+        self.delayed = 0
+        self.total_delay = 0.0
+        self.total_latency = 0.0
+
+    def snapshot(self):
+        """返回当前统计信息"""
+        return {
+            'rate': round(self.controller.rate, 3),
+            'concurrency': self.controller.slot_concurrency,
+            'requests': self.requests,
+            'responses': self.responses,
+            'overloads': self.overloads,
+            'backoffs': self.controller.backoffs,
+            'delayed': self.delayed,
+            'avg_delay': round(self.total_delay / self.delayed, 3) if self.delayed else 0.0,
+            'avg_latency': round(self.total_latency / self.responses, 3) if self.responses else 0.0,
+        }
+
+
+class AdaptiveThrottle:
+    """按主机管理令牌桶和 AIMD 控制器"""
+
+    def __init__(self, start_delay=3.0, min_delay=0.25, max_delay=60.0,
+                 start_concurrency=1, max_concurrency=8, burst=1.0,
+                 increase=0.05, decrease=0.5, target_latency=2.0, cooldown=10.0,
+                 clock=time.monotonic):
+        self.start_rate = 1.0 / start_delay if start_delay > 0 else 1.0 / min_delay
+        self.min_rate = 1.0 / max_delay
+        self.max_rate = 1.0 / min_delay
+        self.start_concurrency = start_concurrency
+        self.max_concurrency = max_concurrency
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.clock = clock
+        self.hosts = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """从 Scrapy 设置创建，未配置起始延迟时沿用 DOWNLOAD_DELAY"""
+        start_delay = settings.getfloat('ADAPTIVE_THROTTLE_START_DELAY',
+                                        settings.getfloat('DOWNLOAD_DELAY', 3))
+        return cls(
+            start_delay=start_delay,
+            min_delay=settings.getfloat('ADAPTIVE_THROTTLE_MIN_DELAY', 0.25),
+            max_delay=settings.getfloat('ADAPTIVE_THROTTLE_MAX_DELAY', 60.0),
+            start_concurrency=settings.getint('ADAPTIVE_THROTTLE_START_CONCURRENCY', 1),
+            max_concurrency=settings.getint('ADAPTIVE_THROTTLE_MAX_CONCURRENCY', 8),
+            burst=settings.getfloat('ADAPTIVE_THROTTLE_BURST', 1.0),
+            increase=settings.getfloat('ADAPTIVE_THROTTLE_INCREASE', 0.05),
+            decrease=settings.getfloat('ADAPTIVE_THROTTLE_DECREASE', 0.5),
+            target_latency=settings.getfloat('ADAPTIVE_THROTTLE_TARGET_LATENCY', 2.0),
+            cooldown=settings.getfloat('ADAPTIVE_THROTTLE_COOLDOWN', 10.0),
+        )
+
+    def get_host(self, host):
+        """获取（必要时创建）主机的限速状态"""
+        state = self.hosts.get(host)
+        if state is None:
+            controller = AIMDController(
+                start_rate=self.start_rate,
+                min_rate=self.min_rate,
+                max_rate=self.max_rate,
+                start_concurrency=self.start_concurrency,
+                max_concurrency=self.max_concurrency,
+                increase=self.increase,
+                decrease=self.decrease,
+                target_latency=self.target_latency,
+                cooldown=self.cooldown,
+                clock=self.clock,
+            )
+            bucket = TokenBucket(self.start_rate, burst=self.burst, clock=self.clock)
+            state = HostThrottle(bucket, controller)
+            self.hosts[host] = state
+        return state
+
+    def reserve(self, host):
+        """为请求预约发送时间，返回需要等待的秒数"""
+        state = self.get_host(host)
+        state.requests += 1
+        wait = state.bucket.reserve()
+        if wait > 0:
+            state.delayed += 1
+            state.total_delay += wait
+        return wait
+
+    def record_response(self, host, status, latency, retry_after=None):
+        """根据响应状态和延迟调整速率，返回主机状态"""
+        state = self.get_host(host)
+        state.responses += 1
+        state.total_latency += latency
+        controller = state.controller
+        if status in (429, 503):
+            state.overloads += 1
+            controller.on_overload()
+            if retry_after:
+                state.bucket.pause(retry_after)
+        elif status < 500:
+            controller.on_success(latency)
+        state.bucket.set_rate(controller.rate)
+        return state
+
+    def record_error(self, host):
+        """下载异常（超时、连接重置）按过载处理"""
+        state = self.get_host(host)
+        state.overloads += 1
+        state.controller.on_overload()
+        state.bucket.set_rate(state.controller.rate)
+        return state
+
+    def stats(self):
+        """返回所有主机的统计信息"""
+        return {host: state.snapshot() for host, state in self.hosts.items()}
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 头（只支持秒数形式），无法解析时返回 None"""
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    try:
+        return max(0.0, float(value.strip()))
+    except ValueError:
+        return None
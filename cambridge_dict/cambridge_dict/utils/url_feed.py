@@ -0,0 +1,152 @@
+"""
+按需读取的 URL 文件
+
+逐行读取 URL 文件，调度器需要新请求时才读下一行，内存占用和启动时间与文件大小无关。
+同时记录字节偏移检查点：检查点是最早一个还没处理完的 URL 所在行的偏移（低水位），
+它之前的所有 URL 都已经处理完，重启后直接 seek 到这里继续，不需要从头扫描文件。
+
+检查点文件（JSON，先写临时文件再原子替换）：
+    {"source": URL 文件路径, "size": 文件大小, "offset": 字节偏移, "line": 行号}
+URL 文件被替换（路径不同或文件变小）时忽略检查点。
+检查点最多每 checkpoint_interval 秒写一次，崩溃时最多重复抓取这段时间内完成的 URL。
+
+按优先级抓取时（utils/priority.py）用 open_url_feeds 为每个优先级建一个读取器，
+每个读取器只返回该优先级的 URL，有自己的检查点，从高到低依次读取整个文件。
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+
+
+class UrlFeed:
+    """带字节偏移检查点的 URL 文件读取器
+
+    迭代得到 (行号, 偏移, URL)，每个 URL 处理完（成功或失败）后调用 done(偏移)。
+    """
+
+    def __init__(self, path, checkpoint_path=None, start_line=0, end_line=None, checkpoint_interval=5.0,
+                 accept=None):
+        self.path = os.path.abspath(path)
+        self.checkpoint_path = checkpoint_path
+        self.start_line = start_line
+        self.end_line = end_line
+        self.checkpoint_interval = checkpoint_interval
+        # 只返回 accept(url) 为真的 URL，其他行和空行一样跳过
+        self.accept = accept
+        # 已发出、还没处理完的 URL：偏移 -> [行号, 是否已完成]，按偏移递增排列
+        self.pending = OrderedDict()
+        # 低水位：该位置之前的 URL 都已经处理完
+        self.committed_offset, self.committed_line = self._load_checkpoint()
+        # 读取位置：已发出的最后一行之后
+        self.read_offset, self.read_line = self.committed_offset, self.committed_line
+        self.yielded = 0
+        self._last_checkpoint = time.monotonic()
+
+    def _load_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            if (checkpoint.get('source') == self.path
+                    and checkpoint.get('offset', 0) <= os.path.getsize(self.path)
+                    and checkpoint.get('size', 0) <= os.path.getsize(self.path)):
+                return checkpoint['offset'], checkpoint['line']
+        return 0, 0
+
+    @property
+    def resumed(self):
+        return self.committed_offset > 0
+
+    def __iter__(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.committed_offset)
+            line_no = self.committed_line
+            offset = self.committed_offset
+            for raw in f:
+                if self.end_line is not None and line_no >= self.end_line:
+                    break
+                line_offset = offset
+                offset += len(raw)
+                url = raw.strip().decode('utf-8')
+                current_line = line_no
+                line_no += 1
+                if not url or current_line < self.start_line or (self.accept and not self.accept(url)):
+                    # 空行、范围之前的行和不需要的 URL 不需要处理，直接推进读取位置
+                    self._advance(line_no, offset)
+                    continue
+                self.pending[line_offset] = [current_line, False]
+                self.read_offset, self.read_line = offset, line_no
+                self.yielded += 1
+                yield current_line, line_offset, url
+        # 文件读完，已完成的 URL 之后只剩空行时低水位推进到文件末尾
+        self._advance(line_no, offset)
+        self.checkpoint(force=True)
+
+    def _advance(self, line_no, offset):
+        self.read_offset, self.read_line = offset, line_no
+        if not self.pending:
+            self.committed_offset, self.committed_line = offset, line_no
+
+    def done(self, offset):
+        """标记某个 URL 已处理完，推进低水位"""
+        entry = self.pending.get(offset)
+        if entry is None:
+            return
+        entry[1] = True
+        while self.pending:
+            first_offset, (first_line, finished) = next(iter(self.pending.items()))
+            if not finished:
+                self.committed_offset, self.committed_line = first_offset, first_line
+                break
+            self.pending.popitem(last=False)
+        else:
+            self.committed_offset, self.committed_line = self.read_offset, self.read_line
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def checkpoint(self, force=False):
+        """写入检查点"""
+        self._last_checkpoint = time.monotonic()
+        if not self.checkpoint_path:
+            return
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'source': self.path,
+                'size': os.path.getsize(self.path),
+                'offset': self.committed_offset,
+                'line': self.committed_line,
+            }, f)
+            if force:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def close(self):
+        self.checkpoint(force=True)
+
+
+def open_url_feeds(path, checkpoint_path=None, priorities=None, **options):
+    """返回 [(优先级, UrlFeed)]，按优先级从高到低排列
+
+    没有词表时只有一个读取全部 URL 的读取器，检查点和以前相同；
+    有词表时每个优先级一个读取器，检查点文件名加上 .p<优先级>。
+    """
+    if not priorities:
+        return [(0, UrlFeed(path, checkpoint_path, **options))]
+    feeds = []
+    for tier in priorities.tiers:
+        tier_checkpoint = None
+        if checkpoint_path:
+            root, ext = os.path.splitext(checkpoint_path)
+            tier_checkpoint = f'{root}.p{tier}{ext}'
+        feeds.append((tier, UrlFeed(
+            path, tier_checkpoint,
+            accept=lambda url, tier=tier: priorities.priority_for_url(url) == tier,
+            **options
+        )))
+    return feeds
@@ -0,0 +1,119 @@
+"""
+增量抓取的页面校验信息
+
+每个单词页保存上次抓取时的 ETag、Last-Modified 和内容哈希：
+    incremental/<爬虫名>.sqlite3    validators: URL -> etag, last_modified, body_hash, checked_at, changed_at
+
+内容哈希在计算前会去掉 <script>、<style>、<noscript> 和 HTML 注释，
+这些部分每次请求都可能不同（统计代码、广告、token），但不影响词条内容。
+更新在内存中攒批，满 batch_size 条或超过 flush_interval 秒后在一个事务中提交。
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+from scrapy.exceptions import IgnoreRequest
+
+# 与词条内容无关、每次请求都可能变化的部分
+_VOLATILE_RE = re.compile(
+    rb'<script\b.*?</script\s*>|<style\b.*?</style\s*>|<noscript\b.*?</noscript\s*>|<!--.*?-->',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class ContentUnchanged(IgnoreRequest):
+    """页面内容与上次抓取时相同（304 或内容哈希一致），不需要再解析"""
+
+
+def content_hash(body):
+    """忽略脚本、样式和注释后的响应体哈希"""
+    return hashlib.sha256(_VOLATILE_RE.sub(b'', body)).hexdigest()
+
+
+class ValidatorStore:
+    """URL 校验信息存储"""
+
+    def __init__(self, path, batch_size=500, flush_interval=5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                checked_at TEXT,
+                changed_at TEXT
+            )
+        ''')
+        self.conn.commit()
+        # 未提交的更新，读取时优先使用
+        self.pending = {}
+        self._last_flush = time.monotonic()
+
+    def get(self, url):
+        """返回 {'etag', 'last_modified', 'body_hash', ...}，没有记录时返回 None"""
+        if url in self.pending:
+            return self.pending[url]
+        row = self.conn.execute(
+            'SELECT etag, last_modified, body_hash, checked_at, changed_at FROM validators WHERE url = ?',
+            (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('etag', 'last_modified', 'body_hash', 'checked_at', 'changed_at'), row))
+
+    def update(self, url, etag=None, last_modified=None, body_hash=None, changed=False):
+        """记录一次抓取结果；未变化时保留原来的校验值和 changed_at"""
+        now = datetime.now().isoformat(timespec='seconds')
+        old = self.get(url) or {}
+        self.pending[url] = {
+            'etag': etag or old.get('etag'),
+            'last_modified': last_modified or old.get('last_modified'),
+            'body_hash': body_hash or old.get('body_hash'),
+            'checked_at': now,
+            'changed_at': now if changed or not old else old.get('changed_at'),
+        }
+        if (len(self.pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def forget(self, url):
+        """删除 URL 的记录，下次抓取时一定会重新解析"""
+        self.pending.pop(url, None)
+        with self.conn:
+            self.conn.execute('DELETE FROM validators WHERE url = ?', (url,))
+
+    def flush(self):
+        if self.pending:
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO validators '
+                    '(url, etag, last_modified, body_hash, checked_at, changed_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(url, v['etag'], v['last_modified'], v['body_hash'], v['checked_at'], v['changed_at'])
+                     for url, v in self.pending.items()]
+                )
+            self.pending = {}
+        self._last_flush = time.monotonic()
+
+    def count(self):
+        self.flush()
+        return self.conn.execute('SELECT COUNT(*) FROM validators').fetchone()[0]
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
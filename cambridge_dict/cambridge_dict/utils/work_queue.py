@@ -0,0 +1,204 @@
+"""
+多进程分片抓取的工作队列
+
+URL 文件按行切成小块（chunk），每块记录起止行号和字节偏移，保存在 SQLite 租约表中：
+    chunks: id -> 起止行号、起止字节偏移、状态（pending / leased / done / failed）、
+            持有者、租约到期时间、领取次数
+
+工作进程每次领取一块，处理完标记 done，处理过程中定期续约。
+块中有请求失败时不标记 done，而是放回队列（retry），已成功的 URL 由指纹记录跳过，
+下次领取只重新请求失败的 URL；领取次数用完后标记为 failed。
+处理快的进程会领取更多的块；进程崩溃后它持有的块在租约到期后重新分配给其他进程。
+多个进程共用一个数据库文件，领取在 BEGIN IMMEDIATE 事务中完成，不会重复分配。
+"""
+
+import os
+import sqlite3
+import time
+
+# 同一块被领取超过该次数后标记为 failed，避免有问题的块让工作进程反复崩溃或反复请求失败
+DEFAULT_MAX_ATTEMPTS = 5
+
+
+class WorkQueue:
+    """基于 SQLite 租约表的工作队列"""
+
+    def __init__(self, path, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 手动管理事务，多个进程同时领取时在 BEGIN IMMEDIATE 上排队
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                start_line INTEGER NOT NULL,
+                end_line INTEGER NOT NULL,
+                start_offset INTEGER NOT NULL,
+                end_offset INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                done_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_status ON chunks (status, lease_expires);
+        ''')
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def create(self, urls_file, chunk_size=500):
+        """按行切分 URL 文件，返回块数
+
+        队列已经为同一个文件（路径和大小相同）建立过时直接返回，可以续跑。
+        """
+        source = os.path.abspath(urls_file)
+        size = os.path.getsize(urls_file)
+        if self.get_meta('source') == source and self.get_meta('source_size') == str(size):
+            return self.conn.execute('SELECT COUNT(*) FROM chunks').fetchone()[0]
+
+        rows = []
+        start_line = start_offset = None
+        count = 0
+        offset = 0
+        with open(urls_file, 'rb') as f:
+            for line_no, line in enumerate(f):
+                if line.strip():
+                    if start_line is None:
+                        start_line, start_offset = line_no, offset
+                    count += 1
+                    if count == chunk_size:
+                        rows.append((start_line, line_no + 1, start_offset, offset + len(line)))
+                        start_line = None
+                        count = 0
+                offset += len(line)
+        if start_line is not None:
+            rows.append((start_line, line_no + 1, start_offset, offset))
+
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.execute('DELETE FROM chunks')
+            self.conn.executemany(
+                'INSERT INTO chunks (start_line, end_line, start_offset, end_offset) VALUES (?, ?, ?, ?)', rows
+            )
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                [('source', source), ('source_size', str(size)), ('chunk_size', str(chunk_size))]
+            )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return len(rows)
+
+    def lease(self, worker, lease_seconds=600):
+        """领取一块，返回 {'id', 'start_line', 'end_line', 'start_offset', 'end_offset'}，没有可领取的块时返回 None"""
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            # 领取次数用完的过期块不再分配
+            self.conn.execute(
+                "UPDATE chunks SET status = 'failed', worker = NULL "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            row = self.conn.execute(
+                "SELECT id, start_line, end_line, start_offset, end_offset FROM chunks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1", (now,)
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE chunks SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE id = ?", (worker, now + lease_seconds, row[0])
+                )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        return dict(zip(('id', 'start_line', 'end_line', 'start_offset', 'end_offset'), row))
+
+    def renew(self, worker, lease_seconds=600):
+        """延长该进程持有的所有租约"""
+        self.conn.execute(
+            "UPDATE chunks SET lease_expires = ? WHERE status = 'leased' AND worker = ?",
+            (time.time() + lease_seconds, worker)
+        )
+
+    def complete(self, chunk_id, worker):
+        """标记块已完成；租约已经被其他进程接手时返回 False"""
+        cursor = self.conn.execute(
+            "UPDATE chunks SET status = 'done', lease_expires = NULL, done_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time(), chunk_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def retry(self, chunk_id, worker):
+        """块中有请求失败：放回队列重新领取，领取次数用完时标记为 failed
+
+        返回块的新状态，租约已经被其他进程接手时返回 None
+        """
+        cursor = self.conn.execute(
+            "UPDATE chunks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (self.max_attempts, chunk_id, worker)
+        )
+        if cursor.rowcount != 1:
+            return None
+        return self.conn.execute('SELECT status FROM chunks WHERE id = ?', (chunk_id,)).fetchone()[0]
+
+    def requeue_failed(self):
+        """把 failed 的块重新放回队列（重置领取次数），返回块数"""
+        return self.conn.execute(
+            "UPDATE chunks SET status = 'pending', worker = NULL, lease_expires = NULL, attempts = 0 "
+            "WHERE status = 'failed'"
+        ).rowcount
+
+    def release(self, worker):
+        """归还该进程持有的所有租约（例如爬虫提前关闭），其他进程可以立即领取"""
+        self.conn.execute(
+            "UPDATE chunks SET status = 'pending', worker = NULL, lease_expires = NULL "
+            "WHERE status = 'leased' AND worker = ?", (worker,)
+        )
+
+    def progress(self):
+        """各状态的块数，以及租约已过期的块数"""
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0, 'expired': 0}
+        for status, count in self.conn.execute('SELECT status, COUNT(*) FROM chunks GROUP BY status'):
+            counts[status] = count
+        counts['expired'] = self.conn.execute(
+            "SELECT COUNT(*) FROM chunks WHERE status = 'leased' AND lease_expires < ?", (time.time(),)
+        ).fetchone()[0]
+        return counts
+
+    def finished(self):
+        """所有块都已完成或失败"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM chunks WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0] == 0
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def read_chunk_urls(urls_file, chunk):
+    """读取一块中的 URL"""
+    with open(urls_file, 'rb') as f:
+        f.seek(chunk['start_offset'])
+        data = f.read(chunk['end_offset'] - chunk['start_offset'])
+    return [line.strip() for line in data.decode('utf-8').splitlines() if line.strip()]
@@ -0,0 +1,375 @@
+"""
+按字母分文件的数据写入器
+
+- json: 原有方式，每个字母一个 JSON 数组文件，数据常驻内存，定期整体重写
+- jsonl: 每行一个 JSON 对象，只追加新数据，内存占用有上限，可选分帧 gzip/zstd 压缩
+
+BackgroundLetterWriter 可以包装任意写入器，把序列化和文件 I/O 放到独立线程中执行。
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from .compression import FramedCompressedFile, codec_for_path, create_codec, index_path, tail_path
+
+
+class JsonArrayLetterWriter:
+    """JSON 数组写入器（兼容旧的输出格式）"""
+
+    name = 'json'
+
+    def __init__(self, data_dir, save_every=100, logger=None):
+        self.data_dir = data_dir
+        self.save_every = save_every
+        self.logger = logger
+        self.files = {}
+        # 有未保存数据的文件
+        self.dirty = set()
+        self.total = 0
+
+    def write(self, letter, record):
+        file_path = os.path.join(self.data_dir, f"{letter}.json")
+
+        # 懒加载文件数据
+        if file_path not in self.files:
+            self.files[file_path] = []
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    try:
+                        self.files[file_path] = json.load(f)
+                    except json.JSONDecodeError:
+                        if self.logger:
+                            self.logger.error(f"Error reading {file_path}")
+
+        self.files[file_path].append(record)
+        self.dirty.add(file_path)
+        self.total += 1
+
+        # 定期保存数据
+        if self.total % self.save_every == 0:
+            self._save_file(file_path)
+
+    def _save_file(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.files[file_path], f, ensure_ascii=False, indent=2)
+        self.dirty.discard(file_path)
+
+    def flush(self):
+        # 只重写有新数据的文件，定期 flush 时不必每次重写所有字母
+        for file_path in list(self.dirty):
+            self._save_file(file_path)
+
+    def close(self):
+        self.flush()
+
+
+class _LetterFile:
+    """单个字母的 JSONL 文件"""
+
+    def __init__(self, path, buffer_size):
+        self.path = path
+        self._recover()
+        self.file = open(path, 'ab', buffering=buffer_size)
+        self.size = self.file.tell()
+        self.last_fsync = time.monotonic()
+
+    def _recover(self):
+        """崩溃后文件末尾可能有写了一半的行，截断到最后一个完整行"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            pos = end
+            while pos > 0:
+                step = min(64 * 1024, pos)
+                f.seek(pos - step)
+                chunk = f.read(step)
+                idx = chunk.rfind(b'\n')
+                if idx != -1:
+                    pos = pos - step + idx + 1
+                    break
+                pos -= step
+            if pos != end:
+                f.truncate(pos)
+
+    def write(self, data):
+        self.file.write(data)
+        self.size += len(data)
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_fsync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+class JsonLinesLetterWriter:
+    """JSONL 追加写入器
+
+    - 写入缓冲，定期 fsync
+    - 单个文件超过 rotate_bytes 时轮转为 {letter}.{n:04d}.jsonl，
+      轮转前先 fsync 再原子重命名，当前文件始终只包含完整的行
+    - 同时打开的文件数不超过 max_open_files，最久未写的文件先关闭
+    - compression 为 gzip/zstd 时输出 {letter}.jsonl.gz / .jsonl.zst 分帧压缩文件，
+      rotate_bytes 按压缩后的大小计算
+    """
+
+    name = 'jsonl'
+
+    def __init__(self, data_dir, buffer_size=256 * 1024, fsync_interval=5.0,
+                 rotate_bytes=512 * 1024 * 1024, max_open_files=32, compression=None,
+                 compression_level=None, frame_size=1024 * 1024, logger=None):
+        self.data_dir = data_dir
+        self.buffer_size = buffer_size
+        self.fsync_interval = fsync_interval
+        self.rotate_bytes = rotate_bytes
+        self.max_open_files = max_open_files
+        self.codec = create_codec(compression, compression_level) if compression else None
+        self.frame_size = frame_size
+        self.suffix = '.jsonl' + (self.codec.suffix if self.codec else '')
+        self.logger = logger
+        self.files = OrderedDict()
+
+    def _open_file(self, path):
+        if self.codec is not None:
+            return FramedCompressedFile(path, self.codec, self.frame_size)
+        return _LetterFile(path, self.buffer_size)
+
+    def _get_file(self, letter):
+        letter_file = self.files.get(letter)
+        if letter_file is not None:
+            self.files.move_to_end(letter)
+            return letter_file
+        if len(self.files) >= self.max_open_files:
+            _, oldest = self.files.popitem(last=False)
+            oldest.close()
+        letter_file = self._open_file(os.path.join(self.data_dir, f"{letter}{self.suffix}"))
+        self.files[letter] = letter_file
+        return letter_file
+
+    def write(self, letter, record):
+        self.write_encoded(letter, self.encode(record))
+
+    @staticmethod
+    def encode(record):
+        """把一条记录编码成一行 JSONL"""
+        return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+    def write_encoded(self, letter, data):
+        """写入已经编码好的数据（一行或多行）"""
+        letter_file = self._get_file(letter)
+        letter_file.write(data)
+        if self.rotate_bytes and letter_file.size >= self.rotate_bytes:
+            self._rotate(letter)
+        elif time.monotonic() - letter_file.last_fsync >= self.fsync_interval:
+            letter_file.sync()
+
+    def _rotate(self, letter):
+        letter_file = self.files.pop(letter)
+        letter_file.close()
+        index = 1
+        while True:
+            target = os.path.join(self.data_dir, f"{letter}.{index:04d}{self.suffix}")
+            if not os.path.exists(target):
+                break
+            index += 1
+        if self.codec is not None:
+            os.replace(index_path(letter_file.path), index_path(target))
+        os.replace(letter_file.path, target)
+        if self.logger:
+            self.logger.info(f"Rotated {letter_file.path} -> {target}")
+
+    def flush(self):
+        for letter_file in self.files.values():
+            letter_file.sync()
+
+    def close(self):
+        for letter_file in self.files.values():
+            letter_file.close()
+        self.files.clear()
+
+
+_STOP = object()
+_FLUSH = object()
+
+
+class BackgroundLetterWriter:
+    """后台线程写入器
+
+    write() 只把记录放进有界队列，由写线程批量取出、按字母分组序列化后写入。
+    队列满时 write() 会阻塞，调用方可以先用 full() 判断，自行实现非阻塞的背压；
+    写线程每处理完一批都会调用 on_batch_done 回调，通知调用方队列有了空位。
+    flush_async() 不阻塞调用方，之前放入队列的记录写完并 fsync 后在写线程中调用回调。
+    """
+
+    def __init__(self, writer, queue_size=1000, batch_size=200, on_batch_done=None):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.on_batch_done = on_batch_done
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.written = 0
+        # 放入队列的记录数（调用方线程）和写线程已处理的记录数
+        self.queued = 0
+        self.processed = 0
+        # 等待中的 fsync 请求 (需要处理到的记录数, 回调)
+        self._flush_requests = []
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name='letter-writer', daemon=True)
+        self.thread.start()
+
+    def full(self):
+        return self.queue.full()
+
+    def write(self, letter, record):
+        if self.error is not None:
+            raise self.error
+        self.queue.put((letter, record))
+        self.queued += 1
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            by_letter = {}
+            for entry in batch:
+                if entry is _STOP:
+                    stop = True
+                    continue
+                if entry is _FLUSH:
+                    continue
+                letter, record = entry
+                by_letter.setdefault(letter, []).append(record)
+
+            try:
+                for letter, records in by_letter.items():
+                    self._write_batch(letter, records)
+                    self.written += len(records)
+            except Exception as e:
+                # 记录第一个错误，继续消费队列，避免生产者永远阻塞
+                if self.error is None:
+                    self.error = e
+            finally:
+                self.processed += sum(1 for entry in batch if entry is not _STOP and entry is not _FLUSH)
+                for _ in batch:
+                    self.queue.task_done()
+            self._run_flush_requests()
+            if self.on_batch_done is not None:
+                self.on_batch_done()
+
+    def _run_flush_requests(self):
+        """请求之前的记录都已处理时 fsync 并调用回调；写入出错后不再确认落盘"""
+        with self._lock:
+            ready = [callback for target, callback in self._flush_requests if target <= self.processed]
+            self._flush_requests = [(t, c) for t, c in self._flush_requests if t > self.processed]
+        if not ready or self.error is not None:
+            return
+        try:
+            self.writer.flush()
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+            return
+        for callback in ready:
+            callback()
+
+    def _write_batch(self, letter, records):
+        if hasattr(self.writer, 'write_encoded'):
+            self.writer.write_encoded(letter, b''.join(self.writer.encode(r) for r in records))
+        else:
+            for record in records:
+                self.writer.write(letter, record)
+
+    def flush(self):
+        """等待队列中已有的记录全部写完"""
+        self.queue.join()
+        self.writer.flush()
+
+    def flush_async(self, callback):
+        """请求 fsync，不阻塞：目前已放入队列的记录写完并 fsync 后在写线程中调用 callback"""
+        with self._lock:
+            self._flush_requests.append((self.queued, callback))
+        try:
+            # 唤醒空闲的写线程；队列满说明写线程正忙，处理完当前批次后会检查 fsync 请求
+            self.queue.put_nowait(_FLUSH)
+        except queue.Full:
+            pass
+
+    def close(self):
+        self.queue.put(_STOP)
+        self.thread.join()
+        self.writer.close()
+        if self.error is not None:
+            raise self.error
+
+
+LETTER_WRITERS = {
+    JsonArrayLetterWriter.name: JsonArrayLetterWriter,
+    JsonLinesLetterWriter.name: JsonLinesLetterWriter,
+}
+
+
+# {letter}{suffix} 或轮转后的 {letter}.{n:04d}{suffix}
+_LETTER_FILE_RE = re.compile(r'^(?P<letter>[^.]+)(?:\.(?P<part>\d{4}))?(?P<suffix>\.jsonl?(?:\.gz|\.zst)?)$')
+
+
+def merge_letter_outputs(src_dirs, dest_dir):
+    """把多个输出目录（例如多个分片进程的输出）合并到 dest_dir，返回移动的文件数
+
+    不改写文件内容，按轮转文件的命名规则把每个文件重命名为 {letter}.{n:04d}{suffix}，
+    压缩文件的 .idx 帧索引一起移动；写入进程崩溃后留下的 .tail 先压缩成最后一帧。
+    合并时这些目录不能有进程正在写入。
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    next_index = {}
+    moved = 0
+    for src_dir in src_dirs:
+        if not os.path.isdir(src_dir):
+            continue
+        files = []
+        for filename in os.listdir(src_dir):
+            match = _LETTER_FILE_RE.match(filename)
+            if match is None or filename == 'stats.json':
+                continue
+            # 同一字母的轮转文件在前，当前文件最新，排在最后
+            part = int(match.group('part')) if match.group('part') else float('inf')
+            files.append((match.group('letter'), match.group('suffix'), part, filename))
+        for letter, suffix, _, filename in sorted(files):
+            index = next_index.get((letter, suffix), 1)
+            while os.path.exists(os.path.join(dest_dir, f"{letter}.{index:04d}{suffix}")):
+                index += 1
+            target = os.path.join(dest_dir, f"{letter}.{index:04d}{suffix}")
+            source = os.path.join(src_dir, filename)
+            if os.path.exists(tail_path(source)):
+                FramedCompressedFile(source, codec_for_path(source)).close()
+            if os.path.exists(index_path(source)):
+                os.replace(index_path(source), index_path(target))
+            os.replace(source, target)
+            next_index[(letter, suffix)] = index + 1
+            moved += 1
+    return moved
+
+
+def create_letter_writer(output_format, data_dir, **options):
+    """根据输出格式创建写入器"""
+    try:
+        writer_cls = LETTER_WRITERS[output_format]
+    except KeyError:
+        raise ValueError(f"Unknown output format: {output_format}")
+    return writer_cls(data_dir, **options)
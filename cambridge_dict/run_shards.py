@@ -0,0 +1,210 @@
+"""
+多进程分片抓取
+
+把 URL 文件切成小块放进 SQLite 工作队列（utils/work_queue.py），启动多个
+single_word_ja_batch_parallel 爬虫进程，每个进程处理完一块再领取下一块：
+处理快的进程自动多领，进程崩溃后它持有的块回到队列中由其他进程接手；
+块中有请求失败时也回到队列，再次领取时只重新请求失败的 URL。
+全部完成后汇总各进程的统计信息，合并输出文件和已处理URL记录。
+
+运行目录（--run-dir）结构：
+    queue.sqlite3               工作队列
+    processed_urls/             各进程的已处理URL指纹
+    workers/worker-N/           各进程的日志、统计信息和输出
+    output/                     合并后的输出
+    stats.json                  汇总的统计信息
+
+用法：
+    cd cambridge_dict
+    python run_shards.py urls.txt --workers 8
+    # 中断后用同样的参数重新运行会从队列中未完成的块继续
+    # 重试次数用完（failed）的块中未成功的 URL 用 --retry-failed 重新抓取
+    python run_shards.py urls.txt --workers 8 --retry-failed
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+# 添加项目根目录到 Python 路径
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from cambridge_dict.utils.frontier import merge_fingerprint_logs
+from cambridge_dict.utils.work_queue import WorkQueue
+from cambridge_dict.utils.writers import merge_letter_outputs
+
+
+class ShardLauncher:
+    """启动并监控爬虫进程"""
+
+    def __init__(self, urls_file, run_dir, workers, spider='single_word_ja_batch_parallel',
+                 lease_seconds=600, max_restarts=3, settings=()):
+        self.urls_file = os.path.abspath(urls_file)
+        self.run_dir = os.path.abspath(run_dir)
+        self.workers = workers
+        self.spider = spider
+        self.lease_seconds = lease_seconds
+        self.max_restarts = max_restarts
+        self.settings = list(settings)
+        self.queue_path = os.path.join(self.run_dir, 'queue.sqlite3')
+        self.processed_dir = os.path.join(self.run_dir, 'processed_urls')
+        self.queue = WorkQueue(self.queue_path)
+        self.procs = {}
+        self.restarts = {}
+
+    def worker_dir(self, shard):
+        return os.path.join(self.run_dir, 'workers', shard)
+
+    def start_worker(self, shard):
+        worker_dir = self.worker_dir(shard)
+        os.makedirs(worker_dir, exist_ok=True)
+        command = [
+            sys.executable, '-m', 'scrapy', 'crawl', self.spider,
+            '-a', f'urls_file={self.urls_file}',
+            '-a', f'work_queue={self.queue_path}',
+            '-a', f'shard={shard}',
+            '-a', f'lease_seconds={self.lease_seconds}',
+            '-a', f'processed_dir={self.processed_dir}',
+            '-a', f'data_dir={os.path.join(worker_dir, "data")}',
+            '-a', f'stats_file={os.path.join(worker_dir, "stats.json")}',
+            '-s', f'LOG_FILE={os.path.join(worker_dir, "spider.log")}',
+            # PageArchive 不支持多进程同时写入，每个进程单独归档
+            '-s', f'ARCHIVE_DIR={os.path.join(worker_dir, "archive")}',
+        ]
+        for setting in self.settings:
+            command += ['-s', setting]
+        self.procs[shard] = subprocess.Popen(command, cwd=project_root)
+        print(f"started {shard} (pid {self.procs[shard].pid})")
+
+    def run(self, chunk_size, progress_interval=30, retry_failed=False):
+        chunks = self.queue.create(self.urls_file, chunk_size)
+        if retry_failed:
+            print(f"requeued {self.queue.requeue_failed()} failed chunks")
+        print(f"{chunks} chunks of up to {chunk_size} URLs, progress: {self.queue.progress()}")
+        if self.queue.finished():
+            return True
+        for i in range(self.workers):
+            shard = f'worker-{i}'
+            # 上次运行被强制结束时留下的租约
+            self.queue.release(shard)
+            self.restarts[shard] = 0
+            self.start_worker(shard)
+
+        last_report = time.monotonic()
+        try:
+            while self.procs:
+                time.sleep(1)
+                for shard, proc in list(self.procs.items()):
+                    code = proc.poll()
+                    if code is None:
+                        continue
+                    del self.procs[shard]
+                    # 进程已经退出，它持有的块可以立即重新分配
+                    self.queue.release(shard)
+                    print(f"{shard} exited with code {code}")
+                    if self.queue.progress()['pending'] and self.restarts[shard] < self.max_restarts:
+                        self.restarts[shard] += 1
+                        self.start_worker(shard)
+                if time.monotonic() - last_report >= progress_interval:
+                    print(f"progress: {self.queue.progress()}")
+                    last_report = time.monotonic()
+        except KeyboardInterrupt:
+            print("stopping workers ...")
+            for proc in self.procs.values():
+                proc.send_signal(signal.SIGINT)
+            for shard, proc in self.procs.items():
+                proc.wait()
+                self.queue.release(shard)
+            raise
+        progress = self.queue.progress()
+        print(f"finished: {progress}")
+        return self.queue.finished()
+
+    def aggregate_stats(self):
+        """汇总各进程的 scrapy 统计信息，数值相加"""
+        totals = {'workers': {}}
+        workers_root = os.path.join(self.run_dir, 'workers')
+        for shard in sorted(os.listdir(workers_root)) if os.path.isdir(workers_root) else []:
+            stats_file = os.path.join(workers_root, shard, 'stats.json')
+            if not os.path.exists(stats_file):
+                continue
+            with open(stats_file, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+            totals['workers'][shard] = stats
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[key] = totals.get(key, 0) + value
+        totals['queue'] = self.queue.progress()
+        with open(os.path.join(self.run_dir, 'stats.json'), 'w', encoding='utf-8') as f:
+            json.dump(totals, f, ensure_ascii=False, indent=2)
+        return totals
+
+    def merge_outputs(self):
+        """合并各进程的输出文件和已处理URL指纹"""
+        workers_root = os.path.join(self.run_dir, 'workers')
+        data_dirs = [
+            os.path.join(workers_root, shard, 'data')
+            for shard in sorted(os.listdir(workers_root))
+        ] if os.path.isdir(workers_root) else []
+        moved = merge_letter_outputs(data_dirs, os.path.join(self.run_dir, 'output'))
+
+        fp_files = [
+            os.path.join(self.processed_dir, filename)
+            for filename in sorted(os.listdir(self.processed_dir))
+            if filename.endswith('.fp')
+        ] if os.path.isdir(self.processed_dir) else []
+        if fp_files:
+            target = os.path.join(self.processed_dir, 'merged.fp')
+            merge_fingerprint_logs(fp_files, target)
+            for path in fp_files:
+                if path != target:
+                    os.remove(path)
+        return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多进程分片抓取')
+    parser.add_argument('urls_file', help='每行一个单词URL的文件')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='爬虫进程数')
+    parser.add_argument('--run-dir', help='运行目录，默认 shard_runs/<URL文件名>')
+    parser.add_argument('--spider', default='single_word_ja_batch_parallel')
+    parser.add_argument('--chunk-size', type=int, default=500, help='每块的URL数')
+    parser.add_argument('--lease-seconds', type=int, default=600, help='租约时长，进程崩溃后块在到期后重新分配')
+    parser.add_argument('--max-restarts', type=int, default=3, help='每个进程异常退出后最多重启的次数')
+    parser.add_argument('--progress-interval', type=int, default=30, help='进度输出间隔（秒）')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='把 failed 的块放回队列，重新抓取其中未成功的URL')
+    parser.add_argument('-s', '--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='传给每个爬虫进程的 scrapy 设置')
+    args = parser.parse_args()
+
+    run_dir = args.run_dir or os.path.join(
+        'shard_runs', os.path.splitext(os.path.basename(args.urls_file))[0]
+    )
+    launcher = ShardLauncher(
+        args.urls_file, run_dir, args.workers, spider=args.spider,
+        lease_seconds=args.lease_seconds, max_restarts=args.max_restarts, settings=args.set,
+    )
+    finished = launcher.run(args.chunk_size, args.progress_interval, args.retry_failed)
+    totals = launcher.aggregate_stats()
+    print(f"items: {totals.get('item_scraped_count', 0)}, "
+          f"responses: {totals.get('response_received_count', 0)}, "
+          f"chunks: {totals['queue']}")
+    if not finished:
+        print("some chunks are unfinished, outputs are not merged; rerun to continue")
+        sys.exit(1)
+    if totals['queue']['failed']:
+        print(f"{totals['queue']['failed']} chunks failed after repeated crashes or failed requests, "
+              f"see workers/*/spider.log; rerun with --retry-failed to retry their unprocessed URLs")
+    moved = launcher.merge_outputs()
+    print(f"merged {moved} output files into {os.path.join(launcher.run_dir, 'output')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 与 benchmarks 相同：把项目根目录（cambridge_dict/）加入 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
@@ -0,0 +1,47 @@
+"""可扩容 Bloom filter"""
+
+import random
+
+from cambridge_dict.utils.bloom import ScalableBloomFilter
+
+
+def test_grows_without_false_negatives():
+    rng = random.Random(0)
+    values = [rng.getrandbits(64) for _ in range(5000)]
+    bloom = ScalableBloomFilter(capacity=1000, error_rate=0.01)
+    for value in values:
+        bloom.add(value)
+
+    assert len(bloom) == len(values)
+    assert len(bloom.filters) > 1
+    assert all(value in bloom for value in values)
+    # 总误判率不超过初始误判率的两倍，留一些统计余量
+    false_positives = sum(rng.getrandbits(64) in bloom for _ in range(20000))
+    assert false_positives / 20000 < 0.03
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    bloom = ScalableBloomFilter(capacity=100, error_rate=0.01)
+    for value in range(250):
+        bloom.add(value * 7919)
+    bloom.save(path)
+
+    loaded = ScalableBloomFilter.load(path, capacity=100, error_rate=0.01)
+    assert len(loaded) == 250
+    assert len(loaded.filters) == len(bloom.filters)
+    assert all(value * 7919 in loaded for value in range(250))
+
+
+def test_load_missing_or_corrupt(tmp_path):
+    assert ScalableBloomFilter.load(str(tmp_path / 'missing.bloom')) is None
+    path = tmp_path / 'corrupt.bloom'
+    path.write_bytes(b'XXXX')
+    assert ScalableBloomFilter.load(str(path)) is None
+
+    bloom = ScalableBloomFilter(capacity=100)
+    bloom.add(1)
+    bloom.save(str(path))
+    # 位数组被截断
+    path.write_bytes(path.read_bytes()[:-1])
+    assert ScalableBloomFilter.load(str(path)) is None
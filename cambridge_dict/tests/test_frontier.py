@@ -0,0 +1,75 @@
+"""指纹集合、指纹文件和已完成URL记录"""
+
+import random
+
+from cambridge_dict.utils.frontier import (
+    FingerprintLog, FingerprintSet, SuccessFrontier, merge_fingerprint_logs, read_fingerprints, url_fingerprint
+)
+
+
+def test_url_fingerprint_depends_on_level():
+    assert url_fingerprint('https://x/a') == url_fingerprint('https://x/a')
+    assert url_fingerprint('https://x/a', 'word') != url_fingerprint('https://x/a', 'second')
+
+
+def test_fingerprint_set_merges_recent():
+    rng = random.Random(0)
+    values = [rng.getrandbits(64) for _ in range(1000)]
+    fingerprints = FingerprintSet(values[:500], min_merge=16)
+    for value in values[500:]:
+        assert fingerprints.add(value)
+    assert not fingerprints.add(values[0])
+    assert not fingerprints.add(values[-1])
+
+    assert len(fingerprints) == len(set(values))
+    assert all(value in fingerprints for value in values)
+    assert rng.getrandbits(64) not in fingerprints
+    assert list(fingerprints) == sorted(set(values))
+
+
+def test_fingerprint_log_drops_partial_record(tmp_path):
+    path = tmp_path / 'shard.fp'
+    log = FingerprintLog(str(path))
+    assert log.add(1) and log.add(2) and not log.add(1)
+    log.close()
+    with open(path, 'ab') as f:
+        f.write(b'\x03\x00\x00')
+
+    log = FingerprintLog(str(path))
+    assert len(log) == 2 and 1 in log and 3 not in log
+    log.add(3)
+    log.close()
+    assert list(read_fingerprints(str(path))) == [1, 2, 3]
+
+
+def test_fingerprint_log_shared_paths_are_read_only(tmp_path):
+    other = FingerprintLog(str(tmp_path / 'other.fp'))
+    other.add(10)
+    other.close()
+
+    log = FingerprintLog(str(tmp_path / 'mine.fp'), shared_paths=[str(tmp_path / 'other.fp')])
+    assert 10 in log and not log.add(10)
+    log.add(11)
+    log.close()
+    assert list(read_fingerprints(str(tmp_path / 'mine.fp'))) == [11]
+    assert merge_fingerprint_logs([str(tmp_path / 'mine.fp'), str(tmp_path / 'other.fp')],
+                                  str(tmp_path / 'merged.fp')) == 2
+
+
+def test_success_frontier_completes_parents(tmp_path):
+    frontier = SuccessFrontier(str(tmp_path))
+    assert frontier.register_children('letter', 'first', ['range1', 'range2'], 'second') == ['range1', 'range2']
+    assert frontier.register_children('range1', 'second', ['w1', 'w2', 'w1'], 'word') == ['w1', 'w2']
+    assert frontier.register_children('range2', 'second', ['w2'], 'word') == ['w2']
+
+    assert frontier.mark_complete('w1', 'word') == [('w1', 'word')]
+    completed = frontier.mark_complete('w2', 'word')
+    assert set(completed) == {('w2', 'word'), ('range1', 'second'), ('range2', 'second'), ('letter', 'first')}
+    assert frontier.mark_complete('w2', 'word') == []
+    frontier.close()
+
+    # 重启后已完成的子页面不再返回
+    reopened = SuccessFrontier(str(tmp_path))
+    assert reopened.is_complete('letter', 'first')
+    assert reopened.register_children('range3', 'second', ['w1', 'w3'], 'word') == ['w3']
+    reopened.close()
@@ -0,0 +1,67 @@
+"""journal 状态后端：写了一半的行、重放和压缩"""
+
+import json
+
+from cambridge_dict.utils.state_backends import JournalStateBackend, load_journal_state, truncate_partial_line
+
+
+def test_truncate_partial_line(tmp_path):
+    path = tmp_path / 'state.journal'
+    path.write_bytes(b'{"a": 1}\n{"b": 2}\n{"c"')
+    truncate_partial_line(str(path))
+    assert path.read_bytes() == b'{"a": 1}\n{"b": 2}\n'
+
+    # 完整的文件不变，没有换行符时整个截掉，文件不存在时什么也不做
+    truncate_partial_line(str(path))
+    assert path.read_bytes() == b'{"a": 1}\n{"b": 2}\n'
+    path.write_bytes(b'{"a"')
+    truncate_partial_line(str(path))
+    assert path.read_bytes() == b''
+    truncate_partial_line(str(tmp_path / 'missing'))
+
+
+def test_load_journal_state_skips_torn_lines(tmp_path):
+    lines = [
+        json.dumps({'l': 'word', 'u': 'https://x/a', 'r': {'status': 'failed'}}).encode('utf-8'),
+        json.dumps({'p': {'current_letter': 'a'}}).encode('utf-8'),
+        # 截断在多字节字符中间
+        json.dumps({'l': 'word', 'u': 'https://x/单词', 'r': None}, ensure_ascii=False).encode('utf-8')[:-9],
+    ]
+    (tmp_path / 'state.journal').write_bytes(b'\n'.join(lines))
+
+    url_state, progress, entries = load_journal_state(str(tmp_path))
+    assert url_state['word_level'] == {'https://x/a': {'status': 'failed'}}
+    assert progress == {'current_letter': 'a'}
+    assert entries == 2
+
+
+def test_reopen_after_torn_write_keeps_new_entries(tmp_path):
+    # 上次运行崩溃：日志最后一行只写了一半
+    (tmp_path / 'state.journal').write_bytes(
+        b'{"l": "word", "u": "https://x/a", "r": {"status": "failed"}}\n{"l": "word", "u": "https://x/b"'
+    )
+
+    backend = JournalStateBackend(str(tmp_path))
+    backend.set_url('https://x/c', 'word', {'status': 'failed'})
+    # 新的一行没有接在半行后面
+    assert (tmp_path / 'state.journal').read_bytes().splitlines()[-1].startswith(b'{"l": "word", "u": "https://x/c"')
+    backend.close()
+
+    reopened = JournalStateBackend(str(tmp_path))
+    assert set(reopened.url_state['word_level']) == {'https://x/a', 'https://x/c'}
+    reopened.close()
+
+
+def test_compaction(tmp_path):
+    backend = JournalStateBackend(str(tmp_path), compact_every=5)
+    for i in range(12):
+        backend.set_url(f'https://x/{i}', 'word', {'status': 'failed'})
+    backend.set_url('https://x/0', 'word', None)
+    backend.save_progress({'current_letter': 'b'})
+    backend.close()
+
+    assert (tmp_path / 'state_snapshot.json').exists()
+    reopened = JournalStateBackend(str(tmp_path))
+    assert set(reopened.url_state['word_level']) == {f'https://x/{i}' for i in range(1, 12)}
+    assert reopened.load_progress() == {'current_letter': 'b'}
+    reopened.close()
@@ -0,0 +1,63 @@
+"""URL 文件读取器的检查点"""
+
+from cambridge_dict.utils.url_feed import UrlFeed
+
+
+def write_urls(path, urls):
+    path.write_text(''.join(f'{url}\n' for url in urls), encoding='utf-8')
+
+
+def test_checkpoint_is_low_watermark(tmp_path):
+    urls_file = tmp_path / 'urls.txt'
+    checkpoint = tmp_path / 'checkpoint.json'
+    write_urls(urls_file, ['https://x/a', '', 'https://x/b', 'https://x/c'])
+
+    feed = UrlFeed(str(urls_file), str(checkpoint), checkpoint_interval=0)
+    it = iter(feed)
+    (_, offset_a, _), (_, offset_b, url_b), (_, offset_c, _) = next(it), next(it), next(it)
+    assert url_b == 'https://x/b'
+
+    # 后面的 URL 先完成，检查点停在最早一个没完成的 URL
+    feed.done(offset_c)
+    assert feed.committed_offset == offset_a
+    feed.done(offset_a)
+    assert (feed.committed_offset, feed.committed_line) == (offset_b, 2)
+    feed.close()
+
+    resumed = UrlFeed(str(urls_file), str(checkpoint))
+    assert resumed.resumed
+    assert [url for _, _, url in resumed] == ['https://x/b', 'https://x/c']
+
+
+def test_finished_file_commits_to_end(tmp_path):
+    urls_file = tmp_path / 'urls.txt'
+    checkpoint = tmp_path / 'checkpoint.json'
+    write_urls(urls_file, ['https://x/a', 'https://x/b', ''])
+
+    feed = UrlFeed(str(urls_file), str(checkpoint))
+    for _, offset, _ in feed:
+        feed.done(offset)
+    feed.close()
+    assert feed.committed_offset == urls_file.stat().st_size
+    assert list(UrlFeed(str(urls_file), str(checkpoint))) == []
+
+
+def test_checkpoint_ignored_for_replaced_file(tmp_path):
+    urls_file = tmp_path / 'urls.txt'
+    checkpoint = tmp_path / 'checkpoint.json'
+    write_urls(urls_file, ['https://x/a', 'https://x/b', 'https://x/c'])
+    feed = UrlFeed(str(urls_file), str(checkpoint))
+    for _, offset, _ in feed:
+        feed.done(offset)
+    feed.close()
+
+    # 换成更短的文件后从头读取
+    write_urls(urls_file, ['https://x/d'])
+    assert [url for _, _, url in UrlFeed(str(urls_file), str(checkpoint))] == ['https://x/d']
+
+
+def test_line_range(tmp_path):
+    urls_file = tmp_path / 'urls.txt'
+    write_urls(urls_file, [f'https://x/{i}' for i in range(5)])
+    feed = UrlFeed(str(urls_file), start_line=1, end_line=3)
+    assert [(line, url) for line, _, url in feed] == [(1, 'https://x/1'), (2, 'https://x/2')]
@@ -0,0 +1,85 @@
+"""分片抓取的工作队列：租约、续约、重试"""
+
+import time
+
+import pytest
+
+from cambridge_dict.utils.work_queue import WorkQueue, read_chunk_urls
+
+
+@pytest.fixture
+def urls_file(tmp_path):
+    path = tmp_path / 'urls.txt'
+    path.write_text(''.join(f'https://x/{i}\n' for i in range(5)) + '\n', encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def queue(tmp_path, urls_file):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite3'), max_attempts=2)
+    assert queue.create(urls_file, chunk_size=2) == 3
+    yield queue
+    queue.close()
+
+
+def test_create_is_idempotent(queue, urls_file):
+    assert queue.create(urls_file, chunk_size=2) == 3
+    chunk = queue.lease('w1')
+    assert read_chunk_urls(urls_file, chunk) == ['https://x/0', 'https://x/1']
+
+
+def test_leases_are_exclusive(queue, urls_file):
+    chunks = [queue.lease('w1'), queue.lease('w2'), queue.lease('w1')]
+    assert [chunk['id'] for chunk in chunks] == [1, 2, 3]
+    assert read_chunk_urls(urls_file, chunks[2]) == ['https://x/4']
+    assert queue.lease('w2') is None
+
+    assert queue.complete(1, 'w1')
+    # 不是自己的租约不能完成
+    assert not queue.complete(2, 'w1')
+    assert queue.progress()['done'] == 1
+
+
+def test_expired_lease_is_reassigned(queue):
+    chunk = queue.lease('w1', lease_seconds=0.01)
+    time.sleep(0.02)
+    assert queue.progress()['expired'] == 1
+    assert queue.lease('w2')['id'] == chunk['id']
+    assert not queue.complete(chunk['id'], 'w1')
+    assert queue.complete(chunk['id'], 'w2')
+
+
+def test_renew_keeps_lease(queue):
+    chunk = queue.lease('w1', lease_seconds=0.01)
+    queue.renew('w1', lease_seconds=60)
+    time.sleep(0.02)
+    assert queue.lease('w2')['id'] != chunk['id']
+
+
+def test_retry_until_failed_then_requeue(queue):
+    chunk = queue.lease('w1')
+    assert queue.retry(chunk['id'], 'w1') == 'pending'
+    assert queue.retry(chunk['id'], 'w2') is None
+
+    assert queue.lease('w2')['id'] == chunk['id']
+    # 领取次数用完
+    assert queue.retry(chunk['id'], 'w2') == 'failed'
+    assert queue.progress()['failed'] == 1
+
+    assert queue.requeue_failed() == 1
+    assert queue.lease('w3')['id'] == chunk['id']
+
+
+def test_release_and_finished(queue):
+    for _ in range(3):
+        queue.lease('w1')
+    queue.release('w1')
+    assert queue.progress()['pending'] == 3
+    assert not queue.finished()
+
+    while True:
+        chunk = queue.lease('w2')
+        if chunk is None:
+            break
+        queue.complete(chunk['id'], 'w2')
+    assert queue.finished()
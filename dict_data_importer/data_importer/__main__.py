@@ -5,6 +5,7 @@ import logging
 
 try:
     from .importer import CambridgeDictImporter
+    from .readers import is_data_file
     print("使用相对路径包")
 except ImportError:
     # 当作为脚本直接运行时，添加父目录到 Python 路径
@@ -12,6 +13,7 @@ except ImportError:
     parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     sys.path.append(parent_dir)
     from dict_data_importer.data_importer.importer import CambridgeDictImporter
+    from dict_data_importer.data_importer.readers import is_data_file
 
 # 配置日志记录
 logging.basicConfig(
@@ -25,10 +27,28 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def run_import(input_path: str, dict_uuid: str):
+def _data_files(input_path: str) -> list:
+    """输入路径下要导入的文件"""
+    if os.path.isdir(input_path):
+        return [
+            os.path.join(input_path, filename)
+            for filename in sorted(os.listdir(input_path)) if is_data_file(filename)
+        ]
+    return [input_path]
+
+
+def run_import(input_path: str, dict_uuid: str, batch_size: int = 1000, bulk: bool = True,
+               load_data: bool = False, spill_dir: str = 'import_spill', workers: int = 1,
+               pipeline_writers: int = 0):
     if not dict_uuid:
         raise ValueError("必须提供词典UUID")
 
+    if workers > 1 and (load_data or not bulk):
+        raise ValueError("--workers 不能与 --load-data 或 --orm 同时使用")
+
+    if pipeline_writers and not bulk:
+        raise ValueError("--pipeline 不能与 --orm 同时使用")
+
     if not input_path:
         raise ValueError("必须提供输入路径")
     
@@ -39,15 +59,25 @@ def run_import(input_path: str, dict_uuid: str):
         logger.error(f"错误: 路径 '{input_path}' 不存在")
         return
 
-    importer = CambridgeDictImporter(dict_uuid=dict_uuid)
+    importer = CambridgeDictImporter(dict_uuid=dict_uuid, bulk=bulk, pipeline_writers=pipeline_writers)
+
+    if load_data:
+        file_paths = _data_files(input_path)
+        logger.info(f"使用 LOAD DATA 导入 {len(file_paths)} 个文件")
+        importer.load_files(file_paths, spill_dir, batch_size)
+        return
+
+    if workers > 1 and os.path.isdir(input_path):
+        importer.import_files_parallel(_data_files(input_path), workers, batch_size)
+        return
     
     if os.path.isfile(input_path):
         logger.info(f"开始导入文件: {input_path}")
-        importer.import_file(input_path)
+        importer.import_file(input_path, batch_size)
         logger.info(f"完成导入文件: {input_path}")
     elif os.path.isdir(input_path):
         logger.info(f"开始导入目录: {input_path}")
-        importer.import_directory(input_path)
+        importer.import_directory(input_path, batch_size)
         logger.info(f"完成导入目录: {input_path}")
     else:
         logger.error(f"错误: '{input_path}' 既不是文件也不是目录")
@@ -69,10 +99,58 @@ def main():
         required=True,
         help='指定词典的UUID（必需）'
     )
+
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1000,
+        help='每批提交的词条数（默认1000）'
+    )
+
+    parser.add_argument(
+        '--orm',
+        action='store_true',
+        help='逐条使用 ORM 写入（默认批量多行 INSERT）'
+    )
+
+    parser.add_argument(
+        '--load-data',
+        action='store_true',
+        help='整部词典首次导入：生成临时文件后用 LOAD DATA LOCAL INFILE 装载'
+    )
+
+    parser.add_argument(
+        '--spill-dir',
+        default='import_spill',
+        help='--load-data 的临时文件目录（默认 import_spill）'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='并行导入目录下文件的进程数（默认1，不并行）'
+    )
+
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='流水线导入：解析和写入数据库在不同线程中同时进行'
+    )
+
+    parser.add_argument(
+        '--writers',
+        type=int,
+        choices=[1, 2],
+        default=1,
+        help='--pipeline 的写入连接数（默认1）'
+    )
     
     try:
         args = parser.parse_args()
-        run_import(args.input_path, args.dict_uuid)
+        run_import(args.input_path, args.dict_uuid, args.batch_size, bulk=not args.orm,
+                   load_data=args.load_data, spill_dir=args.spill_dir, workers=args.workers,
+                   pipeline_writers=args.writers if args.pipeline else 0)
     except Exception as e:
         parser.error(str(e))
 
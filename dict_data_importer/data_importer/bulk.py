@@ -0,0 +1,124 @@
+"""批量写入
+
+一批单词的 dict_word / dict_entry / dict_sense 行先在内存中组装成元组，
+UUID 在客户端生成，词条和词义不需要等数据库返回主键；然后每张表用多行
+INSERT ... VALUES (...), (...) 写入，一批只需要几次数据库往返。
+
+新单词的 UUID 由词典 UUID 和单词（word_key 规范化后）确定（uuid5），多个进程同时导入时同一个单词
+得到相同的 UUID，重复的单词行用 INSERT IGNORE 跳过，词条仍然指向同一个单词。
+"""
+
+import uuid
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection
+
+from .models import DictEntry, DictSense, DictWord
+from .word_index import word_key
+
+WORD_COLUMNS = ('uuid', 'dict_uuid', 'word', 'url', 'created_at', 'updated_at')
+ENTRY_COLUMNS = (
+    'uuid', 'word_uuid', 'part_of_speech', 'uk_pronunciation', 'uk_audio_url',
+    'us_pronunciation', 'us_audio_url', 'created_at', 'updated_at',
+)
+SENSE_COLUMNS = (
+    'uuid', 'entry_uuid', 'guide_word', 'definition', 'translation', 'cefr_level',
+    'attribute', 'examples', 'more_examples', 'sense_order', 'created_at', 'updated_at',
+)
+
+# 单条 INSERT 语句最多包含的行数，避免超过 MySQL 的 max_allowed_packet
+DEFAULT_ROWS_PER_STATEMENT = 1000
+
+
+def stable_word_uuid(dict_uuid: str, word: str) -> str:
+    """新单词的 UUID，同一词典中的同一个单词（按数据库的比较规则）总是相同"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f'{dict_uuid}/{word_key(word)}'))
+
+
+def _process_pronunciation(pron_data: Optional[Dict]) -> Tuple[str, str]:
+    """处理发音数据"""
+    if not pron_data:
+        return '', ''
+    return pron_data.get('pron', '').strip('/'), pron_data.get('audio_url', '')
+
+
+class RowBatch:
+    """一批单词的待写入行"""
+
+    def __init__(self, dict_uuid: str):
+        self.dict_uuid = dict_uuid
+        self.now = datetime.now()
+        # 本批新建的单词（word_key） -> uuid，提交成功后再合并到单词索引
+        self.new_word_uuids: Dict[str, str] = {}
+        self.words: List[tuple] = []
+        self.entries: List[tuple] = []
+        self.senses: List[tuple] = []
+        self.records = 0
+
+    def add_word_data(self, word_data: Dict, word_uuids: Mapping[str, str]) -> None:
+        """组装一条词条数据的行
+
+        word_uuids: 数据库中已有的单词 -> uuid（例如 WordUuidIndex），按 word_key 查找，本批不会修改它。
+        """
+        word_text = word_data['word']
+        key = word_key(word_text)
+        word_uuid = self.new_word_uuids.get(key) or word_uuids.get(key)
+        if word_uuid is None:
+            word_uuid = stable_word_uuid(self.dict_uuid, word_text)
+            self.new_word_uuids[key] = word_uuid
+            self.words.append((
+                word_uuid, self.dict_uuid, word_text, word_data.get('url', ''), self.now, self.now
+            ))
+        self.records += 1
+
+        # 如果数据结构是完整的词条
+        if 'part_of_speech' not in word_data:
+            return
+        uk_pron, uk_audio = _process_pronunciation(word_data.get('uk_pronunciation'))
+        us_pron, us_audio = _process_pronunciation(word_data.get('us_pronunciation'))
+        entry_uuid = str(uuid.uuid4())
+        self.entries.append((
+            entry_uuid, word_uuid, word_data.get('part_of_speech', ''),
+            uk_pron, uk_audio, us_pron, us_audio, self.now, self.now
+        ))
+        for idx, sense_data in enumerate(word_data.get('senses', [])):
+            for definition_data in sense_data.get('definitions', []):
+                self.senses.append((
+                    str(uuid.uuid4()), entry_uuid,
+                    sense_data.get('guide_word', ''),
+                    definition_data.get('definition', ''),
+                    definition_data.get('def_translation', ''),
+                    definition_data.get('level', ''),
+                    definition_data.get('attribute', ''),
+                    definition_data.get('examples', []),
+                    sense_data.get('more_examples'),
+                    idx, self.now, self.now
+                ))
+
+    def __len__(self) -> int:
+        return self.records
+
+
+def insert_rows(conn: Connection, table: Table, columns: Sequence[str], rows: Sequence[tuple],
+                rows_per_statement: int = DEFAULT_ROWS_PER_STATEMENT, ignore: bool = False) -> None:
+    """用多行 INSERT 写入，每条语句最多 rows_per_statement 行；ignore 时跳过唯一键重复的行"""
+    statement = table.insert()
+    if ignore:
+        statement = statement.prefix_with('IGNORE')
+    for start in range(0, len(rows), rows_per_statement):
+        chunk = rows[start:start + rows_per_statement]
+        conn.execute(statement.values([dict(zip(columns, row)) for row in chunk]))
+
+
+def write_batch(conn: Connection, batch: RowBatch,
+                rows_per_statement: int = DEFAULT_ROWS_PER_STATEMENT, ignore_duplicate_words: bool = False) -> None:
+    """按外键顺序写入一批行（调用方负责事务）
+
+    ignore_duplicate_words: 其他进程可能同时写入同一个单词时使用，单词行用 INSERT IGNORE。
+    """
+    insert_rows(conn, DictWord.__table__, WORD_COLUMNS, batch.words, rows_per_statement,
+                ignore=ignore_duplicate_words)
+    insert_rows(conn, DictEntry.__table__, ENTRY_COLUMNS, batch.entries, rows_per_statement)
+    insert_rows(conn, DictSense.__table__, SENSE_COLUMNS, batch.senses, rows_per_statement)
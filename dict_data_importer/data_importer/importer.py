@@ -1,13 +1,26 @@
 import json
 import os
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 import logging
+import multiprocessing
+from collections import ChainMap
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, Session
-import ijson
 
 from ..config import DBConfig
 from .models import Base, DictWord, DictEntry, DictSense
+from .bulk import RowBatch, stable_word_uuid, write_batch
+from .load_data import (
+    LOCAL_INFILE_REJECTED, LoadDataMismatch, SpillWriter, create_load_engine, load_spill_files,
+    local_infile_enabled, rebuild_pending_indexes
+)
+from .migrations import run_migrations
+from .pipeline import WritePipeline
+from .word_index import WordUuidIndex, word_key
+from .readers import iter_word_data, is_data_file
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,17 +33,39 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class CambridgeDictImporter:
-    def __init__(self, dict_uuid: str):
+    def __init__(self, dict_uuid: str, bulk: bool = True, migrate: bool = True, pipeline_writers: int = 0):
         if not dict_uuid:
             raise ValueError("必须提供词典UUID")
             
         logger.info(f"初始化导入器，词典UUID: {dict_uuid}")
         self.engine = create_engine(DBConfig.get_connection_url(), pool_recycle=3600)
         self.SessionLocal = sessionmaker(bind=self.engine)
-        Base.metadata.create_all(self.engine)
+        if migrate:
+            # 并行导入的工作进程由主进程建表和迁移
+            Base.metadata.create_all(self.engine)
+            run_migrations(self.engine)
+            rebuild_pending_indexes(self.engine)
         self.dict_uuid = dict_uuid
+        # 批量写入：客户端生成UUID，每批每张表一条多行INSERT；False 时使用逐条 ORM 写入
+        self.bulk = bulk
+        # 单词 -> uuid，第一次导入时读取，之后随新单词更新，多个文件共用
+        self._word_index: Optional[WordUuidIndex] = None
+        # ORM 写入时尚未提交的新单词
+        self._uncommitted_words: Dict[str, str] = {}
+        # 其他进程可能同时写入同一个单词（并行导入）
+        self.ignore_duplicate_words = False
+        # 流水线导入的写入连接数，0 表示读取和写入在同一个线程中交替进行
+        self.pipeline_writers = pipeline_writers
         logger.info("数据库连接已建立")
 
+    @property
+    def word_index(self) -> WordUuidIndex:
+        if self._word_index is None:
+            with self.engine.connect() as conn:
+                self._word_index = WordUuidIndex.load(conn, self.dict_uuid)
+            logger.info(f"已加载词典中的 {len(self._word_index)} 个单词")
+        return self._word_index
+
     def _get_or_create_dict_uuid(self) -> str:
         """获取英语-简体中文词典的UUID"""
         with self.SessionLocal() as session:
@@ -48,31 +83,41 @@ class CambridgeDictImporter:
             return '', ''
         return pron_data.get('pron', '').strip('/'), pron_data.get('audio_url', '')
 
-    def _create_word(self, session: Session, word_data: Dict) -> DictWord:
-        """创建或获取单词记录"""
-        word = session.query(DictWord).filter_by(
-            word=word_data['word'],
-            dict_uuid=self.dict_uuid
-        ).first()
+    def _create_word(self, session: Session, word_data: Dict) -> str:
+        """创建或获取单词记录，返回单词uuid"""
+        word_text = word_data['word']
+        key = word_key(word_text)
+        word_uuid = self._uncommitted_words.get(key) or self.word_index.get(key)
         
-        if not word:
-            word = DictWord(
+        if not word_uuid:
+            word_uuid = stable_word_uuid(self.dict_uuid, word_text)
+            session.add(DictWord(
+                uuid=word_uuid,
                 dict_uuid=self.dict_uuid,
-                word=word_data['word'],
+                word=word_text,
                 url=word_data.get('url', '')
-            )
-            session.add(word)
-            session.flush()
+            ))
+            self._uncommitted_words[key] = word_uuid
         
-        return word
+        return word_uuid
+
+    def _commit(self, session: Session) -> None:
+        """提交并把新单词加入单词索引"""
+        session.commit()
+        self.word_index.update(self._uncommitted_words)
+        self._uncommitted_words = {}
+
+    def _rollback(self, session: Session) -> None:
+        session.rollback()
+        self._uncommitted_words = {}
 
-    def _create_entry(self, session: Session, word: DictWord, entry_data: Dict) -> DictEntry:
+    def _create_entry(self, session: Session, word_uuid: str, entry_data: Dict) -> DictEntry:
         """创建词条记录"""
         uk_pron, uk_audio = self._process_pronunciation(entry_data.get('uk_pronunciation'))
         us_pron, us_audio = self._process_pronunciation(entry_data.get('us_pronunciation'))
         
         entry = DictEntry(
-            word_uuid=word.uuid,
+            word_uuid=word_uuid,
             part_of_speech=entry_data.get('part_of_speech', ''),
             uk_pronunciation=uk_pron,
             uk_audio_url=uk_audio,
@@ -100,48 +145,224 @@ class CambridgeDictImporter:
                 )
                 session.add(sense)
 
-    def import_file(self, file_path: str, batch_size: int = 100) -> None:
-        """导入单个JSON文件
+    def import_file(self, file_path: str, batch_size: int = 100) -> int:
+        """导入单个JSON/JSONL文件，返回导入的单词数
         
         Args:
-            file_path: JSON文件路径
+            file_path: JSON或JSONL文件路径
             batch_size: 批处理大小，默认100条记录提交一次
         """
+        if self.bulk and self.pipeline_writers:
+            return self._import_file_pipelined(file_path, batch_size)
+        if self.bulk:
+            return self._import_file_bulk(file_path, batch_size)
+        return self._import_file_orm(file_path, batch_size)
+
+    def _import_file_bulk(self, file_path: str, batch_size: int) -> int:
+        """批量导入单个文件"""
         logger.info(f"开始导入文件: {file_path}")
         total_words = 0
         try:
-            with open(file_path, 'rb') as f:
-                # 使用ijson流式解析JSON数组
-                parser = ijson.items(f, 'item')
-                
-                with self.SessionLocal() as session:
-                    batch_count = 0
-                    for word_data in parser:
-                        try:
-                            self._process_word_data(session, word_data)
-                            batch_count += 1
-                            total_words += 1
+            records = []
+            for word_data in iter_word_data(file_path):
+                records.append(word_data)
+                if len(records) >= batch_size:
+                    written = self._write_records(records)
+                    total_words += written
+                    logger.info(f"已提交批次数据，本批次处理了 {written} 个单词，总计处理: {total_words} 个单词")
+                    records = []
+
+            # 处理剩余的记录
+            if records:
+                written = self._write_records(records)
+                total_words += written
+                logger.info(f"已提交最后一批数据，本批次处理了 {written} 个单词")
+
+            logger.info(f"文件 {file_path} 导入完成，总共处理了 {total_words} 个单词")
+
+        except Exception as e:
+            logger.error(f"处理文件 {file_path} 时发生错误: {str(e)}")
+        return total_words
+
+    def _write_records(self, records: List[Dict]) -> int:
+        """写入一批词条数据，返回成功写入的条数
+
+        整批写入失败时逐条重试，只跳过出错的单词。
+        """
+        try:
+            self._write_batch(records)
+            return len(records)
+        except Exception as e:
+            logger.warning(f"批量写入失败，逐条重试: {str(e)}")
+        return self._write_each(records)
+
+    def _write_each(self, records: List[Dict], ignore_duplicate_words: bool = False) -> int:
+        """逐条写入，跳过出错的单词"""
+        written = 0
+        for word_data in records:
+            try:
+                self._write_batch([word_data], ignore_duplicate_words)
+                written += 1
+            except Exception as e:
+                logger.error(f"导入单词 {word_data.get('word', 'unknown')} 时发生错误: {str(e)}")
+        return written
+
+    def _write_batch(self, records: List[Dict], ignore_duplicate_words: bool = False) -> None:
+        """在一个事务中写入一批词条数据，每张表多行INSERT"""
+        batch = RowBatch(self.dict_uuid)
+        for word_data in records:
+            batch.add_word_data(word_data, self.word_index)
+        self._write_rows(batch, ignore_duplicate_words)
+
+    def _write_rows(self, batch: RowBatch, ignore_duplicate_words: bool = False) -> None:
+        with self.engine.begin() as conn:
+            write_batch(conn, batch, ignore_duplicate_words=ignore_duplicate_words or self.ignore_duplicate_words)
+        self.word_index.update(batch.new_word_uuids)
+
+    def _import_file_pipelined(self, file_path: str, batch_size: int) -> int:
+        """流水线导入单个文件：当前线程解析并组装行，写入线程执行 INSERT"""
+        logger.info(f"开始导入文件: {file_path}（流水线，{self.pipeline_writers} 个写入连接）")
+        # 读取只把已经提交的单词（写入线程提交后加入单词索引）视为已有：
+        # 还在队列中或正在写入的批次可能失败回滚，后面的批次引用的单词要自己带上单词行。
+        # 新单词的 uuid 由单词确定，单词行重复时 INSERT IGNORE 跳过，仍指向同一行。
+        total_words = 0
+
+        def write(item: Tuple[List[Dict], RowBatch]) -> int:
+            records, batch = item
+            try:
+                self._write_rows(batch, ignore_duplicate_words=True)
+                return len(records)
+            except Exception as e:
+                logger.warning(f"批量写入失败，逐条重试: {str(e)}")
+                return self._write_each(records, ignore_duplicate_words=True)
+
+        pipeline = WritePipeline(write, writers=self.pipeline_writers)
+        started = time.monotonic()
+        try:
+            with pipeline:
+                records: List[Dict] = []
+                batch = RowBatch(self.dict_uuid)
+                for word_data in iter_word_data(file_path):
+                    try:
+                        batch.add_word_data(word_data, self.word_index)
+                    except Exception as e:
+                        logger.error(f"导入单词 {word_data.get('word', 'unknown')} 时发生错误: {str(e)}")
+                        continue
+                    records.append(word_data)
+                    if len(batch) >= batch_size:
+                        pipeline.put((records, batch))
+                        total_words += len(records)
+                        records, batch = [], RowBatch(self.dict_uuid)
+                if records:
+                    pipeline.put((records, batch))
+                    total_words += len(records)
+        except Exception as e:
+            logger.error(f"处理文件 {file_path} 时发生错误: {str(e)}")
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"文件 {file_path} 导入完成，读取 {total_words} 个单词，写入 {pipeline.written} 个，"
+            f"用时 {elapsed:.1f} 秒；读取等待写入 {pipeline.read_wait:.1f} 秒，"
+            f"写入等待读取 {pipeline.write_wait:.1f} 秒"
+        )
+        return pipeline.written
+
+    def load_files(self, file_paths: List[str], spill_dir: str, batch_size: int = 1000) -> None:
+        """用 LOAD DATA LOCAL INFILE 导入多个文件（整部词典首次导入）
+
+        词条数据先写入 spill_dir 下各表的 TSV 文件，再一次性装载；
+        服务器没有开启 local_infile 时改为逐个文件批量 INSERT。
+        """
+        load_engine = create_load_engine()
+        if not local_infile_enabled(load_engine):
+            logger.warning("服务器未开启 local_infile，改用多行 INSERT 导入")
+            load_engine.dispose()
+            for file_path in file_paths:
+                self._import_file_bulk(file_path, batch_size)
+            return
+
+        logger.info(f"开始生成临时文件: {spill_dir}")
+        spill = SpillWriter(spill_dir)
+        # 之前批次的新单词还没有写入数据库，也要参与去重
+        new_word_uuids: Dict[str, str] = {}
+        known_words = ChainMap(new_word_uuids, self.word_index)
+        total_words = 0
+        try:
+            for file_path in file_paths:
+                batch = RowBatch(self.dict_uuid)
+                for word_data in iter_word_data(file_path):
+                    try:
+                        batch.add_word_data(word_data, known_words)
+                        total_words += 1
+                    except Exception as e:
+                        logger.error(f"导入单词 {word_data.get('word', 'unknown')} 时发生错误: {str(e)}")
+                        continue
+                    if len(batch) >= batch_size:
+                        spill.write_batch(batch)
+                        new_word_uuids.update(batch.new_word_uuids)
+                        batch = RowBatch(self.dict_uuid)
+                spill.write_batch(batch)
+                new_word_uuids.update(batch.new_word_uuids)
+                logger.info(f"已读取文件 {file_path}，总计 {total_words} 个词条")
+        finally:
+            spill.close()
+
+        logger.info(f"临时文件生成完成: {spill.counts}")
+        try:
+            load_spill_files(load_engine, spill)
+        except OperationalError as e:
+            if e.orig is None or e.orig.args[0] not in LOCAL_INFILE_REJECTED:
+                raise
+            # 客户端或服务器拒绝了 LOCAL INFILE（装载事务已回滚）
+            logger.warning(f"LOAD DATA 被拒绝，改用多行 INSERT 导入: {str(e)}")
+            for file_path in file_paths:
+                self._import_file_bulk(file_path, batch_size)
+            return
+        except LoadDataMismatch as e:
+            # 有行被跳过（例如重复键），装载事务已回滚，多行 INSERT 会报告具体的错误
+            logger.warning(f"LOAD DATA 写入的行数不一致，改用多行 INSERT 导入: {str(e)}")
+            for file_path in file_paths:
+                self._import_file_bulk(file_path, batch_size)
+            return
+        finally:
+            load_engine.dispose()
+        self.word_index.update(new_word_uuids)
+        logger.info(f"LOAD DATA 导入完成，共 {total_words} 个词条")
+
+    def _import_file_orm(self, file_path: str, batch_size: int) -> int:
+        """逐条使用 ORM 导入单个文件"""
+        logger.info(f"开始导入文件: {file_path}")
+        total_words = 0
+        try:
+            with self.SessionLocal() as session:
+                batch_count = 0
+                for word_data in iter_word_data(file_path):
+                    try:
+                        self._process_word_data(session, word_data)
+                        batch_count += 1
+                        total_words += 1
+                        
+                        # 达到批处理大小时提交
+                        if batch_count >= batch_size:
+                            self._commit(session)
+                            logger.info(f"已提交批次数据，本批次处理了 {batch_count} 个单词，总计处理: {total_words} 个单词")
+                            batch_count = 0
                             
-                            # 达到批处理大小时提交
-                            if batch_count >= batch_size:
-                                session.commit()
-                                logger.info(f"已提交批次数据，本批次处理了 {batch_count} 个单词，总计处理: {total_words} 个单词")
-                                batch_count = 0
-                                
-                        except Exception as e:
-                            session.rollback()
-                            logger.error(f"导入单词 {word_data.get('word', 'unknown')} 时发生错误: {str(e)}")
-                            continue
-                    
-                    # 处理剩余的记录
-                    if batch_count > 0:
-                        session.commit()
-                        logger.info(f"已提交最后一批数据，本批次处理了 {batch_count} 个单词")
+                    except Exception as e:
+                        self._rollback(session)
+                        logger.error(f"导入单词 {word_data.get('word', 'unknown')} 时发生错误: {str(e)}")
+                        continue
+                
+                # 处理剩余的记录
+                if batch_count > 0:
+                    self._commit(session)
+                    logger.info(f"已提交最后一批数据，本批次处理了 {batch_count} 个单词")
                         
             logger.info(f"文件 {file_path} 导入完成，总共处理了 {total_words} 个单词")
                         
         except Exception as e:
             logger.error(f"处理文件 {file_path} 时发生错误: {str(e)}")
+        return total_words
 
     def _process_word_data(self, session: Session, word_data: Dict) -> None:
         """处理单个单词的数据"""
@@ -149,28 +370,80 @@ class CambridgeDictImporter:
         logger.debug(f"正在处理单词: {word_text}")
         
         # 创建单词
-        word = self._create_word(session, word_data)
+        word_uuid = self._create_word(session, word_data)
         
         # 如果数据结构是完整的词条
         if 'part_of_speech' in word_data:
-            entry = self._create_entry(session, word, word_data)
+            entry = self._create_entry(session, word_uuid, word_data)
             if 'senses' in word_data:
                 self._create_senses(session, entry, word_data['senses'])
         
         logger.debug(f"单词 {word_text} 处理完成")
 
-    def import_directory(self, directory_path: str) -> None:
-        """导入目录下的所有JSON文件"""
+    def import_directory(self, directory_path: str, batch_size: int = 100) -> None:
+        """导入目录下的所有JSON/JSONL文件"""
         logger.info(f"开始导入目录: {directory_path}")
-        total_files = len([f for f in os.listdir(directory_path) if f.endswith('.json')])
+        total_files = len([f for f in os.listdir(directory_path) if is_data_file(f)])
         processed_files = 0
         
         for filename in os.listdir(directory_path):
-            if filename.endswith('.json'):
+            if is_data_file(filename):
                 processed_files += 1
                 file_path = os.path.join(directory_path, filename)
                 logger.info(f"正在处理第 {processed_files}/{total_files} 个文件: {filename}")
-                self.import_file(file_path)
+                self.import_file(file_path, batch_size)
                 logger.info(f"完成处理文件: {filename}")
         
         logger.info(f"目录 {directory_path} 导入完成，共处理了 {processed_files} 个文件")
+
+    def import_files_parallel(self, file_paths: List[str], workers: int, batch_size: int = 1000) -> None:
+        """用进程池并行导入多个文件
+
+        每个工作进程有自己的数据库连接和单词索引；文件按大小从大到小调度，
+        避免最大的文件最后才开始。新单词的 uuid 由单词确定，多个进程写入同一个
+        单词时得到相同的 uuid，重复的单词行被跳过。
+        """
+        file_paths = sorted(file_paths, key=os.path.getsize, reverse=True)
+        logger.info(f"使用 {workers} 个进程并行导入 {len(file_paths)} 个文件")
+        # 工作进程使用 spawn 启动，不继承主进程的数据库连接
+        self.engine.dispose()
+        started = time.monotonic()
+        total_words = 0
+        finished = 0
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(self.dict_uuid, self.pipeline_writers)) as executor:
+            futures = [executor.submit(_import_file_in_worker, file_path, batch_size) for file_path in file_paths]
+            for future in as_completed(futures):
+                file_path, words, seconds = future.result()
+                finished += 1
+                total_words += words
+                elapsed = time.monotonic() - started
+                logger.info(
+                    f"完成 {finished}/{len(file_paths)} 个文件 {os.path.basename(file_path)}: "
+                    f"{words} 个单词，用时 {seconds:.1f} 秒；累计 {total_words} 个单词，"
+                    f"{total_words / elapsed:.0f} 个/秒"
+                )
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"并行导入完成: {finished} 个文件，{total_words} 个单词，用时 {elapsed:.1f} 秒，"
+            f"平均 {total_words / elapsed if elapsed else 0:.0f} 个/秒（{workers} 个进程）"
+        )
+
+
+# 工作进程中的导入器，由进程池的 initializer 创建
+_worker_importer: Optional[CambridgeDictImporter] = None
+
+
+def _init_worker(dict_uuid: str, pipeline_writers: int = 0) -> None:
+    global _worker_importer
+    _worker_importer = CambridgeDictImporter(dict_uuid, bulk=True, migrate=False, pipeline_writers=pipeline_writers)
+    _worker_importer.ignore_duplicate_words = True
+
+
+def _import_file_in_worker(file_path: str, batch_size: int) -> Tuple[str, int, float]:
+    """在工作进程中导入一个文件，返回 (文件, 单词数, 用时秒数)"""
+    started = time.monotonic()
+    words = _worker_importer.import_file(file_path, batch_size)
+    return file_path, words, time.monotonic() - started
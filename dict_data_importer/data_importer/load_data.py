@@ -0,0 +1,230 @@
+"""LOAD DATA LOCAL INFILE 导入
+
+整部词典首次导入时使用：词条数据先按表写入 TSV 临时文件（列与 bulk.RowBatch 相同），
+然后每张表一条 LOAD DATA LOCAL INFILE 装载。装载前删除非唯一的二级索引
+（包括全文索引），装载完成后每张表一条 ALTER TABLE 重新建立，比逐行维护索引快得多。
+
+删除前先把索引定义记录到 pending_index_rebuilds 表，重建完成后删除记录。
+进程在重建之前被杀掉或断开连接时，下次启动导入器（rebuild_pending_indexes）会补建。
+
+服务器没有开启 local_infile 时由调用方改用多行 INSERT。
+LOCAL 模式下重复键等错误只会变成警告并跳过该行，所以每张表装载后核对写入的行数，
+不一致时回滚整个装载事务并抛出 LoadDataMismatch，同样由调用方改用多行 INSERT。
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Sequence
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, create_engine, delete, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from ..config import DBConfig
+from .bulk import ENTRY_COLUMNS, SENSE_COLUMNS, WORD_COLUMNS, RowBatch
+
+logger = logging.getLogger(__name__)
+
+# (表名, 列, 临时文件名)，按外键顺序装载
+TABLES = (
+    ('dict_word', WORD_COLUMNS, 'dict_word.tsv'),
+    ('dict_entry', ENTRY_COLUMNS, 'dict_entry.tsv'),
+    ('dict_sense', SENSE_COLUMNS, 'dict_sense.tsv'),
+)
+
+# 装载期间删除、还没有重建的索引
+_metadata = MetaData()
+pending_index_rebuilds = Table(
+    'pending_index_rebuilds', _metadata,
+    Column('table_name', String(64), primary_key=True),
+    Column('index_name', String(64), primary_key=True),
+    Column('definition', Text, nullable=False),
+    Column('dropped_at', DateTime, nullable=False, default=datetime.now),
+)
+
+# 客户端或服务器不允许 LOCAL INFILE 时的错误码
+LOCAL_INFILE_REJECTED = (1148, 2068, 3948)
+
+
+class LoadDataMismatch(Exception):
+    """LOAD DATA 写入的行数与临时文件的行数不一致（有行被跳过）"""
+
+
+# LOAD DATA 默认格式的转义：反斜杠、制表符、换行、回车和 NUL
+_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, ensure_ascii=False)
+    return str(value).translate(_ESCAPES)
+
+
+class SpillWriter:
+    """把 RowBatch 的行追加写入各表的 TSV 文件"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.paths = {table: os.path.join(directory, filename) for table, _, filename in TABLES}
+        self.files = {
+            table: open(path, 'w', encoding='utf-8', newline='\n')
+            for table, path in self.paths.items()
+        }
+        self.counts = {table: 0 for table in self.paths}
+
+    def write_batch(self, batch: RowBatch) -> None:
+        for table, rows in (('dict_word', batch.words), ('dict_entry', batch.entries), ('dict_sense', batch.senses)):
+            f = self.files[table]
+            for row in rows:
+                f.write('\t'.join(_format_value(value) for value in row))
+                f.write('\n')
+            self.counts[table] += len(rows)
+
+    def close(self) -> None:
+        for f in self.files.values():
+            f.close()
+
+
+def create_load_engine() -> Engine:
+    """允许 LOCAL INFILE 的连接（客户端默认关闭）"""
+    return create_engine(DBConfig.get_connection_url(), pool_recycle=3600, connect_args={'local_infile': True})
+
+
+def local_infile_enabled(engine: Engine) -> bool:
+    """服务器是否允许 LOAD DATA LOCAL INFILE"""
+    try:
+        with engine.connect() as conn:
+            return bool(int(conn.execute(text('SELECT @@GLOBAL.local_infile')).scalar()))
+    except Exception as e:
+        logger.warning(f"无法检查 local_infile: {str(e)}")
+        return False
+
+
+def _secondary_indexes(conn: Connection, table: str) -> List[Dict]:
+    """表上可以暂时删除的索引：非唯一，且不是外键需要的索引"""
+    inspector = inspect(conn)
+    foreign_keys = [fk['constrained_columns'] for fk in inspector.get_foreign_keys(table)]
+    return [
+        {
+            'name': index['name'],
+            'column_names': index['column_names'],
+            'prefix': index.get('dialect_options', {}).get('mysql_prefix'),
+        }
+        for index in inspector.get_indexes(table)
+        if not index.get('unique')
+        and not any(index['column_names'][:len(columns)] == columns for columns in foreign_keys)
+    ]
+
+
+def _index_clause(index: Dict) -> str:
+    prefix = index['prefix']
+    columns = ', '.join(f'`{column}`' for column in index['column_names'])
+    kind = f'{prefix} INDEX' if prefix else 'INDEX'
+    return f'ADD {kind} `{index["name"]}` ({columns})'
+
+
+def drop_secondary_indexes(conn: Connection, tables: Sequence[str]) -> Dict[str, List[Dict]]:
+    """删除二级索引，返回删除的索引定义，用于之后重建
+
+    删除之前先提交到 pending_index_rebuilds，进程中途退出时索引定义不会丢失。
+    """
+    _metadata.create_all(conn)
+    dropped = {}
+    for table in tables:
+        indexes = _secondary_indexes(conn, table)
+        if indexes:
+            conn.execute(pending_index_rebuilds.insert().prefix_with('IGNORE').values([
+                {
+                    'table_name': table, 'index_name': index['name'],
+                    'definition': json.dumps(index), 'dropped_at': datetime.now(),
+                }
+                for index in indexes
+            ]))
+            conn.commit()
+            conn.execute(text(
+                f'ALTER TABLE `{table}` ' + ', '.join(f'DROP INDEX `{index["name"]}`' for index in indexes)
+            ))
+            logger.info(f"已暂时删除 {table} 的索引: {', '.join(index['name'] for index in indexes)}")
+        dropped[table] = indexes
+    return dropped
+
+
+def rebuild_indexes(conn: Connection, dropped: Dict[str, List[Dict]]) -> None:
+    """重建删除的索引：普通索引每张表一条 ALTER TABLE，全文索引逐个建立（InnoDB 不支持一次添加多个）
+
+    已经存在的索引跳过，每张表重建完成后删除 pending_index_rebuilds 中的记录。
+    """
+    inspector = inspect(conn)
+    for table, indexes in dropped.items():
+        if not indexes:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        missing = [index for index in indexes if index['name'] not in existing]
+        regular = [index for index in missing if not index['prefix']]
+        others = [index for index in missing if index['prefix']]
+        if regular:
+            conn.execute(text(f'ALTER TABLE `{table}` ' + ', '.join(_index_clause(index) for index in regular)))
+        for index in others:
+            conn.execute(text(f'ALTER TABLE `{table}` {_index_clause(index)}'))
+        conn.execute(delete(pending_index_rebuilds).where(
+            pending_index_rebuilds.c.table_name == table,
+            pending_index_rebuilds.c.index_name.in_([index['name'] for index in indexes]),
+        ))
+        conn.commit()
+        if missing:
+            logger.info(f"已重建 {table} 的索引: {', '.join(index['name'] for index in missing)}")
+
+
+def rebuild_pending_indexes(engine: Engine) -> None:
+    """重建上次装载中途退出时没有重建的索引"""
+    _metadata.create_all(engine)
+    with engine.connect() as conn:
+        dropped: Dict[str, List[Dict]] = {}
+        for table, definition in conn.execute(
+            select(pending_index_rebuilds.c.table_name, pending_index_rebuilds.c.definition)
+        ):
+            dropped.setdefault(table, []).append(json.loads(definition))
+        if dropped:
+            logger.warning(f"上次 LOAD DATA 导入没有完成索引重建，正在补建: {', '.join(dropped)}")
+            rebuild_indexes(conn, dropped)
+
+
+def load_spill_files(engine: Engine, spill: SpillWriter) -> None:
+    """装载临时文件，装载期间删除二级索引，结束后（包括失败时）重建"""
+    tables = [table for table, _, _ in TABLES]
+    # ALTER TABLE 会隐式提交，索引的删除和重建不放在装载事务中
+    with engine.connect() as conn:
+        dropped = drop_secondary_indexes(conn, tables)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text('SET SESSION unique_checks = 0'))
+            conn.execute(text('SET SESSION foreign_key_checks = 0'))
+            for table, columns, _ in TABLES:
+                if not spill.counts[table]:
+                    continue
+                column_list = ', '.join(f'`{column}`' for column in columns)
+                result = conn.execute(
+                    text(
+                        f"LOAD DATA LOCAL INFILE :path INTO TABLE `{table}` CHARACTER SET utf8mb4 "
+                        r"FIELDS TERMINATED BY '\t' ESCAPED BY '\\' LINES TERMINATED BY '\n' "
+                        f"({column_list})"
+                    ),
+                    {'path': spill.paths[table]}
+                )
+                if result.rowcount != spill.counts[table]:
+                    # 抛出异常后 engine.begin 回滚之前装载的表
+                    raise LoadDataMismatch(
+                        f"{table}: 装载了 {result.rowcount} 行，临时文件中有 {spill.counts[table]} 行"
+                    )
+                logger.info(f"已装载 {table}: {spill.counts[table]} 行")
+            conn.execute(text('SET SESSION unique_checks = 1'))
+            conn.execute(text('SET SESSION foreign_key_checks = 1'))
+    finally:
+        with engine.connect() as conn:
+            rebuild_indexes(conn, dropped)
@@ -0,0 +1,64 @@
+"""数据库结构迁移
+
+Base.metadata.create_all 只会创建不存在的表，已有表上新增的索引由这里的迁移补上。
+迁移按顺序执行，执行成功后记录在 schema_migrations 表中，之后不再执行。
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from .models import DictWord
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', String(100), primary_key=True),
+    Column('description', String(255), nullable=False, default=''),
+    Column('applied_at', DateTime, nullable=False, default=datetime.now),
+)
+
+
+def _has_index(conn: Connection, table_name: str, columns: List[str]) -> bool:
+    """表上是否已经有以 columns 开头的索引（包括唯一约束）"""
+    inspector = inspect(conn)
+    indexes = inspector.get_indexes(table_name) + inspector.get_unique_constraints(table_name)
+    return any(index['column_names'][:len(columns)] == columns for index in indexes)
+
+
+def _add_dict_word_index(conn: Connection) -> None:
+    if _has_index(conn, 'dict_word', ['dict_uuid', 'word']):
+        return
+    index = next(index for index in DictWord.__table__.indexes if index.name == 'idx_dict_uuid_word')
+    index.create(conn)
+
+
+# (版本, 说明, 执行函数)，只能在末尾追加
+MIGRATIONS: List[Tuple[str, str, Callable[[Connection], None]]] = [
+    ('0001_dict_word_dict_uuid_word', 'dict_word 添加 (dict_uuid, word) 索引', _add_dict_word_index),
+]
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """执行尚未执行的迁移，返回本次执行的版本"""
+    _metadata.create_all(engine)
+    with engine.connect() as conn:
+        applied = {row[0] for row in conn.execute(select(schema_migrations.c.version))}
+
+    executed = []
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        logger.info(f"执行数据库迁移 {version}: {description}")
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.now()
+            ))
+        executed.append(version)
+    return executed
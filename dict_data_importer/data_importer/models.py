@@ -1,6 +1,6 @@
 from datetime import datetime
 import uuid
-from sqlalchemy import Column, String, DateTime, BigInteger, JSON, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, BigInteger, JSON, Integer, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -20,6 +20,11 @@ class DictWord(Base):
 
     entries = relationship("DictEntry", back_populates="word")
 
+    __table_args__ = (
+        # 按词典查找单词，已有的表由 migrations.py 添加
+        Index('idx_dict_uuid_word', 'dict_uuid', 'word'),
+    )
+
 class DictEntry(Base):
     __tablename__ = 'dict_entry'
 
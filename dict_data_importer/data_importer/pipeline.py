@@ -0,0 +1,96 @@
+"""读取与写入流水线
+
+解析 JSON、组装行（读取）和执行 INSERT（写入）原本在一个线程中交替进行：
+等待 MySQL 时 CPU 空闲，解析时 MySQL 空闲。流水线中读取在调用方线程进行，
+组装好的批次放入有界队列，由一个或多个写入线程（各自一个数据库连接）执行，
+吞吐量接近两者中较慢的一方，而不是两者耗时之和。队列有界，写入跟不上时读取等待，
+内存中最多只有 queue_size 个批次。
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_STOP = object()
+
+
+class WritePipeline(Generic[T]):
+    """有界队列 + 写入线程
+
+    write 在写入线程中执行，返回写入的条数。写入线程抛出异常后不再写入，
+    之后的 put 和 close 在调用方线程重新抛出该异常。
+    """
+
+    def __init__(self, write: Callable[[T], int], writers: int = 1, queue_size: int = 4):
+        self.write = write
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.threads = [
+            threading.Thread(target=self._run, name=f'import-writer-{i}', daemon=True)
+            for i in range(writers)
+        ]
+        self.error: Optional[BaseException] = None
+        self.written = 0
+        # 读取等待队列空位的时间（写入是瓶颈）和写入线程等待批次的时间（读取是瓶颈）
+        self.read_wait = 0.0
+        self.write_wait = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> 'WritePipeline[T]':
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def put(self, item: T) -> None:
+        if self.error is not None:
+            raise self.error
+        started = time.monotonic()
+        self.queue.put(item)
+        self.read_wait += time.monotonic() - started
+
+    def close(self) -> None:
+        """等待队列中的批次写完"""
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            item = self.queue.get()
+            waited = time.monotonic() - started
+            if item is _STOP:
+                return
+            if self.error is not None:
+                # 已经出错，丢弃剩余批次，避免读取线程阻塞在 put
+                continue
+            try:
+                written = self.write(item)
+            except BaseException as e:
+                logger.error(f"写入线程出错: {str(e)}")
+                self.error = e
+                written = 0
+            with self._lock:
+                self.written += written
+                self.write_wait += waited
+
+    def __enter__(self) -> 'WritePipeline[T]':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # 读取出错：停止写入线程，保留原来的异常
+        try:
+            self.close()
+        except BaseException:
+            pass
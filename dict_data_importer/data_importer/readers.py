@@ -0,0 +1,73 @@
+import gzip
+import io
+import json
+import logging
+import os
+from typing import BinaryIO, Dict, Iterator
+
+import ijson
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# 支持的压缩后缀，爬虫输出的分帧压缩文件可以直接流式解压
+COMPRESSION_SUFFIXES = ('.gz', '.zst')
+# 支持的数据文件后缀：JSON 数组和每行一个词条的 JSONL，以及它们的压缩版本
+DATA_FILE_SUFFIXES = tuple(
+    base + comp for base in ('.json', '.jsonl') for comp in ('',) + COMPRESSION_SUFFIXES
+)
+# 爬虫输出目录中不是词条数据的文件
+IGNORED_FILES = ('stats.json',)
+
+
+def is_data_file(filename: str) -> bool:
+    """判断文件是否为词条数据文件"""
+    return filename.endswith(DATA_FILE_SUFFIXES) and os.path.basename(filename) not in IGNORED_FILES
+
+
+def open_data_file(file_path: str) -> BinaryIO:
+    """打开数据文件，.gz / .zst 文件返回解压后的二进制流"""
+    if file_path.endswith('.gz'):
+        # gzip 模块会依次读取拼接在一起的多个 member（即多个帧）
+        return gzip.open(file_path, 'rb')
+    if file_path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"读取 {file_path} 需要安装 zstandard")
+        raw = open(file_path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.BufferedReader(reader)
+    return open(file_path, 'rb')
+
+
+def _strip_compression(file_path: str) -> str:
+    for suffix in COMPRESSION_SUFFIXES:
+        if file_path.endswith(suffix):
+            return file_path[:-len(suffix)]
+    return file_path
+
+
+def iter_word_data(file_path: str) -> Iterator[Dict]:
+    """流式读取数据文件中的词条
+
+    .json 文件按 JSON 数组用 ijson 解析，.jsonl 文件逐行解析，
+    JSONL 中无法解析的行（例如爬虫崩溃时写了一半的最后一行）会被跳过。
+    压缩文件按去掉 .gz / .zst 后缀后的格式解析。
+    """
+    if _strip_compression(file_path).endswith('.jsonl'):
+        with open_data_file(file_path) as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"跳过无法解析的行 {file_path}:{line_no}")
+    else:
+        with open_data_file(file_path) as f:
+            # 使用ijson流式解析JSON数组
+            yield from ijson.items(f, 'item')
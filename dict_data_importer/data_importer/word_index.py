@@ -0,0 +1,81 @@
+"""单词 -> uuid 索引
+
+导入开始时一次性读取目标词典的全部单词，之后判断单词是否已存在不再查询数据库。
+读取使用服务端游标分块返回，uuid 以 16 字节保存（字符串形式需要约 85 字节），
+几十万个单词只占几十 MB 内存。
+
+dict_word 使用 utf8mb4_general_ci，数据库把 May / may、résumé / resume 视为同一个单词
+（唯一键 uk_word_dict），索引按 word_key 规范化后的单词查找，与数据库的比较规则一致。
+"""
+
+import unicodedata
+import uuid
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from .models import DictWord
+
+
+def word_key(word: str) -> str:
+    """按 utf8mb4_general_ci 比较的单词键：不区分大小写和重音，忽略末尾空格
+
+    general_ci 逐字符比较，展开为多个字符的大写（例如 ß -> SS）保留原字符。
+    """
+    decomposed = unicodedata.normalize('NFD', word.rstrip(' '))
+    return ''.join(
+        ch.upper() if len(ch.upper()) == 1 else ch
+        for ch in decomposed if not unicodedata.combining(ch)
+    )
+
+
+class WordUuidIndex:
+    """词典中已有单词的 uuid，键为 word_key(单词)"""
+
+    def __init__(self):
+        self._uuids: Dict[str, object] = {}
+
+    @classmethod
+    def load(cls, conn: Connection, dict_uuid: str, chunk_size: int = 10000) -> 'WordUuidIndex':
+        """流式读取词典的全部单词"""
+        index = cls()
+        table = DictWord.__table__
+        query = select(table.c.word, table.c.uuid).where(table.c.dict_uuid == dict_uuid)
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for word, word_uuid in result:
+            index[word] = word_uuid
+        return index
+
+    def __getitem__(self, word: str) -> str:
+        word_uuid = self.get(word)
+        if word_uuid is None:
+            raise KeyError(word)
+        return word_uuid
+
+    def get(self, word: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._uuids.get(word_key(word))
+        if value is None:
+            return default
+        return str(uuid.UUID(bytes=value)) if isinstance(value, bytes) else value
+
+    def __setitem__(self, word: str, word_uuid: str) -> None:
+        key = word_key(word)
+        try:
+            self._uuids[key] = uuid.UUID(word_uuid).bytes
+        except ValueError:
+            # 不是标准格式的 uuid 原样保存
+            self._uuids[key] = word_uuid
+
+    def update(self, word_uuids: Dict[str, str]) -> None:
+        for word, word_uuid in word_uuids.items():
+            self[word] = word_uuid
+
+    def __contains__(self, word: str) -> bool:
+        return word_key(word) in self._uuids
+
+    def __len__(self) -> int:
+        return len(self._uuids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._uuids)
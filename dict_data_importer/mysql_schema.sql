@@ -24,7 +24,8 @@ CREATE TABLE `dict_word` (
   `deleted_at` datetime DEFAULT NULL COMMENT '删除时间',
   PRIMARY KEY (`id`),
   UNIQUE KEY `uk_uuid` (`uuid`),
-  UNIQUE KEY `uk_word_dict` (`word`, `dict_uuid`)
+  UNIQUE KEY `uk_word_dict` (`word`, `dict_uuid`),
+  KEY `idx_dict_uuid_word` (`dict_uuid`, `word`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci ROW_FORMAT=DYNAMIC COMMENT='词典单词表';
 
 -- 词条表